@@ -1,7 +1,18 @@
-import pygame, sys, random
-from pygame.math import Vector2
 import time
+# Início da inicialização, antes de importar o pygame (que sozinho leva boa parte do tempo até a primeira tela).
+STARTED = time.perf_counter()
+import pygame, sys
 import os
+import argparse
+import json
+import threading
+import weakref
+from collections import OrderedDict, deque
+import snake_core
+# snake_replay, snake_arena, snake_autopilot, snake_stats e snake_net são importados só nos modos que os
+# usam, para não pesarem na abertura do jogo.
+
+IMPORTED = time.perf_counter()
 
 NIGHT_GREEN = (0, 50, 0)
 BLOOD_RED = (139, 0, 0)
@@ -12,709 +23,1535 @@ WHITE = (200, 200, 200)
 GOLD = (255, 215, 0)
 
 cell_size = 30
-cell_number = 20
-import os
-
-# Carrega a imagem do obstáculo
-obstaculo_image_path = os.path.join(os.path.dirname(__file__), 'img', 'obstaculo.png')
-obstaculo_image = pygame.image.load(obstaculo_image_path)
-obstaculo_image = pygame.transform.scale(obstaculo_image, (cell_size, cell_size))  # Redimensiona a imagem para o tamanho do obstáculo
-# Função para gerar uma posição aleatória para os obstáculos
-def gera_pos_aleatoria(obstaculo_pos):
-    x = random.randint(0, cell_number - 1) * cell_size
-    y = random.randint(0, cell_number - 1) * cell_size
-
-    if (x, y) in obstaculo_pos:
-        return gera_pos_aleatoria(obstaculo_pos)
-
-    return x, y
-obstaculo_pos = [gera_pos_aleatoria([]) for _ in range(5)]  # Gera 5 obstáculos aleatórios
-def colisao(pos1, pos2):
-    return pos1 == pos2
-class SNAKE:
-    def __init__(self):
-        # Inicializa o corpo da cobra como uma lista de vetores 2D.
-        self.body = [Vector2(5, 10), Vector2(4, 10), Vector2(3, 10)]
-        # Define a direção inicial da cobra (parada).
-        self.direction = Vector2(0, 0)
-        # Flag para indicar se um novo bloco deve ser adicionado ao corpo da cobra.
-        self.new_block = False
-        self.head_up = pygame.image.load('img/head_up.png').convert_alpha()
-        self.head_down = pygame.image.load('img/head_down.png').convert_alpha()
-        self.head_right = pygame.image.load('img/head_right.png').convert_alpha()
-        self.head_left = pygame.image.load('img/head_left.png').convert_alpha()
-        self.tail_up = pygame.image.load('img/tail_up.png').convert_alpha()
-        self.tail_down = pygame.image.load('img/tail_down.png').convert_alpha()
-        self.tail_right = pygame.image.load('img/tail_right.png').convert_alpha()
-        self.tail_left = pygame.image.load('img/tail_left.png').convert_alpha()
-        self.body_vertical = pygame.image.load('img/body_vertical.png').convert_alpha()
-        self.body_horizontal = pygame.image.load('img/body_horizontal.png').convert_alpha()
-        self.body_tr = pygame.image.load('img/body_tr.png').convert_alpha()
-        self.body_tl = pygame.image.load('img/body_tl.png').convert_alpha()
-        self.body_br = pygame.image.load('img/body_br.png').convert_alpha()
-        self.body_bl = pygame.image.load('img/body_bl.png').convert_alpha()
-        self.crunch_sound = pygame.mixer.Sound('som/crunch.wav')
-
-
-    def draw_snake(self):
-        self.update_head_graphics()
-        self.update_tail_graphics()
-        for index,block in enumerate(self.body):
-            x_pos = int(block.x * cell_size)
-            y_pos = int(block.y * cell_size)
-            block_rect = pygame.Rect(x_pos,y_pos,cell_size,cell_size)
-            if index == 0:
-                screen.blit(self.head,block_rect)
-            elif index == len(self.body) - 1:
-                screen.blit(self.tail,block_rect)
-            else:
-                # Determina a orientação do segmento do corpo com base nos segmentos vizinhos.
-                previous_block = self.body[index + 1] - block
-                next_block = self.body[index - 1] - block
-                if previous_block.x == next_block.x:
-                    screen.blit(self.body_vertical,block_rect)
-                elif previous_block.y == next_block.y:
-                    screen.blit(self.body_horizontal,block_rect)
+cell_number = snake_core.cell_number
+# Quando ativo, o tabuleiro é pré-renderizado e só as células alteradas são enviadas à tela.
+DIRTY_RECT_RENDERING = True
+# Máximo de células visíveis por lado; tabuleiros maiores rolam com a câmera.
+VIEW_CELLS = 20
+# O fundo é pré-renderizado em pedaços de CHUNK_CELLS x CHUNK_CELLS células, guardados com
+# descarte LRU; só os pedaços que aparecem na câmera são desenhados.
+CHUNK_CELLS = 10
+CHUNK_CACHE_SIZE = 64
+# Limite de quadros por segundo da renderização (a lógica roda em passo fixo, independente disso).
+RENDER_FPS = 60
+# Taxa usada quando nada está se movendo: o loop dorme esperando eventos.
+IDLE_FPS = 4
+# Máximo de ticks de lógica executados num mesmo quadro para recuperar atraso.
+MAX_CATCHUP_STEPS = 5
+# Pasta onde cada partida jogada é gravada (veja snake_replay.py).
+REPLAY_DIR = 'replays'
+# Overlay de profiling (F3): quantos quadros entram nos percentis e no gráfico, de quanto em
+# quanto tempo o texto é atualizado (ms), a altura do gráfico e o tamanho da fonte.
+PROFILE_HISTORY = 240
+PROFILE_TEXT_INTERVAL = 250
+PROFILE_GRAPH_HEIGHT = 40
+PROFILE_FONT_SIZE = 14
+# Modo arena: intervalo entre ticks (ms), quantas linhas tem o placar e a cor de cada jogador local.
+ARENA_SPEED = 100
+ARENA_LEADERS = 5
+PLAYER_COLORS = (
+    (120, 200, 255), (255, 140, 120), (150, 255, 140), (255, 230, 110),
+    (220, 140, 255), (110, 255, 230), (255, 170, 220), (255, 255, 255),
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Jogo da Cobra")
+    parser.add_argument('--fps', type=int, default=RENDER_FPS, help="limite de quadros por segundo da renderização")
+    parser.add_argument('--headless', action='store_true', help="roda a lógica sem janela e sem renderização; como não há teclado, precisa de --autopilot, --replay ou --arena")
+    parser.add_argument('--no-interpolation', action='store_true', help="desenha a cobra só nas posições dos ticks")
+    parser.add_argument('--level', type=int, choices=range(1, 5), help="nível inicial (pula o menu)")
+    parser.add_argument('--board', type=int, help="células por lado do tabuleiro (a partir de 8)")
+    parser.add_argument('--seed', type=int, help="semente da primeira partida (obstáculos e frutas)")
+    parser.add_argument('--replay-dir', default=REPLAY_DIR, help="pasta onde as partidas são gravadas")
+    parser.add_argument('--no-record', action='store_true', help="não grava as partidas")
+    parser.add_argument('--stats-db', help="banco SQLite com o placar e as estatísticas das partidas (padrão: o STATS_DB de snake_stats.py)")
+    parser.add_argument('--no-stats', action='store_true', help="não guarda as estatísticas das partidas")
+    parser.add_argument('--replay', metavar='ARQUIVO', help="reproduz uma partida gravada em vez de jogar")
+    parser.add_argument('--replay-speed', type=float, default=1.0, help="velocidade da reprodução (2 = duas vezes mais rápido)")
+    parser.add_argument('--profile', action='store_true', help="mostra o overlay de tempo por fase (F3 liga e desliga)")
+    parser.add_argument('--profile-out', metavar='ARQUIVO', help="grava o tempo de cada fase por quadro em .csv ou .jsonl")
+    parser.add_argument('--arena', type=int, metavar='BOTS', help="modo arena com esse número de bots")
+    parser.add_argument('--players', type=int, default=1, help="jogadores locais na arena (teclado e controles)")
+    parser.add_argument('--autopilot', action='store_true', help="o piloto automático joga (modo demonstração e testes longos)")
+    parser.add_argument('--connect', metavar='HOST:PORTA', help="entra numa arena em rede (veja snake_net.py)")
+    parser.add_argument('--skin', default=DEFAULT_SKIN, help="pacote de sprites da cobra (pasta em img/; F2 troca durante o jogo)")
+    args = parser.parse_args(argv)
+    if args.skin != DEFAULT_SKIN and args.skin not in assets.skin_names():
+        parser.error(f"--skin: escolha entre {', '.join([DEFAULT_SKIN] + assets.skin_names())}")
+    if args.board is None:
+        # Na arena com vários jogadores locais o tabuleiro padrão cabe inteiro na janela, para ninguém
+        # ficar fora da câmera.
+        if args.arena is None:
+            args.board = cell_number
+        else:
+            import snake_arena
+            args.board = snake_arena.ARENA_SIZE if args.players == 1 else VIEW_CELLS
+    if args.board < 8:
+        parser.error("--board precisa ser pelo menos 8")
+    if args.seed is not None and not 0 <= args.seed <= snake_core.SEED_MASK:
+        parser.error("--seed precisa estar entre 0 e 2**64 - 1")
+    if args.headless and not (args.autopilot or args.replay or args.arena is not None):
+        parser.error("--headless não tem teclado: use junto com --autopilot, --replay ou --arena")
+    return args
+
+
+# Sprites da cobra, os únicos que um pacote de skin troca.
+SNAKE_SPRITE_NAMES = (
+    'head_up', 'head_down', 'head_right', 'head_left',
+    'tail_up', 'tail_down', 'tail_right', 'tail_left',
+    'body_vertical', 'body_horizontal', 'body_tr', 'body_tl', 'body_br', 'body_bl',
+)
+# Sprites que vão para o atlas, na ordem em que são empacotados.
+SPRITE_NAMES = SNAKE_SPRITE_NAMES + ('apple', 'obstaculo')
+# Tamanho de célula para o qual os sprites foram desenhados (em 30 px eles são usados sem escala).
+BASE_CELL_SIZE = 30
+# Skin dos sprites soltos em img/; os pacotes são as subpastas de img/ com os sprites da cobra
+# (img/CH/c_head_up.png, ...) e se chamam pelo nome da pasta.
+DEFAULT_SKIN = 'default'
+# Quantos pacotes de skin (por tamanho de célula) ficam carregados; o usado há mais tempo sai primeiro.
+SKIN_CACHE_SIZE = 2
+
+
+class ASSETS:
+    """Imagens do jogo, carregadas do disco uma única vez por processo.
+
+    Os sprites da cobra, a maçã e o obstáculo são empacotados numa única
+    superfície (atlas) para cada tamanho de célula; cada sprite é uma
+    subsuperfície desse atlas. Nada é carregado antes do primeiro uso, que
+    precisa acontecer depois de pygame.display.set_mode(). preload() pode
+    ler os arquivos antes, numa outra thread; o primeiro uso espera por ela.
+
+    Os pacotes de skin só são lidos do disco quando escolhidos, cada um no
+    seu próprio atlas, e no máximo `max_skins` ficam em memória (LRU).
+    """
+
+    def __init__(self, directory='img', max_skins=SKIN_CACHE_SIZE):
+        self.directory = directory
+        self.max_skins = max_skins
+        self.originals = None
+        # Imagens lidas por preload(), ainda sem converter, e o evento que marca o fim da leitura.
+        self.raw = {}
+        self.loading = None
+        self.atlases = {}
+        self.packs = None
+        self.skins = OrderedDict()
+        self.tints = {}
+        self.images = {}
+        # Cópias com RLE dos sprites da cobra (veja accelerated()); somem junto com o sprite original.
+        self.rle = weakref.WeakKeyDictionary()
+
+    def preload(self):
+        # Só lê e decodifica os PNGs; convert_alpha() fica para load_originals(), na thread principal.
+        try:
+            for name in SPRITE_NAMES:
+                self.raw[name] = pygame.image.load(os.path.join(self.directory, name + '.png'))
+        finally:
+            if self.loading is not None:
+                self.loading.set()
+
+    def load_originals(self):
+        if self.originals is None:
+            if self.loading is not None:
+                self.loading.wait()
+            originals = {}
+            for name in SPRITE_NAMES:
+                image = self.raw.pop(name, None)
+                if image is None:
+                    image = pygame.image.load(os.path.join(self.directory, name + '.png'))
+                originals[name] = image.convert_alpha()
+            self.originals = originals
+        return self.originals
+
+    def sprite_size(self, name, image, size):
+        if name == 'obstaculo':
+            return size, size  # O obstáculo ocupa exatamente uma célula
+        width, height = image.get_size()
+        return round(width * size / BASE_CELL_SIZE), round(height * size / BASE_CELL_SIZE)
+
+    def pack_atlas(self, originals, size):
+        # Empacota as imagens numa superfície só e devolve {nome: subsuperfície}.
+        sizes = {name: self.sprite_size(name, image, size) for name, image in originals.items()}
+        atlas = pygame.Surface((sum(w for w, h in sizes.values()), max(h for w, h in sizes.values())), pygame.SRCALPHA).convert_alpha()
+        sprites = {}
+        x = 0
+        for name, image in originals.items():
+            if image.get_size() != sizes[name]:
+                image = pygame.transform.smoothscale(image, sizes[name])
+            atlas.blit(image, (x, 0))
+            sprites[name] = atlas.subsurface(pygame.Rect((x, 0), sizes[name]))
+            x += sizes[name][0]
+        return sprites
+
+    def sprites(self, size=cell_size):
+        # Devolve {nome: subsuperfície} do atlas desse tamanho de célula, montando-o na primeira vez.
+        if size not in self.atlases:
+            self.atlases[size] = self.pack_atlas(self.load_originals(), size)
+        return self.atlases[size]
+
+    def sprite(self, name, size=cell_size):
+        return self.sprites(size)[name]
+
+    def skin_names(self):
+        # Procura os pacotes só pelos nomes dos arquivos; nenhuma imagem é aberta aqui.
+        if self.packs is None:
+            self.packs = {}
+            with os.scandir(self.directory) as entries:
+                folders = sorted(entry.path for entry in entries if entry.is_dir())
+            for folder in folders:
+                files = set(os.listdir(folder))
+                for file in files:
+                    if file.endswith('head_up.png'):
+                        prefix = file[:-len('head_up.png')]
+                        if all(f"{prefix}{name}.png" in files for name in SNAKE_SPRITE_NAMES):
+                            self.packs[os.path.basename(folder)] = (folder, prefix)
+                        break
+        return list(self.packs)
+
+    def skin_sprites(self, skin=DEFAULT_SKIN, size=cell_size):
+        # Sprites da cobra no pacote `skin`, carregado e convertido na primeira vez que é escolhido.
+        if skin == DEFAULT_SKIN:
+            return self.sprites(size)
+        key = (skin, size)
+        sprites = self.skins.get(key)
+        if sprites is None:
+            self.skin_names()
+            folder, prefix = self.packs[skin]
+            originals = {
+                name: pygame.image.load(os.path.join(folder, f"{prefix}{name}.png")).convert_alpha()
+                for name in SNAKE_SPRITE_NAMES
+            }
+            sprites = self.pack_atlas(originals, size)
+            self.skins[key] = sprites
+            if len(self.skins) > self.max_skins:
+                evicted, _ = self.skins.popitem(last=False)
+                # As cores feitas a partir do pacote descartado saem junto.
+                self.tints = {tint: value for tint, value in self.tints.items() if tint[1:] != evicted}
+        else:
+            self.skins.move_to_end(key)
+        return sprites
+
+    def accelerated(self, sprite):
+        # Cópia do sprite codificada em RLE: o blit pula as faixas transparentes e fica umas 3 vezes mais
+        # rápido. As bordas semitransparentes podem sair com 1/255 de diferença.
+        copy = self.rle.get(sprite)
+        if copy is None:
+            copy = sprite.copy()
+            copy.set_alpha(255, pygame.RLEACCEL)
+            self.rle[sprite] = copy
+        return copy
+
+    def next_skin(self, skin):
+        skins = [DEFAULT_SKIN] + self.skin_names()
+        return skins[(skins.index(skin) + 1) % len(skins)]
+
+    def tinted_sprites(self, color, size=cell_size, skin=DEFAULT_SKIN):
+        # Sprites multiplicados por `color`, para diferenciar os jogadores da arena; em cache por cor.
+        key = (color, skin, size)
+        if key not in self.tints:
+            tinted = {}
+            for name, sprite in self.skin_sprites(skin, size).items():
+                image = sprite.copy()
+                image.fill(color + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+                tinted[name] = image
+            self.tints[key] = tinted
+        return self.tints[key]
+
+    def image(self, path, size=None, alpha=False):
+        # Imagens soltas (como o fundo do menu), já convertidas e escaladas, em cache por tamanho.
+        key = (path, size, alpha)
+        if key not in self.images:
+            image = pygame.image.load(path)
+            image = image.convert_alpha() if alpha else image.convert()
+            if size is not None and image.get_size() != size:
+                image = pygame.transform.scale(image, size)
+            self.images[key] = image
+        return self.images[key]
+
+
+assets = ASSETS()
+
+FONT_PATH = os.path.join('font', 'PoetsenOne-Regular.ttf')
+# Quantos textos renderizados ficam guardados antes de descartar os usados há mais tempo.
+TEXT_CACHE_SIZE = 256
+
+
+class TEXT_CACHE:
+    """Cache de fontes e de textos renderizados.
+
+    Cada fonte é lida do disco uma vez por (arquivo, tamanho). Os textos ficam
+    guardados por (arquivo, tamanho, texto, cor) com descarte LRU, então o HUD
+    só é renderizado de novo quando o valor mostrado muda.
+    """
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size, path=FONT_PATH):
+        key = (path, size)
+        if key not in self.fonts:
+            self.fonts[key] = pygame.font.Font(path, size)
+        return self.fonts[key]
+
+    def render(self, text, size, color, path=FONT_PATH):
+        key = (path, size, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font(size, path).render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+text_cache = TEXT_CACHE()
+
+# Mixer: frequência, formato, canais de saída e tamanho do buffer. Com um buffer pequeno o som sai
+# poucos milissegundos depois do evento; o padrão do SDL (4096 amostras) atrasa quase 0,1 s.
+AUDIO_FREQUENCY = 44100
+AUDIO_SIZE = -16
+AUDIO_OUTPUT_CHANNELS = 2
+AUDIO_BUFFER = 512
+SOUND_DIRECTORY = 'som'
+# Música de fundo: tocada em streaming (pygame.mixer.music), não decodificada com os efeitos.
+MUSIC_FILES = ('musica_de_fundo.mp3',)
+# Canais reservados para os efeitos e a prioridade de cada efeito: sem canal livre, um efeito rouba o
+# canal do efeito de menor prioridade (ou igual, o mais antigo); se todos forem maiores, não toca.
+SOUND_CHANNELS = 8
+SOUND_PRIORITIES = {'crunch': 1, 'jumpscare': 3}
+
+
+class AUDIO:
+    """Efeitos sonoros decodificados uma vez e tocados num conjunto fixo de canais.
+
+    pre_init() precisa vir antes de pygame.init(), para o mixer abrir já com
+    o buffer AUDIO_BUFFER. init() pode rodar numa outra thread: até os sons
+    estarem decodificados, play() não faz nada. Sem dispositivo de áudio (ou
+    no modo headless) o jogo segue mudo.
+    """
+
+    def __init__(self, directory=SOUND_DIRECTORY, channels=SOUND_CHANNELS):
+        self.directory = directory
+        self.channel_count = channels
+        self.sounds = {}
+        self.channels = []
+        # (prioridade, ordem) do efeito que está em cada canal.
+        self.playing = []
+        self.plays = 0
+
+    def pre_init(self):
+        pygame.mixer.pre_init(AUDIO_FREQUENCY, AUDIO_SIZE, AUDIO_OUTPUT_CHANNELS, AUDIO_BUFFER)
+
+    def init(self, enabled=True):
+        if not enabled:
+            return
+        if pygame.mixer.get_init() is None:
+            try:
+                pygame.mixer.init()
+            except pygame.error as error:
+                print(f"Sem áudio: {error}")
+                return
+        if pygame.mixer.get_num_channels() < self.channel_count:
+            pygame.mixer.set_num_channels(self.channel_count)
+        # Os canais do conjunto ficam fora do Sound.play() automático do pygame.
+        pygame.mixer.set_reserved(self.channel_count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+        self.playing = [(0, 0)] * self.channel_count
+        sounds = {}
+        for file in sorted(os.listdir(self.directory)):
+            name, extension = os.path.splitext(file)
+            if extension in ('.wav', '.ogg', '.mp3') and file not in MUSIC_FILES:
+                sounds[name] = pygame.mixer.Sound(os.path.join(self.directory, file))
+        self.sounds = sounds
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return None
+        priority = SOUND_PRIORITIES.get(name, 1)
+        self.plays += 1
+        chosen = None
+        for number, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                chosen = number
+                break
+            if self.playing[number][0] <= priority and (chosen is None or self.playing[number] < self.playing[chosen]):
+                chosen = number
+        if chosen is None:
+            return None
+        self.playing[chosen] = (priority, self.plays)
+        self.channels[chosen].play(sound)
+        return self.channels[chosen]
+
+
+audio = AUDIO()
+
+
+# Sprites dos segmentos do meio, na ordem dos códigos de segment_codes().
+SEGMENT_SPRITES = ('body_vertical', 'body_horizontal', 'body_tl', 'body_bl', 'body_tr', 'body_br')
+SEGMENT_CODES = {}
+
+
+def segment_codes(stride):
+    # {(deslocamento até o vizinho do lado do rabo, até o do lado da cabeça): código}, uma tabela por largura de grid.
+    if stride not in SEGMENT_CODES:
+        steps = (-stride, 1, stride, -1)
+        codes = {}
+        for previous_block in steps:
+            for next_block in steps:
+                relation = previous_block + next_block
+                if relation == 0:
+                    codes[previous_block, next_block] = 0 if abs(previous_block) == stride else 1
+                elif relation == -1 - stride:
+                    codes[previous_block, next_block] = 2
+                elif relation == -1 + stride:
+                    codes[previous_block, next_block] = 3
+                elif relation == 1 - stride:
+                    codes[previous_block, next_block] = 4
                 else:
-                    if previous_block.x == -1 and next_block.y == -1 or previous_block.y == -1 and next_block.x == -1:
-                        screen.blit(self.body_tl,block_rect)
-                    elif previous_block.x == -1 and next_block.y == 1 or previous_block.y == 1 and next_block.x == -1:
-                        screen.blit(self.body_bl,block_rect)
-                    elif previous_block.x == 1 and next_block.y == -1 or previous_block.y == -1 and next_block.x == 1:
-                        screen.blit(self.body_tr,block_rect)
-                    elif previous_block.x == 1 and next_block.y == 1 or previous_block.y == 1 and next_block.x == 1:
-                        screen.blit(self.body_br,block_rect)
-
-    def update_head_graphics(self):
-        head_relation = self.body[1] - self.body[0]
-        if head_relation == Vector2(1,0): self.head = self.head_left
-        elif head_relation == Vector2(-1,0): self.head = self.head_right
-        elif head_relation == Vector2(0,1): self.head = self.head_up
-        elif head_relation == Vector2(0,-1): self.head = self.head_down
-
-    def update_tail_graphics(self):
-        tail_relation = self.body[-2] - self.body[-1]
-        if tail_relation == Vector2(1,0): self.tail = self.tail_left
-        elif tail_relation == Vector2(-1,0): self.tail = self.tail_right
-        elif tail_relation == Vector2(0,1): self.tail = self.tail_up
-        elif tail_relation == Vector2(0,-1): self.tail = self.tail_down
-
-    def move_snake(self):
-        if self.new_block == True:
-            body_copy = self.body[:]
-            body_copy.insert(0,body_copy[0] + self.direction)
-            self.body = body_copy[:]
-            self.new_block = False
+                    codes[previous_block, next_block] = 5
+        SEGMENT_CODES[stride] = codes
+    return SEGMENT_CODES[stride]
+
+
+class CAMERA:
+    """Parte do tabuleiro que aparece na tela, em pixels do tabuleiro.
+
+    Em tabuleiros maiores que a janela a câmera segue a cabeça da cobra sem
+    sair do tabuleiro; quando o tabuleiro cabe inteiro na janela ela fica
+    parada em (0, 0). Tudo o que é desenhado passa por `rect`: o que está
+    fora dele não é desenhado e o resto é deslocado por `rect.topleft`.
+    """
+
+    def __init__(self, width, height):
+        self.rect = pygame.Rect(0, 0, width, height)
+
+    def follow(self, x, y, board_pixels):
+        self.rect.center = (int(x), int(y))
+        self.rect.clamp_ip(pygame.Rect(0, 0, board_pixels, board_pixels))
+
+    def visible(self, margin=0):
+        # Área do tabuleiro que vale a pena desenhar; `margin` cobre sprites maiores que a célula.
+        return self.rect.inflate(2 * margin, 2 * margin)
+
+
+class SNAKE(snake_core.SNAKE):
+    """Cobra desenhada com os sprites da skin.
+
+    O sprite de cada segmento do meio só depende dos dois vizinhos, que não
+    mudam enquanto o segmento existe; por isso ele é escolhido uma vez, pela
+    tabela de segment_codes(), quando a cabeça sai da célula, e fica em
+    `segments` (do pescoço até antes do rabo) com a posição em pixels. A
+    cada quadro só a cabeça e o rabo são calculados e tudo vai à tela numa
+    única chamada a screen.blits().
+    """
+    def __init__(self, grid=None, cells=None):
+        super().__init__(grid, cells)
+        self.set_sprites(assets.sprites(cell_size))
+        self.board_rect = pygame.Rect(0, 0, self.grid.size * cell_size, self.grid.size * cell_size)
+
+    def set_sprites(self, sprites):
+        # A cobra é o que mais vai à tela por quadro: usa as cópias em RLE dos sprites.
+        sprites = {name: assets.accelerated(sprites[name]) for name in SNAKE_SPRITE_NAMES}
+        stride = self.grid.stride
+        # Sprites da cabeça e do rabo pelo deslocamento até o vizinho no grid.
+        self.head_sprites = {1: sprites['head_left'], -1: sprites['head_right'], stride: sprites['head_up'], -stride: sprites['head_down']}
+        self.tail_sprites = {1: sprites['tail_left'], -1: sprites['tail_right'], stride: sprites['tail_up'], -stride: sprites['tail_down']}
+        self.segment_sprites = [sprites[name] for name in SEGMENT_SPRITES]
+        self.segments = deque()  # Refeito no próximo desenho, já com os sprites novos
+
+    def place(self, cells):
+        super().place(cells)
+        self.segments = deque()
+
+    def restore(self, state):
+        super().restore(state)
+        self.segments = deque()
+
+    def move_tail(self):
+        shrinking = not self.new_block
+        super().move_tail()
+        if shrinking and self.segments:
+            self.segments.pop()  # O último segmento do meio virou o rabo
+
+    def move_head(self):
+        head = super().move_head()
+        body = self.body
+        if len(body) > 2:
+            self.segments.appendleft(self.segment(body[2], body[1], head))
+        return head
+
+    def segment(self, previous_block, block, next_block):
+        # (sprite, posição no tabuleiro em pixels) de um segmento do meio.
+        code = segment_codes(self.grid.stride)[(previous_block - block, next_block - block)]
+        return self.segment_sprites[code], (self.grid.cell_x(block) * cell_size, self.grid.cell_y(block) * cell_size)
+
+    def rebuild_segments(self):
+        body = list(self.body)
+        self.segments = deque(self.segment(body[i + 1], body[i], body[i - 1]) for i in range(1, len(body) - 1))
+
+    def draw_snake(self, alpha=1.0):
+        body = self.body
+        if len(self.segments) != len(body) - 2:
+            # Corpo trocado por fora de move_tail()/move_head() (respawn, restore, troca de skin).
+            self.rebuild_segments()
+        grid = self.grid
+        # Blocos fora da câmera não são desenhados; os que aparecem são deslocados para a tela.
+        visible = camera.visible(cell_size * 2)
+        left, top = camera.rect.topleft
+        head = body[0]
+        tail = body[-1]
+        blits = []
+        x_pos = grid.cell_x(head) * cell_size
+        y_pos = grid.cell_y(head) * cell_size
+        if visible.collidepoint(x_pos, y_pos):
+            if alpha < 1:
+                # Interpola a cabeça entre a posição anterior e a atual.
+                blits.append((self.head_sprites[body[1] - head], self.interpolated_rect(body[1], head, alpha).move(-left, -top)))
+            else:
+                blits.append((self.head_sprites[body[1] - head], (x_pos - left, y_pos - top)))
+        if left == 0 and top == 0 and visible.contains(self.board_rect):
+            blits.extend(self.segments)  # A câmera mostra o tabuleiro inteiro: as posições já são as da tela
         else:
-            body_copy = self.body[:-1]
-            body_copy.insert(0,body_copy[0] + self.direction)
-            self.body = body_copy[:]
-
-    def add_block(self):
-        self.new_block = True
-
-    def play_crunch_sound(self):
-        self.crunch_sound.play()
-
-    def reset(self):
-        self.body = [Vector2(5,10),Vector2(4,10),Vector2(3,10)]
-        self.direction = Vector2(0,0)
-
-class FRUIT:
-    def __init__(self, snake_body):
-        self.snake_body = snake_body
-        self.randomize()
-        self.is_special = False
-
+            blits.extend([(sprite, (x - left, y - top)) for sprite, (x, y) in self.segments if visible.collidepoint(x, y)])
+        x_pos = grid.cell_x(tail) * cell_size
+        y_pos = grid.cell_y(tail) * cell_size
+        if visible.collidepoint(x_pos, y_pos):
+            tail_rect = (x_pos - left, y_pos - top)
+            if alpha < 1 and self.last_tail is not None and self.last_tail != tail:
+                # O rabo ainda está saindo da célula antiga: preenche a célula atual com corpo.
+                blits.append((self.segment(self.last_tail, tail, body[-2])[0], tail_rect))
+                tail_rect = self.interpolated_rect(self.last_tail, tail, alpha).move(-left, -top)
+            blits.append((self.tail_sprites[body[-2] - tail], tail_rect))
+        return screen.blits(blits)
+
+    def interpolated_rect(self, start, end, alpha):
+        # Posição no tabuleiro (em pixels) a uma fração `alpha` do caminho entre duas células.
+        grid = self.grid
+        x_pos = (grid.cell_x(start) + (grid.cell_x(end) - grid.cell_x(start)) * alpha) * cell_size
+        y_pos = (grid.cell_y(start) + (grid.cell_y(end) - grid.cell_y(start)) * alpha) * cell_size
+        return pygame.Rect(int(x_pos), int(y_pos), cell_size, cell_size)
+
+class FRUIT(snake_core.FRUIT):
     def draw_fruit(self):
-        fruit_rect = pygame.Rect(int(self.pos.x * cell_size),int(self.pos.y * cell_size),cell_size,cell_size)
-        screen.blit(apple,fruit_rect)
-
-    def randomize(self):
-        self.x = random.randint(0, cell_number - 1)
-        self.y = random.randint(0, cell_number - 1)
-        self.pos = Vector2(self.x, self.y)
-
-        # GARANTE QUE A FRUTA NÃO APAREÇA NA COBRA
-        while self.pos in self.snake_body:
-            self.x = random.randint(0, cell_number - 1)
-            self.y = random.randint(0, cell_number - 1)
-            self.pos = Vector2(self.x, self.y)
-        self.is_special = False
-
-    def make_special(self):
-        self.is_special = True
-
-class OBSTACLE:
-    def __init__(self):
-        self.randomize()
-
-    def draw_obstacle(self):
-        obstacle_rect = pygame.Rect(int(self.pos.x * cell_size), int(self.pos.y * cell_size), cell_size, cell_size)
-        pygame.draw.rect(screen, DARK_GRAY, obstacle_rect)
-
-    def randomize(self):
-        self.x = random.randint(0, cell_number - 1)
-        self.y = random.randint(0, cell_number - 1)
-        self.pos = Vector2(self.x, self.y)
-
-class MAIN:
-    def __init__(self):
-        self.snake = SNAKE()
-        self.fruit = FRUIT(self.snake.body)
-        self.lives = 3
-        self.score = 0
-        self.has_moved = False
-        self.apples_collected = 0
-        self.apples_to_win = 5
-        self.xp = 0
-        self.level = 1
-        self.level_up = False
-        self.obstacle = None
-        self.obstacle_chance = 0.2
-        self.level_complete = False
-        self.speed = 150
-        self.background_colors = [BACKGROUND_COLOR, NIGHT_GREEN, BLOOD_RED, DARK_GRAY]
-        self.current_background_color = self.background_colors[0]
-        self.show_objective = True
-        self.objective_timer = 2000
-        self.objective_start_time = 0
-        self.define_level_goals()
-        self.increase_speed()
-        self.obstaculo_pos = [gera_pos_aleatoria([]) for _ in range(5)]  # Gera 5 obstáculos aleatórios
-
-    # Outras funções da classe MAIN...
-
-    def define_level_goals(self):
-        if self.level == 1:
-            self.apples_to_win = 10
-        elif self.level == 2:
-            self.apples_to_win = 15
-        elif self.level == 3:
-            self.apples_to_win = 20
-        elif self.level == 4:
-            self.apples_to_win = 25
-        if self.level == 1:
-            self.apples_to_win = 10
-        elif self.level == 2:
-            self.apples_to_win = 15
-        elif self.level == 3:
-            self.apples_to_win = 20
-        elif self.level == 4:
-            self.apples_to_win = 25
-    
-    def increase_speed(self):
-        self.speed = max(50, self.speed - 15)
-        print(f"Snake speed increased to: {self.speed}")
-    
-    def next_level(self):
-        self.level += 1
-        if self.level > 4:
-            self.level = 1  # Wrap around to level 1 if we exceed the number of levels
-    
-        self.current_background_color = self.background_colors[self.level - 1]
-        self.apples_collected = 0
-        self.fruit = FRUIT(self.snake.body)  # Passa o corpo da cobra atualizado
-        self.define_level_goals()
-        self.show_objective = True
-        self.objective_start_time = pygame.time.get_ticks()
-        self.increase_speed()  # Aumenta a velocidade da cobra
-        self.level_complete = False
-        self.level_complete_timer = None
-        pygame.time.set_timer(SCREEN_UPDATE, self.speed)
-    
-        # Redirecionar para a tela inicial
-        selected_level = main_menu(screen)
-        self.level = selected_level
-        self.define_level_goals()
-        self.increase_speed()
-
-    def update(self):
-        if not self.game_over() and self.has_moved and not self.show_objective and not self.level_complete:
-            self.snake.move_snake() # Move a cobra.
-            self.check_collision() # Verifica se houve colisão com a fruta.
-            self.check_fail() # Verifica se a cobra bateu em algo.
-
-    def draw_elements(self):
-        self.draw_grass()
-        self.fruit.draw_fruit()
-        self.snake.draw_snake()
-        self.draw_score()
-        self.draw_lives()
-        if self.obstacle:
-            self.obstacle.draw_obstacle()
-        if self.show_objective:
-            self.draw_objective()
-
-    # Outras funções da classe MAIN...
-
-    def check_collision(self):
-        if self.fruit.pos == self.snake.body[0]:
-            self.snake.add_block()
-            self.snake.play_crunch_sound()
-            self.score += 1  # Aumenta a pontuação em 1 por maçã
-            self.apples_collected += 1
+        # Devolve None quando a fruta está fora da câmera.
+        fruit_rect = pygame.Rect(self.x * cell_size,self.y * cell_size,cell_size,cell_size)
+        if not camera.visible(cell_size).colliderect(fruit_rect):
+            return None
+        return screen.blit(assets.sprite('apple'), fruit_rect.move(-camera.rect.x, -camera.rect.y))
+
+
+class SCHEDULER:
+    """Controla o ritmo do loop principal.
+
+    A renderização é limitada a `render_fps` quadros por segundo e a lógica avança
+    em passos fixos de `step_ms` milissegundos, acumulando o tempo real decorrido.
+    `alpha` indica quanto do próximo passo já passou, para interpolar o desenho.
+    """
+
+    def __init__(self, clock, render_fps=RENDER_FPS):
+        self.clock = clock
+        self.render_fps = render_fps
+        self.accumulator = 0
+        self.alpha = 0.0
+
+    def events(self, idle=False):
+        # Quando nada se move, bloqueia esperando um evento em vez de girar o loop.
+        if idle:
+            event = pygame.event.wait(1000 // IDLE_FPS)
+            if event.type == pygame.NOEVENT:
+                return []
+            return [event] + pygame.event.get()
+        return pygame.event.get()
+
+    def tick(self, idle=False):
+        if idle:
+            # A espera acontece em events(), que acorda assim que chega uma entrada.
+            dt = self.clock.tick()
+            self.reset()
+        else:
+            dt = self.clock.tick(self.render_fps)
+            self.accumulator += dt
+        return dt
+
+    def logic_steps(self, step_ms, max_steps=MAX_CATCHUP_STEPS):
+        steps = 0
+        while self.accumulator >= step_ms and steps < max_steps:
+            self.accumulator -= step_ms
+            steps += 1
+        if steps == max_steps:
+            self.accumulator = 0  # Descarta o atraso em vez de tentar recuperá-lo inteiro
+        self.alpha = self.accumulator / step_ms
+        return steps
 
-            # Se o número de maçãs coletadas for maior ou igual ao número de maçãs necessárias para vencer.
-            if self.apples_collected >= self.apples_to_win:
-                self.level_complete = True # Define a flag de nível completo como True.
-                self.level_complete_timer = pygame.time.get_ticks() # Define o tempo em que o nível foi completado.
+    def reset(self):
+        self.accumulator = 0
+        self.alpha = 0.0
+
+
+class PROFILER:
+    """Mede o tempo de cada fase do loop principal, quadro a quadro.
+
+    O loop chama begin_frame() no começo do quadro e mark(fase) ao fim de cada
+    fase; o tempo desde a marca anterior vai para aquela fase. add() soma um
+    trecho medido à parte (os obstáculos, que são desenhados dentro de
+    draw_elements e por isso também contam em 'draw'). Com `out_path` cada quadro vira uma linha de um arquivo CSV
+    ou JSON-lines (pela extensão). O overlay mostra os percentis do tempo de
+    quadro e um gráfico dos últimos quadros; F3 liga e desliga.
+    """
+    PHASES = ('wait', 'events', 'logic', 'draw', 'obstacles', 'present')
+
+    def __init__(self, enabled=False, out_path=None, history=PROFILE_HISTORY):
+        self.enabled = enabled or out_path is not None
+        self.visible = enabled
+        self.frame_times = deque(maxlen=history)
+        self.phase_times = {phase: deque(maxlen=history) for phase in self.PHASES}
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        self.frame_count = 0
+        self.frame_start = None
+        self.last_mark = None
+        self.overlay = None
+        self.overlay_time = 0
+        self.out = None
+        self.csv = False
+        if out_path is not None:
+            self.out = open(out_path, 'w', encoding='utf-8')
+            self.csv = out_path.endswith('.csv')
+            if self.csv:
+                self.out.write('frame,frame_ms,' + ','.join(f'{phase}_ms' for phase in self.PHASES) + '\n')
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.enabled = self.visible or self.out is not None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.end_frame(now)
+        self.frame_start = self.last_mark = now
+
+    def mark(self, phase):
+        if not self.enabled or self.last_mark is None:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def add(self, phase, seconds):
+        if self.enabled:
+            self.current[phase] += seconds
+
+    def end_frame(self, now):
+        # O tempo do quadro vai de um begin_frame() ao seguinte, incluindo a espera do relógio.
+        frame_ms = (now - self.frame_start) * 1000
+        self.frame_count += 1
+        self.frame_times.append(frame_ms)
+        for phase in self.PHASES:
+            self.phase_times[phase].append(self.current[phase] * 1000)
+            self.current[phase] = 0.0
+        if self.out is not None:
+            phases = [round(self.phase_times[phase][-1], 3) for phase in self.PHASES]
+            if self.csv:
+                self.out.write(f"{self.frame_count},{frame_ms:.3f}," + ','.join(map(str, phases)) + '\n')
             else:
-                self.fruit.randomize()
-
-
-        for block in self.snake.body[1:]:
-            if block == self.fruit.pos:
-                self.fruit.randomize()
-
-    def check_fail(self):
-        if not 0 <= self.snake.body[0].x < cell_number or not 0 <= self.snake.body[0].y < cell_number:
-            self.lose_life()
-        for block in self.snake.body[1:]:
-            if block == self.snake.body[0]:
-                self.lose_life()
-        if self.obstacle and self.snake.body[0] == self.obstacle.pos:
-            self.lose_life()
-
-    def lose_life(self):
-        self.lives -= 1
-        if not self.game_over():
-            self.reset_snake()
-
-    def game_over(self):
-        return self.lives <= 0
-
-    def draw_grass(self):
-        for row in range(cell_number):
-            for col in range(cell_number):
-                grass_rect = pygame.Rect(col * cell_size, row * cell_size, cell_size, cell_size)
+                sample = {'frame': self.frame_count, 'frame_ms': round(frame_ms, 3)}
+                sample.update((f'{phase}_ms', value) for phase, value in zip(self.PHASES, phases))
+                self.out.write(json.dumps(sample) + '\n')
+
+    def percentile(self, fraction):
+        times = sorted(self.frame_times)
+        return times[min(len(times) - 1, int(len(times) * fraction))] if times else 0.0
+
+    def draw(self, surface, budget_ms=1000 / RENDER_FPS):
+        # Devolve o retângulo desenhado, para entrar na lista de áreas sujas.
+        now = pygame.time.get_ticks()
+        if self.overlay is None or now - self.overlay_time >= PROFILE_TEXT_INTERVAL:
+            self.overlay_time = now
+            self.overlay = self.render_text()
+        # No canto superior direito, longe das vidas (em cima à esquerda) e da pontuação (embaixo).
+        rect = surface.blit(self.overlay, self.overlay.get_rect(topright=(surface.get_width() - 4, 4)))
+        # Gráfico dos últimos quadros: cada barra é um quadro, vermelha se passou do orçamento.
+        graph = pygame.Rect(rect.left, rect.bottom, rect.width, PROFILE_GRAPH_HEIGHT)
+        surface.fill((0, 0, 0), graph)
+        scale = PROFILE_GRAPH_HEIGHT / (3 * budget_ms)
+        x = graph.right - len(self.frame_times)
+        for frame_ms in self.frame_times:
+            height = min(PROFILE_GRAPH_HEIGHT, max(1, int(frame_ms * scale)))
+            color = GOLD if frame_ms <= budget_ms * 1.5 else BLOOD_RED
+            surface.fill(color, (x, graph.bottom - height, 1, height))
+            x += 1
+        budget_y = graph.bottom - int(budget_ms * scale)
+        surface.fill(WHITE, (graph.left, budget_y, graph.width, 1))
+        return rect.union(graph)
+
+    def render_text(self):
+        count = len(self.frame_times)
+        mean = sum(self.frame_times) / count if count else 0.0
+        lines = [
+            f"FPS {1000 / mean if mean else 0:5.1f}  p50 {self.percentile(0.5):5.1f}  "
+            f"p95 {self.percentile(0.95):5.1f}  p99 {self.percentile(0.99):5.1f} ms",
+        ]
+        for phase in self.PHASES:
+            times = self.phase_times[phase]
+            lines.append(f"{phase:<9} {sum(times) / len(times) if times else 0:6.2f} ms  max {max(times, default=0):6.2f}")
+        font = text_cache.font(PROFILE_FONT_SIZE)
+        line_height = font.get_linesize()
+        rendered = [font.render(line, True, TEXT_COLOR) for line in lines]
+        width = max(PROFILE_HISTORY, max(line.get_width() for line in rendered) + 8)
+        overlay = pygame.Surface((width, line_height * len(lines) + 4), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        for i, line in enumerate(rendered):
+            overlay.blit(line, (4, 2 + i * line_height))
+        return overlay
+
+    def close(self):
+        if self.out is not None:
+            self.out.close()
+            self.out = None
+
+
+# Frase digitada na tela inicial e o intervalo entre as letras.
+MENU_PHRASE = "Bem-vindo ao Jogo da Cobra!"
+TYPING_DELAY_MS = 50
+MENU_BACKGROUND = 'img/Capa_Prancheta 1.png'
+
+
+class MENU:
+    """Tela inicial de escolha de nível, desenhada como um estado do loop principal.
+
+    A animação de digitação avança pelo tempo decorrido desde que o menu abriu,
+    então os eventos continuam sendo tratados enquanto ela acontece. O fundo e os
+    botões são compostos uma vez; cada quadro só copia essa imagem e a frase.
+    """
+
+    def __init__(self, surface, phrase=MENU_PHRASE):
+        self.surface = surface
+        self.phrase = phrase
+        self.start_time = pygame.time.get_ticks()
+        self.typed_length = None
+        self.frame = assets.image(MENU_BACKGROUND, surface.get_size()).copy()
+        width, height = surface.get_size()
+        self.level_buttons = []
+        for i in range(1, snake_core.LEVEL_COUNT + 1):
+            button_surface = text_cache.render(f"Nível {i}", 30, TEXT_COLOR)
+            button_rect = button_surface.get_rect(
+                center=(width // 2 + (i - 2.5) * 150, height // 2 + 150))  # Mais para baixo
+            pygame.draw.rect(self.frame, BLOOD_RED, button_rect.inflate(30, 10), border_radius=15)
+            pygame.draw.rect(self.frame, WHITE, button_rect.inflate(30, 10), 4, border_radius=15)
+            self.frame.blit(button_surface, button_rect)
+            self.level_buttons.append((button_rect, i))
+        # A frase cresce a partir da esquerda, na posição que ocuparia completa e centralizada.
+        self.phrase_pos = text_cache.render(phrase, 30, TEXT_COLOR).get_rect(center=(width // 2, height // 2 + 80)).topleft
+
+    def is_typing(self):
+        return self.typed_length != len(self.phrase)
+
+    def handle_event(self, event):
+        # Devolve o nível escolhido, ou None se o evento não fecha o menu.
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            for button_rect, level in self.level_buttons:
+                if button_rect.collidepoint(event.pos):
+                    return level
+        elif event.type == pygame.KEYDOWN:
+            return 1
+        return None
+
+    def draw(self):
+        # Só redesenha quando uma nova letra aparece; devolve se a tela mudou.
+        elapsed = pygame.time.get_ticks() - self.start_time
+        typed_length = min(len(self.phrase), elapsed // TYPING_DELAY_MS + 1)
+        if typed_length == self.typed_length:
+            return False
+        self.typed_length = typed_length
+        self.surface.blit(self.frame, (0, 0))
+        self.surface.blit(text_cache.render(self.phrase[:typed_length], 30, TEXT_COLOR), self.phrase_pos)
+        return True
+
+
+# Display, relógio e recursos compartilhados; criados por init_display(), não na importação.
+screen = None
+clock = None
+camera = None
+# Opções da linha de comando, lidas por main(); quem só importa o módulo (testes, benchmarks) recebe as
+# padrão em init_display().
+args = None
+profiler = PROFILER()
+# Banco de estatísticas (snake_stats.STATS), ou None quando as partidas não entram no placar.
+stats = None
+# Thread que carrega sprites e sons enquanto a primeira tela aparece (veja start_loading()).
+loader = None
+# Momento em que o primeiro quadro foi para a tela (veja report_first_frame()).
+first_frame = None
+
+# Estados do loop principal.
+MENU_SCREEN = 'menu'
+PLAYING = 'playing'
+GAME_OVER_SCREEN = 'game_over'
+
+
+class BOARD_VIEW:
+    """Desenho do tabuleiro (grama, borda e obstáculos) na área da câmera.
+
+    Usado por MAIN e pela ARENA: a classe que herda dele tem `grid`,
+    `obstacles` (snake_core.OBSTACLES), `level` e `current_background_color`,
+    e chama init_board_view() no __init__.
+    """
+    # Pedaços do fundo pré-renderizados, indexados por (tamanho do tabuleiro, layout dos obstáculos, nível,
+    # cor de fundo, coluna, linha do pedaço); partidas com o mesmo layout (mesma semente, replays) e a
+    # volta a um nível já visto não redesenham o fundo.
+    chunk_cache = OrderedDict()
+
+    def init_board_view(self):
+        self.board_pixels = self.grid.size * cell_size
+        # Obstáculos agrupados pelo pedaço do fundo em que estão (veja obstacle_chunks()).
+        self.chunk_obstacles = {}
+        self.chunk_obstacles_key = None
+        self.background_key = None
+        self.background = None
+        # Retângulos desenhados no quadro anterior, que precisam ser restaurados.
+        self.dirty_rects = []
+        self.full_redraw = True
+
+    def visible_chunks(self):
+        chunk_pixels = CHUNK_CELLS * cell_size
+        view = camera.rect
+        for row in range(view.top // chunk_pixels, (view.bottom - 1) // chunk_pixels + 1):
+            for col in range(view.left // chunk_pixels, (view.right - 1) // chunk_pixels + 1):
+                yield col, row
+
+    def obstacle_chunks(self):
+        # {pedaço: posições em pixels dos obstáculos}, refeito só quando o layout troca (a cada nível).
+        if self.chunk_obstacles_key != self.obstacles.key:
+            self.chunk_obstacles = {}
+            chunk_pixels = CHUNK_CELLS * cell_size
+            for index in self.obstacles:
+                pos = (self.grid.cell_x(index) * cell_size, self.grid.cell_y(index) * cell_size)
+                self.chunk_obstacles.setdefault((pos[0] // chunk_pixels, pos[1] // chunk_pixels), []).append(pos)
+            self.chunk_obstacles_key = self.obstacles.key
+        return self.chunk_obstacles
+
+    def visible_obstacles(self):
+        chunk_obstacles = self.obstacle_chunks()
+        for chunk in self.visible_chunks():
+            yield from chunk_obstacles.get(chunk, ())
+
+    def get_background(self):
+        # Fundo da área da câmera, montado com os pedaços pré-renderizados; só muda com o layout,
+        # o nível, a cor de fundo ou quando a câmera anda.
+        key = (self.obstacles.key, self.level, self.current_background_color, camera.rect.topleft)
+        if key != self.background_key or self.background is None:
+            if self.background is None or self.background.get_size() != camera.rect.size:
+                self.background = pygame.Surface(camera.rect.size).convert()
+            self.background.fill(self.current_background_color)
+            chunk_pixels = CHUNK_CELLS * cell_size
+            for col, row in self.visible_chunks():
+                chunk = self.get_chunk(col, row)
+                self.background.blit(chunk, (col * chunk_pixels - camera.rect.x, row * chunk_pixels - camera.rect.y))
+            self.background_key = key
+            self.full_redraw = True
+        return self.background
+
+    def get_chunk(self, col, row):
+        # Pré-renderiza um pedaço do tabuleiro (grama, borda e obstáculos) uma vez por layout, nível e cor de fundo.
+        key = (self.grid.size, self.obstacles.key, self.level, self.current_background_color, col, row)
+        chunk = self.chunk_cache.get(key)
+        if chunk is not None:
+            self.chunk_cache.move_to_end(key)
+            return chunk
+        chunk_pixels = CHUNK_CELLS * cell_size
+        area = pygame.Rect(col * chunk_pixels, row * chunk_pixels, chunk_pixels, chunk_pixels)
+        chunk = pygame.Surface(area.size).convert()
+        chunk.fill(self.current_background_color)
+        self.draw_grass(chunk, area)
+        started = time.perf_counter()
+        for pos in self.obstacle_chunks().get((col, row), ()):
+            chunk.blit(assets.sprite('obstaculo'), (pos[0] - area.x, pos[1] - area.y))
+        profiler.add('obstacles', time.perf_counter() - started)
+        self.chunk_cache[key] = chunk
+        if len(self.chunk_cache) > CHUNK_CACHE_SIZE:
+            self.chunk_cache.popitem(last=False)
+        return chunk
+
+    def present(self, rects):
+        # Envia para o display só os retângulos sujos (os do quadro anterior e os do atual).
+        if rects is None or self.full_redraw:
+            pygame.display.update()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.dirty_rects + rects)
+        self.dirty_rects = rects or []
+
+    def draw_grass(self, surface=None, area=None):
+        # Desenha as células do tabuleiro que caem em `area` (em pixels do tabuleiro; por padrão a
+        # câmera), com `area.topleft` no canto da superfície.
+        if surface is None:
+            surface = screen
+        if area is None:
+            area = camera.rect
+        first_col = max(0, area.left // cell_size)
+        last_col = min(self.grid.size, (area.right - 1) // cell_size + 1)
+        first_row = max(0, area.top // cell_size)
+        last_row = min(self.grid.size, (area.bottom - 1) // cell_size + 1)
+        for row in range(first_row, last_row):
+            for col in range(first_col, last_col):
+                grass_rect = pygame.Rect(col * cell_size - area.x, row * cell_size - area.y, cell_size, cell_size)
                 if (row + col) % 2 == 0:
-                    pygame.draw.rect(screen, (30, 30, 30), grass_rect) # Desenha um retângulo cinza escuro.
+                    pygame.draw.rect(surface, (30, 30, 30), grass_rect)
                 else:
-                    pygame.draw.rect(screen, (10, 10, 10), grass_rect) # Desenha um retângulo cinza muito escuro.
-        border_rect = pygame.Rect(0, 0, cell_number * cell_size, cell_number * cell_size)
-        pygame.draw.rect(screen, BLOOD_RED, border_rect, 3)
-
-    def draw_score(self):
-        score_text = str(self.score)
-        score_surface = game_font.render(score_text, True, TEXT_COLOR)
-        score_x = int(cell_size * cell_number - 60)
-        score_y = int(cell_size * cell_number - 40)
-        score_rect = score_surface.get_rect(center=(score_x, score_y))
-        apple_rect = apple.get_rect(midright=(score_rect.left, score_rect.centery))
-        bg_rect = pygame.Rect(apple_rect.left, apple_rect.top, apple_rect.width + score_rect.width + 6, apple_rect.height)
-        pygame.draw.rect(screen, NIGHT_GREEN, bg_rect)
-        screen.blit(score_surface, score_rect)
-        screen.blit(apple, apple_rect)
-        pygame.draw.rect(screen, NIGHT_GREEN, bg_rect, 2)
-
-    def draw_lives(self):
-        lives_text = str(self.lives)
-        lives_surface = game_font.render(f"Lives: {lives_text} XP: {self.xp}", True, TEXT_COLOR)
-        lives_rect = lives_surface.get_rect(topleft=(10, 10))
-        screen.blit(lives_surface, lives_rect)
-
-    def draw_objective(self):
-        font = pygame.font.Font('Font/PoetsenOne-Regular.ttf', 40)
-        objective_text = f"Level {self.level}: Eat {self.apples_collected}/{self.apples_to_win} apples!"
-        objective_surface = font.render(objective_text, True, TEXT_COLOR)
-        objective_rect = objective_surface.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-        screen.blit(objective_surface, objective_rect)
-    
-    def draw_level_complete(self):
-        font = pygame.font.Font('Font/PoetsenOne-Regular.ttf', 60)
-        level_complete_text = f"Level {self.level} Complete!"
-        level_complete_surface = font.render(level_complete_text, True, WHITE)
-        level_complete_rect = level_complete_surface.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-        screen.blit(level_complete_surface, level_complete_rect)
-
-
-    def reset_game(self):
-        self.reset_snake()
-        self.fruit = FRUIT(self.snake.body)
-        self.lives = 3
-        self.score = 0
-        self.has_moved = False
-        self.apples_collected = 0
-        self.xp = 0
-        self.level = 1
-        self.level_up = False
-        self.obstacle = None
-        self.obstacle_chance = 0.2
-        self.speed = 150
-        self.define_level_goals()
-        pygame.time.set_timer(SCREEN_UPDATE, self.speed)
-        self.show_objective = True
-        self.objective_start_time = pygame.time.get_ticks()
-        self.current_background_color = self.background_colors[0]  # Reset background color
-        self.level_complete = False
-        self.level_complete_timer = None
-
-
-    def reset_snake(self):
-        self.snake.reset()
-        self.has_moved = False
-        self.snake.direction = Vector2(0, 0)
-def next_level(self):
-    self.level += 1
-    if self.level > 4:
-        self.level = 1  # Wrap around to level 1 if we exceed the number of levels
-
-    self.current_background_color = self.background_colors[self.level - 1]
-    self.apples_collected = 0
-    self.fruit = FRUIT(self.snake.body)  # Passa o corpo da cobra atualizado
-    self.define_level_goals()
-    self.show_objective = True
-    self.objective_start_time = pygame.time.get_ticks()
-    self.increase_speed()  # Aumenta a velocidade da cobra
-    self.level_complete = False
-    self.level_complete_timer = None
-    pygame.time.set_timer(SCREEN_UPDATE, self.speed)
-
-    # Redirecionar para a tela inicial
-    selected_level = main_menu(screen)
-    self.level = selected_level
-    self.define_level_goals()
-    self.increase_speed()
-
-    def define_level_goals(self):
-        if self.level == 1:
-            self.apples_to_win = 10
-        elif self.level == 2:
-            self.apples_to_win = 15
-        elif self.level == 3:
-            self.apples_to_win = 20
-        elif self.level == 4:
-            self.apples_to_win = 25
-
-    def increase_speed(self):
-        # Aumenta a velocidade da cobra a cada nível
-        self.speed = max(50, self.speed - 15)  # Diminui o intervalo, aumentando a velocidade
-        print(f"Snake speed increased to: {self.speed}")
-def main_menu(screen):
-    pygame.init()
-    background_image = pygame.image.load('img/Capa_Prancheta 1.png').convert()
-    background_image = pygame.transform.scale(background_image, screen.get_size())
-    start_font = pygame.font.Font('Font/PoetsenOne-Regular.ttf', 30)
-    phrase = "Bem-vindo ao Jogo da Cobra!"
-    typed_text = ""
-
-    def draw_screen():
-        screen.blit(background_image, (0, 0))
-        level_buttons = []
-        for i in range(1, 5):
-            button_surface = start_font.render(f"Nível {i}", True, TEXT_COLOR)
-            button_rect = button_surface.get_rect(
-                center=(screen.get_width() // 2 + (i - 2.5) * 150, screen.get_height() // 2 + 150))  # Mais para baixo
-            pygame.draw.rect(screen, BLOOD_RED, button_rect.inflate(30, 10), border_radius=15)
-            pygame.draw.rect(screen, WHITE, button_rect.inflate(30, 10), 4, border_radius=15)
-            screen.blit(button_surface, button_rect)
-            level_buttons.append((button_rect, i))
-        pygame.display.update()
-        return level_buttons
-
-    # Animação de digitação inicial
-    for i in range(len(phrase)):
-        typed_text += phrase[i]
-        draw_screen()
-        time.sleep(0.05)
-
-    # Loop do menu principal
-    running = True
-    while running:
-        level_buttons = draw_screen()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                for button_rect, level in level_buttons:
-                    if button_rect.collidepoint(mouse_pos):
-                        return level
-            elif event.type == pygame.KEYDOWN:
-                return 1
-        clock.tick(60)
-    return 1
-    pygame.mixer.pre_init(44100, -16, 2, 512)
-pygame.init()
-screen = pygame.display.set_mode((600, 600))
-clock = pygame.time.Clock()
-apple = pygame.image.load('img/apple.png').convert_alpha()
-game_font = pygame.font.Font('Font/PoetsenOne-Regular.ttf', 25)
-
-SCREEN_UPDATE = pygame.USEREVENT
-
-selected_level = main_menu(screen)
-class MAIN:
-    def __init__(self):
-        self.snake = SNAKE()
-        self.fruit = FRUIT(self.snake.body)
-        self.lives = 3
-        self.score = 0
-        self.has_moved = False
-        self.apples_collected = 0
-        self.apples_to_win = 5
-        self.xp = 0
-        self.level = 1
-        self.level_up = False
-        self.obstacle = None
-        self.obstacle_chance = 0.2
-        self.level_complete = False
-        self.speed = 150
+                    pygame.draw.rect(surface, (10, 10, 10), grass_rect)
+        border_rect = pygame.Rect(-area.x, -area.y, self.board_pixels, self.board_pixels)
+        pygame.draw.rect(surface, BLOOD_RED, border_rect, 3)
+
+
+class MAIN(BOARD_VIEW, snake_core.GAME):
+    """Cliente pygame do núcleo: desenha o estado da partida, toca os sons e
+    controla os textos e temporizadores que só existem na tela."""
+    snake_class = SNAKE
+    fruit_class = FRUIT
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        # Gravação da partida em andamento (snake_replay.REPLAY), ou None.
+        self.replay = None
+        # Maçãs comidas em cada nível nesta partida, para as estatísticas.
+        self.level_apples = {}
         self.background_colors = [BACKGROUND_COLOR, NIGHT_GREEN, BLOOD_RED, DARK_GRAY]
         self.current_background_color = self.background_colors[0]
         self.show_objective = True
         self.objective_timer = 2000
         self.objective_start_time = 0
-        self.define_level_goals()
-        self.increase_speed()
-        self.obstaculo_pos = [gera_pos_aleatoria([]) for _ in range(5)]  # Gera 5 obstáculos aleatórios
-
-    # Outras funções da classe MAIN...
-
-    def define_level_goals(self):
-        if self.level == 1:
-            self.apples_to_win = 10
-        elif self.level == 2:
-            self.apples_to_win = 15
-        elif self.level == 3:
-            self.apples_to_win = 20
-        elif self.level == 4:
-            self.apples_to_win = 25
-        if self.level == 1:
-            self.apples_to_win = 10
-        elif self.level == 2:
-            self.apples_to_win = 15
-        elif self.level == 3:
-            self.apples_to_win = 20
-        elif self.level == 4:
-            self.apples_to_win = 25
-    
-    def increase_speed(self):
-        self.speed = max(50, self.speed - 15)
-        print(f"Snake speed increased to: {self.speed}")
-    
+        self.level_complete_timer = None
+        self.init_board_view()
+        self.set_skin(args.skin)
+
+    def set_skin(self, skin):
+        # Troca só os sprites da cobra, no meio da partida se for preciso; o pacote é carregado na primeira vez.
+        self.skin = skin
+        self.snake.set_sprites(assets.skin_sprites(skin))
+        self.full_redraw = True
+
     def next_level(self):
-        self.level += 1
-        if self.level > 4:
-            self.level = 1  # Wrap around to level 1 if we exceed the number of levels
-    
+        # Depois disso o loop principal abre o menu, que chama select_level() com o nível escolhido.
+        super().next_level()
         self.current_background_color = self.background_colors[self.level - 1]
-        self.apples_collected = 0
-        self.fruit = FRUIT(self.snake.body)  # Passa o corpo da cobra atualizado
-        self.define_level_goals()
         self.show_objective = True
         self.objective_start_time = pygame.time.get_ticks()
-        self.increase_speed()  # Aumenta a velocidade da cobra
-        self.level_complete = False
         self.level_complete_timer = None
-        pygame.time.set_timer(SCREEN_UPDATE, self.speed)
-    
-        # Redirecionar para a tela inicial
-        selected_level = main_menu(screen)
-        self.level = selected_level
-        self.define_level_goals()
-        self.increase_speed()
-    def update(self):
-        if not self.game_over() and self.has_moved and not self.show_objective and not self.level_complete:
-            self.snake.move_snake()
-            self.check_collision()
-            self.check_fail()
-
-    def draw_elements(self):
-        self.draw_grass()
-        self.fruit.draw_fruit()
-        self.snake.draw_snake()
-        self.draw_score()
-        self.draw_lives()
-        if self.obstacle:
-            self.obstacle.draw_obstacle()
-        if self.show_objective:
-            self.draw_objective()
-
-    # Outras funções da classe MAIN...
 
-    def check_collision(self):
-        if self.fruit.pos == self.snake.body[0]:
-            self.snake.add_block()
-            self.snake.play_crunch_sound()
-            self.score += 1  # Aumenta a pontuação em 1 por maçã
-            self.apples_collected += 1
+    def select_level(self, level):
+        if self.replay is not None:
+            self.replay.select_level(self.ticks, level)
+        self.start_level(level)
+        self.current_background_color = self.background_colors[self.level - 1]
+        self.objective_start_time = pygame.time.get_ticks()
+        self.full_redraw = True  # O menu sobrescreveu a tela inteira
+
+    def change_direction(self, direction):
+        super().change_direction(direction)
+        if self.replay is not None:
+            self.replay.direction(self.ticks, direction)
+
+    def is_advancing(self):
+        return super().is_advancing() and not self.show_objective
+
+    def step(self, action=None):
+        events = super().step(action)
+        if snake_core.ATE_FRUIT in events:
+            audio.play('crunch')
+            self.level_apples[self.level] = self.level_apples.get(self.level, 0) + 1
+        if snake_core.LEVEL_COMPLETE in events:
+            self.level_complete_timer = pygame.time.get_ticks()
+        return events
+
+    def draw_elements(self, alpha=1.0):
+        self.follow_head(alpha)
+        if not DIRTY_RECT_RENDERING:
+            screen.fill(self.current_background_color)
+            self.draw_grass()
+            started = time.perf_counter()
+            left, top = camera.rect.topleft
+            for pos in self.visible_obstacles():
+                screen.blit(assets.sprite('obstaculo'), (pos[0] - left, pos[1] - top))
+            profiler.add('obstacles', time.perf_counter() - started)
+            self.fruit.draw_fruit()
+            self.snake.draw_snake(alpha)
+            self.draw_score()
+            self.draw_lives()
+            if self.show_objective:
+                self.draw_objective()
+            return None
+
+        # Apaga o quadro anterior copiando do fundo em cache apenas as áreas que foram desenhadas.
+        background = self.get_background()
+        if self.full_redraw:
+            screen.blit(background, (0, 0))
+        else:
+            screen.blits([(background, rect, rect) for rect in self.dirty_rects], doreturn=False)
 
-            if self.apples_collected >= self.apples_to_win:
-                self.level_complete = True
-                self.level_complete_timer = pygame.time.get_ticks()
-            else:
-                self.fruit.randomize()
-
-
-        for block in self.snake.body[1:]:
-            if block == self.fruit.pos:
-                self.fruit.randomize()
-
-    def check_fail(self):
-        if not 0 <= self.snake.body[0].x < cell_number or not 0 <= self.snake.body[0].y < cell_number:
-            self.lose_life()
-        for block in self.snake.body[1:]:
-            if block == self.snake.body[0]:
-                self.lose_life()
-        if self.obstacle and self.snake.body[0] == self.obstacle.pos:
-            self.lose_life()
-
-    def lose_life(self):
-        self.lives -= 1
-        if not self.game_over():
-            self.reset_snake()
-
-    def game_over(self):
-        return self.lives <= 0
-
-    def draw_grass(self):
-        for row in range(cell_number):
-            for col in range(cell_number):
-                grass_rect = pygame.Rect(col * cell_size, row * cell_size, cell_size, cell_size)
-                if (row + col) % 2 == 0:
-                    pygame.draw.rect(screen, (30, 30, 30), grass_rect)
-                else:
-                    pygame.draw.rect(screen, (10, 10, 10), grass_rect)
-        border_rect = pygame.Rect(0, 0, cell_number * cell_size, cell_number * cell_size)
-        pygame.draw.rect(screen, BLOOD_RED, border_rect, 3)
+        rects = [self.fruit.draw_fruit()]
+        rects.extend(self.snake.draw_snake(alpha))
+        rects.append(self.draw_score())
+        rects.append(self.draw_lives())
+        if self.show_objective:
+            rects.append(self.draw_objective())
+        return [rect for rect in rects if rect is not None]
+
+    def follow_head(self, alpha):
+        # Centra a câmera na cabeça, na mesma posição interpolada em que ela é desenhada.
+        body = self.snake.body
+        if alpha < 1:
+            head = self.snake.interpolated_rect(body[1], body[0], alpha)
+        else:
+            head = pygame.Rect(self.grid.cell_x(body[0]) * cell_size, self.grid.cell_y(body[0]) * cell_size, cell_size, cell_size)
+        camera.follow(head.centerx, head.centery, self.board_pixels)
 
     def draw_score(self):
         score_text = str(self.score)
-        score_surface = game_font.render(score_text, True, TEXT_COLOR)
-        score_x = int(cell_size * cell_number - 60)
-        score_y = int(cell_size * cell_number - 40)
+        score_surface = text_cache.render(score_text, 25, TEXT_COLOR)
+        score_x = int(screen.get_width() - 60)
+        score_y = int(screen.get_height() - 40)
         score_rect = score_surface.get_rect(center=(score_x, score_y))
+        apple = assets.sprite('apple')
         apple_rect = apple.get_rect(midright=(score_rect.left, score_rect.centery))
         bg_rect = pygame.Rect(apple_rect.left, apple_rect.top, apple_rect.width + score_rect.width + 6, apple_rect.height)
         pygame.draw.rect(screen, NIGHT_GREEN, bg_rect)
         screen.blit(score_surface, score_rect)
         screen.blit(apple, apple_rect)
         pygame.draw.rect(screen, NIGHT_GREEN, bg_rect, 2)
+        return bg_rect.union(score_rect)
 
     def draw_lives(self):
         lives_text = str(self.lives)
-        lives_surface = game_font.render(f"Lives: {lives_text} XP: {self.xp}", True, TEXT_COLOR)
+        lives_surface = text_cache.render(f"Lives: {lives_text} XP: {self.xp}", 25, TEXT_COLOR)
         lives_rect = lives_surface.get_rect(topleft=(10, 10))
-        screen.blit(lives_surface, lives_rect)
+        return screen.blit(lives_surface, lives_rect)
 
     def draw_objective(self):
-        font = pygame.font.Font('Font/PoetsenOne-Regular.ttf', 40)
         objective_text = f"Level {self.level}: Eat {self.apples_collected}/{self.apples_to_win} apples!"
-        objective_surface = font.render(objective_text, True, TEXT_COLOR)
+        objective_surface = text_cache.render(objective_text, 40, TEXT_COLOR)
         objective_rect = objective_surface.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-        screen.blit(objective_surface, objective_rect)
+        return screen.blit(objective_surface, objective_rect)
     
     def draw_level_complete(self):
-        font = pygame.font.Font('Font/PoetsenOne-Regular.ttf', 60)
         level_complete_text = f"Level {self.level} Complete!"
-        level_complete_surface = font.render(level_complete_text, True, WHITE)
+        level_complete_surface = text_cache.render(level_complete_text, 60, WHITE)
         level_complete_rect = level_complete_surface.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-        screen.blit(level_complete_surface, level_complete_rect)
-
+        return screen.blit(level_complete_surface, level_complete_rect)
 
     def reset_game(self):
-        self.reset_snake()
-        self.fruit = FRUIT(self.snake.body)
-        self.lives = 3
-        self.score = 0
-        self.has_moved = False
-        self.apples_collected = 0
-        self.xp = 0
-        self.level = 1
-        self.level_up = False
-        self.obstacle = None
-        self.obstacle_chance = 0.2
-        self.speed = 150
-        self.define_level_goals()
-        pygame.time.set_timer(SCREEN_UPDATE, self.speed)
+        super().reset_game()
+        self.level_apples = {}
         self.show_objective = True
         self.objective_start_time = pygame.time.get_ticks()
         self.current_background_color = self.background_colors[0]  # Reset background color
-        self.level_complete = False
         self.level_complete_timer = None
-
-
-    def reset_snake(self):
-        self.snake.reset()
-        self.has_moved = False
-        self.snake.direction = Vector2(0, 0)
-
-main_game = MAIN()
-main_game.level = selected_level
-main_game.define_level_goals()
-main_game.increase_speed()
-
-game_running = True
-pygame.time.set_timer(SCREEN_UPDATE, main_game.speed)
-
-while True:
-    if game_running:
-        current_time = pygame.time.get_ticks()
-        if main_game.show_objective:
-            if current_time - main_game.objective_start_time >= main_game.objective_timer:
-                main_game.show_objective = False
-
-        screen.fill(main_game.current_background_color)  # Setting the background color
-        main_game.draw_elements()
-
-        # Desenha os obstáculos e verifica colisão
-        for pos in obstaculo_pos:
-            if colisao((main_game.snake.body[0].x * cell_size, main_game.snake.body[0].y * cell_size), pos):
-                main_game.lose_life()
-            screen.blit(obstaculo_image, pos)
-
-        if main_game.level_complete:
-            main_game.draw_level_complete()
-            if current_time - main_game.level_complete_timer > 2000:
-                main_game.next_level()
-        
-    else:
-        screen.fill(BACKGROUND_COLOR)  # Fill with default background color when game is over
-
-    if not game_running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        self.full_redraw = True
+
+
+# Cliente pygame da arena (veja arena_class()); criado no primeiro modo de arena.
+ARENA = None
+
+
+def arena_class():
+    # A classe herda de snake_arena.ARENA, então só é montada (e o snake_arena importado) quando uma arena começa.
+    global ARENA
+    if ARENA is not None:
+        return ARENA
+    import snake_arena
+
+    class ARENA(BOARD_VIEW, snake_arena.ARENA):
+        """Cliente pygame da arena: a câmera segue os jogadores locais e só as cobras
+        e frutas que aparecem nela são desenhadas."""
+        snake_class = SNAKE
+        level = 1
+        current_background_color = BACKGROUND_COLOR
+
+        def __init__(self, **options):
+            # As cobras são criadas já no construtor da arena, com os sprites dessa skin.
+            self.skin = args.skin
+            super().__init__(**options)
+            # Números das cobras controladas nesta máquina (a câmera segue essas).
+            self.local = list(range(options.get('players', 1)))
+            self.init_board_view()
+
+        def new_competitor(self, number, snake, bot):
+            snake.set_sprites(self.competitor_sprites(number, bot))
+            return super().new_competitor(number, snake, bot)
+
+        def competitor_sprites(self, number, bot):
+            # Cobras de jogadores ganham sprites coloridos; as dos bots usam os sprites da skin.
+            if bot:
+                return assets.skin_sprites(self.skin)
+            return assets.tinted_sprites(PLAYER_COLORS[number % len(PLAYER_COLORS)], cell_size, self.skin)
+
+        def set_skin(self, skin):
+            self.skin = skin
+            for competitor in self.competitors:
+                competitor.snake.set_sprites(self.competitor_sprites(competitor.number, competitor.bot))
+
+        def step(self, actions=None):
+            events = super().step(actions)
+            for event, number in events:
+                if event == snake_core.ATE_FRUIT and number in self.local:
+                    audio.play('crunch')
+            return events
+
+        def follow_players(self, alpha):
+            # Centra a câmera entre as cabeças dos jogadores vivos; sem nenhum, segue o líder.
+            followed = [self.competitors[number] for number in self.local if self.competitors[number].alive]
+            if not followed:
+                followed = [competitor for competitor in self.leaders(len(self.competitors)) if competitor.alive][:1]
+            if not followed:
+                return
+            heads = []
+            for competitor in followed:
+                body = competitor.snake.body
+                if alpha < 1:
+                    heads.append(competitor.snake.interpolated_rect(body[1], body[0], alpha).center)
+                else:
+                    heads.append(((self.grid.cell_x(body[0]) + 0.5) * cell_size, (self.grid.cell_y(body[0]) + 0.5) * cell_size))
+            camera.follow(sum(x for x, y in heads) / len(heads), sum(y for x, y in heads) / len(heads), self.board_pixels)
+
+        def draw_elements(self, alpha=1.0):
+            # A arena sempre redesenha a tela inteira: com muitas cobras quase tudo muda a cada tick.
+            self.follow_players(alpha)
+            screen.blit(self.get_background(), (0, 0))
+            view = camera.rect
+            apple = assets.sprite('apple')
+            left = view.left // cell_size - 1
+            top = view.top // cell_size - 1
+            right = (view.right - 1) // cell_size + 2
+            bottom = (view.bottom - 1) // cell_size + 2
+            for bucket_x in range(left // snake_arena.FRUIT_BUCKET, (right - 1) // snake_arena.FRUIT_BUCKET + 1):
+                for bucket_y in range(top // snake_arena.FRUIT_BUCKET, (bottom - 1) // snake_arena.FRUIT_BUCKET + 1):
+                    for fruit in self.fruit_buckets.get((bucket_x, bucket_y), ()):
+                        screen.blit(apple, (self.grid.cell_x(fruit) * cell_size - view.x, self.grid.cell_y(fruit) * cell_size - view.y))
+            for competitor in self.competitors_in(left, top, right, bottom):
+                competitor.snake.draw_snake(alpha)
+            self.draw_players()
+            self.draw_leaders()
+            return None
+
+        def draw_players(self):
+            y = 10
+            for number in self.local:
+                competitor = self.competitors[number]
+                color = PLAYER_COLORS[competitor.number % len(PLAYER_COLORS)]
+                text = f"P{competitor.number + 1}: {competitor.score}  kills {competitor.kills}"
+                if not competitor.alive:
+                    text += "  (respawn)"
+                rect = screen.blit(text_cache.render(text, 20, color), (10, y))
+                y = rect.bottom + 2
+
+        def draw_leaders(self):
+            y = 10
+            for competitor in self.leaders(ARENA_LEADERS):
+                name = f"BOT {competitor.number + 1}" if competitor.bot else f"P{competitor.number + 1}"
+                surface = text_cache.render(f"{name}  {competitor.score}", 20, TEXT_COLOR)
+                rect = screen.blit(surface, surface.get_rect(topright=(screen.get_width() - 10, y)))
+                y = rect.bottom + 2
+
+    return ARENA
+
+
+# Teclas de direção e a direção correspondente no núcleo.
+KEY_DIRECTIONS = {
+    pygame.K_UP: snake_core.UP,
+    pygame.K_RIGHT: snake_core.RIGHT,
+    pygame.K_DOWN: snake_core.DOWN,
+    pygame.K_LEFT: snake_core.LEFT,
+}
+
+# Teclas de cada jogador local da arena; os jogadores seguintes usam controles (joysticks).
+PLAYER_KEYS = (
+    KEY_DIRECTIONS,
+    {pygame.K_w: snake_core.UP, pygame.K_d: snake_core.RIGHT, pygame.K_s: snake_core.DOWN, pygame.K_a: snake_core.LEFT},
+    {pygame.K_i: snake_core.UP, pygame.K_l: snake_core.RIGHT, pygame.K_k: snake_core.DOWN, pygame.K_j: snake_core.LEFT},
+    {pygame.K_KP8: snake_core.UP, pygame.K_KP6: snake_core.RIGHT, pygame.K_KP5: snake_core.DOWN, pygame.K_KP4: snake_core.LEFT},
+)
+
+
+def init_display():
+    # Abre só o vídeo e as fontes, o que a primeira tela precisa; o mixer, os sons e os sprites
+    # ficam para a thread de start_loading(). Os controles só são abertos na arena.
+    global screen, clock, camera, args
+    if args is None:
+        args = parse_args([])
+    pygame.display.init()
+    pygame.font.init()
+    # A janela mostra o tabuleiro inteiro até VIEW_CELLS células por lado; maiores rolam com a câmera.
+    view_size = min(args.board, VIEW_CELLS) * cell_size
+    screen = pygame.display.set_mode((view_size, view_size))
+    camera = CAMERA(view_size, view_size)
+    clock = pygame.time.Clock()
+    start_loading()
+
+
+def start_loading():
+    global loader
+    assets.loading = threading.Event()
+    loader = threading.Thread(target=load_in_background, name='loader', daemon=True)
+    loader.start()
+
+
+def load_in_background():
+    # Só leitura de arquivos e abertura do áudio: converter e desenhar continua na thread principal.
+    assets.preload()
+    audio.pre_init()
+    audio.init(not args.headless)
+
+
+def finish_loading():
+    # Antes de pygame.quit(), para não fechar o SDL com a thread ainda lendo arquivos.
+    if loader is not None:
+        loader.join()
+
+
+def report_first_frame():
+    global first_frame
+    if first_frame is not None or args.headless:
+        return
+    first_frame = time.perf_counter()
+    print(f"Primeiro quadro em {(first_frame - STARTED) * 1000:.0f} ms "
+          f"(importação {(IMPORTED - STARTED) * 1000:.0f} ms)")
+
+
+def new_game(level, seed=None):
+    # Cria a partida no nível escolhido; a gravação começa junto, a menos que --no-record.
+    game = MAIN.seeded(seed, size=args.board)
+    game.start_level(level)
+    if not args.no_record:
+        import snake_replay
+        game.replay = snake_replay.REPLAY(game.seed, level, args.board)
+    return game
+
+
+def save_replay(game):
+    if game is None or game.replay is None:
+        return
+    game.replay.finish(game.ticks, game.score)
+    os.makedirs(args.replay_dir, exist_ok=True)
+    game.replay.save(os.path.join(args.replay_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{game.seed}.snkr"))
+    game.replay = None
+
+
+def save_stats(game):
+    # Só enfileira a linha: a escrita no banco acontece na thread do STATS, fora do loop de renderização.
+    if stats is None or game is None or game.ticks == 0:
+        return
+    import snake_stats
+    stats.record(snake_stats.session_row(game, game.level_apples))
+
+
+def run_arena():
+    # Loop do modo arena: sem menu nem níveis, até fechar a janela (ou Esc).
+    pygame.joystick.init()
+    joysticks = [pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
+    if args.players > len(PLAYER_KEYS) + len(joysticks):
+        sys.exit(f"--players {args.players}: só há teclas para {len(PLAYER_KEYS)} jogadores e {len(joysticks)} controle(s) conectado(s)")
+    # Tecla -> (jogador, direção) e controle -> jogador.
+    key_players = {}
+    for number, keys in enumerate(PLAYER_KEYS[:args.players]):
+        for key, direction in keys.items():
+            key_players[key] = (number, direction)
+    joystick_players = {
+        joystick.get_instance_id(): number
+        for number, joystick in enumerate(joysticks[:max(0, args.players - len(PLAYER_KEYS))], start=len(PLAYER_KEYS))
+    }
+
+    arena = arena_class().seeded(args.seed, players=args.players, bots=args.arena, size=args.board)
+    scheduler = SCHEDULER(clock, args.fps)
+    while True:
+        profiler.begin_frame()
+        scheduler.tick()
+        profiler.mark('wait')
+        for event in scheduler.events():
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                profiler.close()
+                finish_loading()
                 pygame.quit()
                 sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.KEYDOWN:
-                selected_level = main_menu(screen)
-                main_game = MAIN()
-                main_game.level = selected_level
-                main_game.define_level_goals()
-                main_game.increase_speed()
-                game_running = True
-                pygame.time.set_timer(SCREEN_UPDATE, main_game.speed)
-                break
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                args.skin = assets.next_skin(args.skin)
+                arena.set_skin(args.skin)
+            elif event.type == pygame.KEYDOWN and event.key in key_players:
+                arena.change_direction(*key_players[event.key])
+            elif event.type == pygame.JOYHATMOTION and event.instance_id in joystick_players:
+                x, y = event.value
+                if x or y:
+                    arena.change_direction(joystick_players[event.instance_id], (x, 0) if x else (0, -y))
+        profiler.mark('events')
+
+        for _ in range(scheduler.logic_steps(ARENA_SPEED)):
+            arena.step()
+        profiler.mark('logic')
+
+        if not args.headless:
+            arena.draw_elements(1.0 if args.no_interpolation else scheduler.alpha)
+            if profiler.visible:
+                profiler.draw(screen, 1000 / args.fps)
+            profiler.mark('draw')
+            arena.present(None)
+            report_first_frame()
+        profiler.mark('present')
+
+
+def run_client(client):
+    # Cliente da arena em rede: o servidor roda os ticks; aqui só mandamos as teclas e desenhamos.
+    arena = client.start(arena_class())
+    arena.local = [client.number]
+    scheduler = SCHEDULER(clock, args.fps)
+    last_tick = pygame.time.get_ticks()
+    while True:
+        profiler.begin_frame()
+        scheduler.tick()
+        profiler.mark('wait')
+        for event in scheduler.events():
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                client.close()
+                profiler.close()
+                finish_loading()
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                args.skin = assets.next_skin(args.skin)
+                arena.set_skin(args.skin)
+            elif event.type == pygame.KEYDOWN:
+                client.send_direction(KEY_DIRECTIONS.get(event.key))
+        profiler.mark('events')
+
+        if client.poll():
+            last_tick = pygame.time.get_ticks()
+            for event, number in client.events:
+                if event == snake_core.ATE_FRUIT and number in arena.local:
+                    audio.play('crunch')
+        if client.closed:
+            print("Conexão com o servidor encerrada")
+            profiler.close()
+            finish_loading()
+            pygame.quit()
+            sys.exit()
+        profiler.mark('logic')
+
+        if not args.headless:
+            # Interpola entre o último tick recebido e o próximo, que chega tick_ms depois.
+            alpha = 1.0 if args.no_interpolation else min(1.0, (pygame.time.get_ticks() - last_tick) / client.tick_ms)
+            arena.draw_elements(alpha)
+            if profiler.visible:
+                profiler.draw(screen, 1000 / args.fps)
+            profiler.mark('draw')
+            arena.present(None)
+            report_first_frame()
+        profiler.mark('present')
+
+
+def main(argv=None):
+    global args, profiler, stats
+    args = parse_args(argv)
+    profiler = PROFILER(args.profile, args.profile_out)
+    # Só partidas jogadas aqui entram no placar: reproduções, piloto automático e arena ficam de fora.
+    if not (args.no_stats or args.replay or args.autopilot or args.arena is not None or args.connect):
+        import snake_stats
+        stats = snake_stats.STATS(args.stats_db or snake_stats.STATS_DB)
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    if args.replay:
+        import snake_replay
+        replay = snake_replay.REPLAY.load(args.replay)
+        args.board = replay.size  # A janela segue o tabuleiro da partida gravada
+    if args.connect:
+        import snake_net  # Só o modo em rede precisa dele (e do asyncio, que pesa na abertura do jogo)
+        host, _, port = args.connect.partition(':')
+        client = snake_net.CLIENT(host or 'localhost', int(port) if port else snake_net.PORT)
+        args.board = client.size
+    init_display()
+    if args.connect:
+        run_client(client)
+    if args.arena is not None:
+        run_arena()
+
+    scheduler = SCHEDULER(clock, args.fps)
+    # A partida só é criada quando o nível é escolhido; o menu entre as fases reaproveita a atual.
+    main_game = None
+    menu = None
+    # Reprodução de uma partida gravada (--replay): os comandos vêm do arquivo, não do teclado.
+    player = None
+    speed = 1.0
+    # Piloto automático (--autopilot): comanda a partida atual pelo mesmo change_direction() das teclas.
+    autopilot = None
+    if args.replay:
+        player = snake_replay.PLAYER(replay)
+        speed = args.replay_speed
+        main_game = replay.new_game(MAIN)
+        state = PLAYING
+    elif args.level or args.headless or args.autopilot:
+        main_game = new_game(args.level or 1, args.seed)
+        state = PLAYING
     else:
-        for event in pygame.event.get():
+        menu = MENU(screen)
+        state = MENU_SCREEN
+
+    while True:
+        if state == GAME_OVER_SCREEN and args.headless and not args.autopilot:
+            # Reprodução sem janela (--headless --replay): termina junto com o replay.
+            profiler.close()
+            finish_loading()
+            pygame.quit()
+            return
+        if state == GAME_OVER_SCREEN and (args.headless or args.autopilot):
+            # Sem ninguém para apertar uma tecla, a próxima partida começa sozinha.
+            player = None
+            speed = 1.0
+            main_game = new_game(args.level or 1)
+            state = PLAYING
+        if state == MENU_SCREEN:
+            idle = not menu.is_typing()
+        elif state == PLAYING:
+            # Sem movimento nem contagem na tela, o loop pode dormir até o próximo evento.
+            idle = not main_game.is_advancing() and not main_game.show_objective and not main_game.level_complete
+            idle = idle and player is None
+        else:
+            idle = True
+        profiler.begin_frame()
+        scheduler.tick(idle)
+        profiler.mark('wait')
+
+        for event in scheduler.events(idle):
             if event.type == pygame.QUIT:
+                if state == PLAYING:
+                    save_replay(main_game)
+                save_stats(main_game)
+                if stats is not None:
+                    stats.close()
+                profiler.close()
+                finish_loading()
                 pygame.quit()
                 sys.exit()
-            if event.type == SCREEN_UPDATE:
-                main_game.update()
-            if event.type == pygame.KEYDOWN:
-                if not main_game.game_over() and not main_game.level_complete:
-                    if not main_game.has_moved:
-                        main_game.has_moved = True
-                    if event.key == pygame.K_UP:
-                        if main_game.snake.direction.y != 1:
-                            main_game.snake.direction = Vector2(0, -1)
-                    elif event.key == pygame.K_RIGHT:
-                        if main_game.snake.direction.x != -1:
-                            main_game.snake.direction = Vector2(1, 0)
-                    elif event.key == pygame.K_DOWN:
-                        if main_game.snake.direction.y != -1:
-                            main_game.snake.direction = Vector2(0, 1)
-                    elif event.key == pygame.K_LEFT:
-                        if main_game.snake.direction.x != 1:
-                            main_game.snake.direction = Vector2(-1, 0)
-
-        if main_game.game_over():
-            main_game.reset_game()
-            game_running = False
-
-    pygame.display.update()
-    clock.tick(60)
\ No newline at end of file
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+                if main_game is not None:
+                    main_game.full_redraw = True  # Apaga o overlay que estava na tela
+                continue
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                # A próxima skin vale para esta partida e para as seguintes.
+                args.skin = assets.next_skin(args.skin)
+                if main_game is not None:
+                    main_game.set_skin(args.skin)
+                continue
+            if state == MENU_SCREEN:
+                level = menu.handle_event(event)
+                if level is not None:
+                    if main_game is None:
+                        main_game = new_game(level, args.seed)
+                    else:
+                        main_game.select_level(level)
+                    menu = None
+                    state = PLAYING
+                    break
+            elif state == GAME_OVER_SCREEN:
+                if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.KEYDOWN:
+                    player = None
+                    speed = 1.0
+                    main_game = None
+                    menu = MENU(screen)
+                    state = MENU_SCREEN
+                    break
+            elif event.type == pygame.KEYDOWN and player is None and not args.autopilot:
+                main_game.change_direction(KEY_DIRECTIONS.get(event.key))
+        profiler.mark('events')
+
+        if state == PLAYING:
+            current_time = pygame.time.get_ticks()
+            if main_game.show_objective:
+                if current_time - main_game.objective_start_time >= main_game.objective_timer / speed:
+                    main_game.show_objective = False
+
+            if args.autopilot and player is None:
+                if autopilot is None or autopilot.game is not main_game:
+                    import snake_autopilot
+                    autopilot = snake_autopilot.AUTOPILOT(main_game)
+                if main_game.snake.direction == snake_core.STOPPED:
+                    autopilot.drive()  # Parada, a cobra só sai da espera com uma direção
+
+            # Avança a lógica em passos fixos, de acordo com o tempo acumulado.
+            if player is not None:
+                player.feed(main_game)
+            if main_game.is_advancing():
+                for _ in range(scheduler.logic_steps(main_game.speed / speed, max(MAX_CATCHUP_STEPS, int(MAX_CATCHUP_STEPS * speed)))):
+                    if player is not None:
+                        player.feed(main_game)
+                        if player.finished(main_game):
+                            break
+                    elif autopilot is not None:
+                        autopilot.drive()
+                    main_game.step()
+            else:
+                scheduler.reset()
+
+            if main_game.game_over():
+                save_replay(main_game)
+                save_stats(main_game)
+                main_game.reset_game()
+                state = GAME_OVER_SCREEN
+            elif player is not None and player.finished(main_game) and not main_game.level_complete:
+                print(f"Fim do replay: pontuação {main_game.score}, nível {main_game.level}, {main_game.ticks} ticks")
+                main_game.reset_game()
+                state = GAME_OVER_SCREEN
+        profiler.mark('logic')
+
+        if args.headless:
+            pass  # Nenhuma renderização no modo headless
+        elif state == MENU_SCREEN:
+            if menu.draw():
+                profiler.mark('draw')
+                pygame.display.update()
+        elif state == PLAYING:
+            alpha = 1.0 if args.no_interpolation or not main_game.is_advancing() else scheduler.alpha
+            dirty_rects = main_game.draw_elements(alpha)
+            if main_game.level_complete:
+                level_complete_rect = main_game.draw_level_complete()
+                if dirty_rects is not None:
+                    dirty_rects.append(level_complete_rect)
+            if profiler.visible:
+                profiler_rect = profiler.draw(screen, 1000 / args.fps)
+                if dirty_rects is not None:
+                    dirty_rects.append(profiler_rect)
+            profiler.mark('draw')
+            main_game.present(dirty_rects)
+        elif main_game.full_redraw or not DIRTY_RECT_RENDERING:
+            screen.fill(BACKGROUND_COLOR)  # Fill with default background color when game is over
+            profiler.mark('draw')
+            main_game.present(None)
+        report_first_frame()
+        profiler.mark('present')
+
+        if state == PLAYING and main_game.level_complete:
+            if pygame.time.get_ticks() - main_game.level_complete_timer > 2000 / speed:
+                level = player.take_level(main_game) if player is not None else None
+                main_game.next_level()
+                if level is not None:
+                    main_game.select_level(level)
+                elif player is not None:
+                    # A gravação terminou no menu entre as fases.
+                    print(f"Fim do replay: pontuação {main_game.score}, nível {main_game.level}, {main_game.ticks} ticks")
+                    main_game.reset_game()
+                    state = GAME_OVER_SCREEN
+                elif args.headless or args.autopilot:
+                    main_game.select_level(main_game.level)
+                else:
+                    menu = MENU(screen)
+                    state = MENU_SCREEN
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+"""Modo arena: muitas cobras, de jogadores ou bots, no mesmo tabuleiro.
+
+Todas as cobras dividem um único GRID de ocupação, que funciona como hash
+espacial: cada célula guarda quantos segmentos estão nela, e `owner` guarda de
+qual cobra é o segmento. Num tick todos os rabos saem, todas as cabeças entram
+e só as células das cabeças que andaram são consultadas, então as colisões
+custam O(cabeças que andaram) e não O(pares de corpos):
+
+- cabeça na borda ou num obstáculo: a cobra morre;
+- duas ou mais cabeças na mesma célula: todas morrem;
+- cabeça no corpo de outra cobra: morre a dona da cabeça e a kill vai para a
+  dona do corpo (no próprio corpo é HIT_SELF, sem kill).
+
+Não há níveis nem vidas: cobras mortas saem do tabuleiro e voltam depois de
+RESPAWN_TICKS ticks, com o tamanho inicial, num lugar livre. Sem janela:
+
+    python snake_arena.py --bots 200 --size 100 --ticks 2000
+"""
+import argparse
+import json
+import random
+import time
+from array import array
+
+import snake_core
+from snake_core import GRID
+
+# Direções em que uma cobra pode nascer ou andar.
+DIRECTIONS = (snake_core.UP, snake_core.RIGHT, snake_core.DOWN, snake_core.LEFT)
+
+# Causa de morte de quem bate em outra cobra (as outras vêm de snake_core).
+HIT_SNAKE = 'snake'
+
+# Eventos devolvidos por ARENA.step(), em pares (evento, número da cobra).
+DIED = 'died'
+KILL = 'kill'
+RESPAWNED = 'respawned'
+
+# Tamanho padrão da arena, ticks até uma cobra morta voltar e tamanho com que ela nasce.
+ARENA_SIZE = 60
+RESPAWN_TICKS = 10
+START_LENGTH = 3
+# Frutas no tabuleiro por cobra na arena (pelo menos uma).
+FRUITS_PER_SNAKE = 0.5
+# Quantas células livres são sorteadas ao procurar lugar para uma cobra ou fruta antes de desistir
+# neste tick (com o tabuleiro cheio a cobra espera o próximo).
+SPAWN_TRIES = 16
+# Lado (em células) dos baldes do hash de frutas, usado pelos bots para achar a fruta mais próxima.
+FRUIT_BUCKET = 8
+
+
+class COMPETITOR:
+    """Uma cobra da arena e o placar dela; `bot` diz se ela é controlada por bot_direction().
+
+    A cobra começa fora do tabuleiro (alive False) até ARENA.respawn() achar lugar para ela.
+    """
+
+    def __init__(self, number, snake, bot=False):
+        self.number = number
+        self.snake = snake
+        self.bot = bot
+        self.alive = False
+        # Vaga de um jogador que saiu da arena (veja ARENA.leave); pode ser reaproveitada por join().
+        self.left = False
+        self.respawn_tick = 0
+        self.score = 0
+        self.kills = 0
+        self.deaths = 0
+        self.death_cause = None
+        # Fruta que o bot está perseguindo (índice no grid).
+        self.target = None
+
+
+class ARENA:
+    """Estado e regras de uma arena com `players` cobras controladas de fora e `bots` bots.
+
+    Os jogadores são os números 0..players-1 e os bots vêm em seguida.
+    `step(actions)` recebe {número: direção} dos jogadores (os bots decidem
+    sozinhos), avança um tick e devolve a lista de (evento, número) do tick.
+    """
+    snake_class = snake_core.SNAKE
+
+    def __init__(self, players=1, bots=0, size=ARENA_SIZE, obstacles=(), rng=random, fruit_count=None):
+        self.rng = rng
+        self.seed = None
+        self.grid = GRID(size)
+        self.obstacles = snake_core.OBSTACLES(self.grid, obstacles)
+        # Número da cobra dona do segmento em cada célula, ou -1.
+        self.owner = array('i', [-1]) * len(self.grid.cells)
+        self.fruits = set()
+        # As mesmas frutas agrupadas por balde de FRUIT_BUCKET x FRUIT_BUCKET células.
+        self.fruit_buckets = {}
+        self.competitors = []
+        self.ticks = 0
+        self.events = []
+        # Frutas que apareceram ou sumiram no último tick, em pares (índice, apareceu).
+        self.fruit_changes = []
+        for number in range(players + bots):
+            self.respawn(self.add_competitor(number >= players))
+        if fruit_count is None:
+            fruit_count = max(1, int(len(self.competitors) * FRUITS_PER_SNAKE))
+        for _ in range(fruit_count):
+            self.add_fruit()
+
+    @classmethod
+    def seeded(cls, seed, **options):
+        # Arena reproduzível, com obstáculos sorteados na mesma densidade do jogo normal.
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        rng = random.Random(seed)
+        size = options.get('size', ARENA_SIZE)
+        # Na arena não há posição inicial fixa: os obstáculos podem cair em qualquer célula.
+        obstacles = snake_core.generate_obstacles(snake_core.obstacle_count(size), rng, size, exclude=())
+        arena = cls(obstacles=obstacles, rng=rng, **options)
+        arena.seed = seed
+        return arena
+
+    def sample_free(self):
+        # Célula livre que não tem fruta, ou None se nenhuma das tentativas achar uma.
+        for _ in range(SPAWN_TRIES):
+            index = self.grid.sample_free(self.rng)
+            if index is None:
+                return None
+            if index not in self.fruits:
+                return index
+        return None
+
+    def new_competitor(self, number, snake, bot):
+        # Ponto de extensão: o cliente pygame troca aqui os sprites das cobras dos jogadores.
+        return COMPETITOR(number, snake, bot)
+
+    def add_competitor(self, bot=False):
+        competitor = self.new_competitor(len(self.competitors), self.snake_class(self.grid, ()), bot)
+        self.competitors.append(competitor)
+        return competitor
+
+    def join(self, bot=False):
+        # Uma cobra nova (na vaga de quem saiu, se houver), que nasce no próximo tick.
+        for competitor in self.competitors:
+            if competitor.left:
+                competitor = self.new_competitor(competitor.number, competitor.snake, bot)
+                self.competitors[competitor.number] = competitor
+                break
+        else:
+            competitor = self.add_competitor(bot)
+        competitor.respawn_tick = self.ticks + 1
+        return competitor
+
+    def leave(self, number):
+        competitor = self.competitors[number]
+        if competitor.alive:
+            self.kill(competitor, None)
+        competitor.left = True
+
+    def add_fruit(self):
+        index = self.sample_free()
+        if index is not None:
+            self.fruits.add(index)
+            self.fruit_changes.append((index, True))
+            self.fruit_buckets.setdefault(self.fruit_bucket(index), set()).add(index)
+        return index
+
+    def remove_fruit(self, index):
+        self.fruits.discard(index)
+        self.fruit_changes.append((index, False))
+        bucket = self.fruit_bucket(index)
+        self.fruit_buckets[bucket].discard(index)
+        if not self.fruit_buckets[bucket]:
+            del self.fruit_buckets[bucket]
+
+    def fruit_bucket(self, index):
+        return self.grid.cell_x(index) // FRUIT_BUCKET, self.grid.cell_y(index) // FRUIT_BUCKET
+
+    def nearest_fruit(self, x, y):
+        # Procura nos baldes em anéis cada vez maiores em volta de (x, y). Achada uma fruta, olha
+        # ainda o anel seguinte, onde pode haver uma mais perto pela distância em células.
+        grid = self.grid
+        center_x, center_y = x // FRUIT_BUCKET, y // FRUIT_BUCKET
+        best = None
+        best_distance = None
+        last_ring = grid.size // FRUIT_BUCKET + 1
+        ring = 0
+        while ring <= last_ring:
+            for bucket_x in range(center_x - ring, center_x + ring + 1):
+                for bucket_y in range(center_y - ring, center_y + ring + 1):
+                    if ring and center_x - ring < bucket_x < center_x + ring and center_y - ring < bucket_y < center_y + ring:
+                        continue  # Só a borda do anel; o miolo já foi visto
+                    for fruit in self.fruit_buckets.get((bucket_x, bucket_y), ()):
+                        distance = abs(grid.cell_x(fruit) - x) + abs(grid.cell_y(fruit) - y)
+                        if best_distance is None or distance < best_distance or distance == best_distance and fruit < best:
+                            best, best_distance = fruit, distance
+            if best is not None and ring < last_ring:
+                last_ring = ring + 1
+            ring += 1
+        return best
+
+    def spawn_cells(self):
+        # Uma linha reta de START_LENGTH células livres, com uma célula livre à frente da cabeça.
+        grid = self.grid
+        for _ in range(SPAWN_TRIES):
+            head = self.sample_free()
+            if head is None:
+                return None, None
+            direction = self.rng.choice(DIRECTIONS)
+            step = direction[0] + direction[1] * grid.stride
+            cells = [head - step * i for i in range(START_LENGTH)]
+            if all(grid.is_free(cell) and cell not in self.fruits for cell in cells) and grid.is_free(head + step):
+                return cells, direction
+        return None, None
+
+    def respawn(self, competitor):
+        cells, direction = self.spawn_cells()
+        if cells is None:
+            competitor.respawn_tick = self.ticks + 1  # Tabuleiro cheio: tenta de novo no próximo tick
+            return False
+        snake = competitor.snake
+        snake.place(cells)
+        for block in cells:
+            self.owner[block] = competitor.number
+        snake.direction = direction
+        snake.new_block = False
+        snake.last_tail = None
+        competitor.alive = True
+        competitor.target = None
+        return True
+
+    def change_direction(self, number, direction):
+        # Mesma regra do jogo normal: a direção oposta à atual é ignorada.
+        snake = self.competitors[number].snake
+        current = snake.direction
+        if direction is None or direction[0] and current[0] == -direction[0] or direction[1] and current[1] == -direction[1]:
+            return
+        snake.direction = direction
+
+    def bot_direction(self, competitor):
+        # Vai na direção da fruta mais próxima, evitando as células ocupadas em volta da cabeça.
+        grid = self.grid
+        snake = competitor.snake
+        head = snake.body[0]
+        x, y = grid.cell_x(head), grid.cell_y(head)
+        if competitor.target not in self.fruits:
+            competitor.target = self.nearest_fruit(x, y)
+        target = competitor.target
+        target_x, target_y = (x, y) if target is None else (grid.cell_x(target), grid.cell_y(target))
+        choices = []
+        for direction in DIRECTIONS:
+            if direction[0] + snake.direction[0] == 0 and direction[1] + snake.direction[1] == 0:
+                continue
+            blocked = not grid.is_free(head + direction[0] + direction[1] * grid.stride)
+            distance = abs(x + direction[0] - target_x) + abs(y + direction[1] - target_y)
+            choices.append((blocked, distance, direction))
+        return min(choices)[2]
+
+    def step(self, actions=None):
+        self.events = []
+        self.fruit_changes = []
+        self.ticks += 1
+        if actions:
+            for number, direction in actions.items():
+                self.change_direction(number, direction)
+        alive = []
+        for competitor in self.competitors:
+            if competitor.alive:
+                alive.append(competitor)
+                if competitor.bot:
+                    competitor.snake.direction = self.bot_direction(competitor)
+            elif not competitor.left and self.ticks >= competitor.respawn_tick and self.respawn(competitor):
+                self.events.append((RESPAWNED, competitor.number))
+
+        grid = self.grid
+        owner = self.owner
+        # Todos os rabos saem antes de qualquer cabeça entrar.
+        for competitor in alive:
+            snake = competitor.snake
+            if not snake.new_block:
+                owner[snake.body[-1]] = -1
+            snake.move_tail()
+
+        # Hash das cabeças que andaram: célula -> cobras cuja cabeça entrou nela.
+        heads = {}
+        for competitor in alive:
+            head = competitor.snake.move_head()
+            if head in heads:
+                heads[head].append(competitor)
+            else:
+                heads[head] = [competitor]
+
+        dead = []
+        for head, competitors in heads.items():
+            if not grid.is_collision(head):
+                competitor = competitors[0]
+                owner[head] = competitor.number
+                if head in self.fruits:
+                    self.eat(competitor, head)
+                continue
+            cells = grid.cells[head]
+            if cells & GRID.BORDER or cells & GRID.OBSTACLE:
+                cause = grid.collision_cause(head)
+                killer = None
+            elif len(competitors) > 1:
+                cause = HIT_SNAKE  # Cabeça com cabeça: ninguém leva a kill
+                killer = None
+            else:
+                # O dono da célula ainda é o do tick anterior: as cabeças deste tick só são gravadas se sobreviverem.
+                killer = owner[head]
+                cause = snake_core.HIT_SELF if killer == competitors[0].number else HIT_SNAKE
+            for competitor in competitors:
+                dead.append((competitor, cause))
+            if cause == HIT_SNAKE and killer is not None and killer >= 0:
+                self.competitors[killer].kills += 1
+                self.events.append((KILL, killer))
+        for competitor, cause in dead:
+            self.kill(competitor, cause)
+        return self.events
+
+    def eat(self, competitor, index):
+        competitor.snake.add_block()
+        competitor.score += 1
+        self.remove_fruit(index)
+        self.add_fruit()
+        self.events.append((snake_core.ATE_FRUIT, competitor.number))
+
+    def kill(self, competitor, cause):
+        grid = self.grid
+        for block in competitor.snake.body:
+            grid.remove_snake(block)
+            if grid.cells[block] & GRID.SNAKE_MASK == 0:
+                self.owner[block] = -1
+        competitor.snake.body.clear()
+        competitor.alive = False
+        competitor.deaths += 1
+        competitor.death_cause = cause
+        competitor.respawn_tick = self.ticks + RESPAWN_TICKS
+        self.events.append((DIED, competitor.number))
+
+    def competitors_in(self, left, top, right, bottom):
+        # Cobras com algum segmento nas células [left, right) x [top, bottom), consultando o hash
+        # espacial: custa O(células da área), não O(segmentos de todas as cobras).
+        grid = self.grid
+        owner = self.owner
+        numbers = set()
+        for y in range(max(0, top), min(grid.size, bottom)):
+            row = grid.cell_index(0, y)
+            numbers.update(owner[row + max(0, left):row + min(grid.size, right)])
+        numbers.discard(-1)
+        return [self.competitors[number] for number in sorted(numbers)]
+
+    def leaders(self, count=5):
+        competitors = [competitor for competitor in self.competitors if not competitor.left]
+        return sorted(competitors, key=lambda competitor: (-competitor.score, competitor.number))[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roda uma arena do Jogo da Cobra só com bots, sem janela")
+    parser.add_argument('--bots', type=int, default=100)
+    parser.add_argument('--size', type=int, default=ARENA_SIZE, help="células por lado do tabuleiro")
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    arena = ARENA.seeded(args.seed, players=0, bots=args.bots, size=args.size)
+    started = time.perf_counter()
+    for _ in range(args.ticks):
+        arena.step()
+    elapsed = time.perf_counter() - started
+    competitors = arena.competitors
+    print(json.dumps({
+        'bots': args.bots,
+        'size': args.size,
+        'ticks': args.ticks,
+        'ticks_per_s': round(args.ticks / elapsed) if elapsed else None,
+        'mean_score': sum(c.score for c in competitors) / len(competitors) if competitors else 0,
+        'max_score': max((c.score for c in competitors), default=0),
+        'deaths': sum(c.deaths for c in competitors),
+        'kills': sum(c.kills for c in competitors),
+        'alive': sum(c.alive for c in competitors),
+    }))
+
+
+if __name__ == '__main__':
+    main()
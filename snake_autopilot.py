@@ -0,0 +1,244 @@
+"""Piloto automático: joga uma partida do núcleo sozinho.
+
+O piloto procura (BFS no grid de ocupação) um caminho da cabeça até a fruta,
+desviando do corpo, da borda e dos obstáculos, e só aceita o caminho se,
+depois de comer, a cabeça ainda alcançar o próprio rabo; senão ele segue o
+rabo até aparecer um caminho seguro. O caminho encontrado fica guardado e é
+seguido um passo por tick, sem nova busca: enquanto a fruta não muda de lugar
+e a próxima célula continua livre, cada tick custa O(1), qualquer que seja o
+tamanho da cobra. Só há busca nova quando a fruta muda, o caminho acaba ou a
+cobra volta ao começo (vida perdida, nova partida).
+
+O piloto comanda a partida pelo mesmo GAME.change_direction() que as teclas
+usam, então a gravação de replays e as regras de direção valem igual.
+"""
+from array import array
+
+import snake_core
+
+# Modos do caminho guardado.
+FRUIT = 'fruit'
+TAIL = 'tail'
+# Depois de não achar caminho seguro até a fruta, quantos ticks seguir o rabo antes de procurar de novo.
+RETRY_TICKS = 8
+# Seguindo o rabo a cobra repete o mesmo desenho; depois de tantas voltas do corpo inteiro sem caminho
+# seguro (fruta num beco, por exemplo), o piloto vai até a fruta mesmo assim.
+STUCK_LAPS = 2
+
+
+class AUTOPILOT:
+    """Piloto de uma partida (snake_core.GAME ou subclasse).
+
+    `direction()` devolve a direção do próximo tick; `drive()` já a aplica
+    com game.change_direction(). `searches` conta as buscas feitas.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.path = []
+        self.mode = None
+        self.goal = None
+        self.expected_head = None
+        self.ticks = 0
+        # Tick a partir do qual vale procurar a fruta de novo (veja RETRY_TICKS).
+        self.retry_tick = 0
+        # Tick da última vez que havia caminho seguro até a fruta.
+        self.safe_tick = 0
+        self.searches = 0
+        # Marcas de visita por geração: não é preciso limpar o array entre as buscas.
+        self.visited = None
+        self.parent = None
+        self.generation = 0
+
+    def drive(self):
+        self.game.change_direction(self.direction())
+
+    def direction(self):
+        game = self.game
+        head = game.snake.head_index()
+        self.ticks += 1
+        valid = self.path_valid(head)
+        # Seguindo o rabo, de tempos em tempos confere se já há caminho seguro até a fruta.
+        if not valid or self.mode == TAIL and self.ticks >= self.retry_tick:
+            if not self.plan_fruit(head) and not valid:
+                self.plan_tail(head)
+        if not self.path:
+            return self.fallback(head)
+        target = self.path.pop()
+        self.expected_head = target
+        return self.direction_to(target - head)
+
+    def path_valid(self, head):
+        if not self.path or head != self.expected_head:
+            return False
+        if self.mode == FRUIT and self.goal != self.game.fruit.index:
+            return False
+        return self.passable(self.path[-1])
+
+    def passable(self, index):
+        # Livre, ou o rabo, que sai da célula neste mesmo tick (se a cobra não estiver crescendo).
+        game = self.game
+        if game.grid.is_free(index):
+            return True
+        return index == game.snake.body[-1] and not game.snake.new_block and game.grid.cells[index] == 1
+
+    def plan_fruit(self, head):
+        game = self.game
+        self.ensure_buffers()
+        fruit = game.fruit.index
+        # Crescendo, o rabo fica no lugar neste tick: não dá para passar por ele (veja passable()).
+        tail = -1 if game.snake.new_block else game.snake.body[-1]
+        path = self.search(game.grid.cells, head, fruit, tail)
+        stuck = self.ticks - self.safe_tick > STUCK_LAPS * len(game.snake.body)
+        if path is not None and (stuck or self.safe_after(path)):
+            self.path, self.mode, self.goal = path, FRUIT, fruit
+            self.safe_tick = self.ticks
+            return True
+        self.retry_tick = self.ticks + RETRY_TICKS
+        return False
+
+    def plan_tail(self, head):
+        # Sem caminho seguro até a fruta: vai até o rabo e depois segue o próprio corpo, do rabo
+        # para a cabeça. Cada célula do corpo fica livre um tick antes de a cabeça chegar nela
+        # (se a cobra não crescer no caminho), então o caminho vale por um corpo inteiro.
+        game = self.game
+        snake = game.snake
+        self.path = []
+        self.mode = None
+        self.goal = None
+        tail = snake.body[-1]
+        if tail - head in (-game.grid.stride, 1, game.grid.stride, -1) and self.passable(tail):
+            path = [tail]  # Rabo colado na cabeça: o passo é direto, sem busca
+        else:
+            path = self.search(game.grid.cells, head, tail, tail)
+        if path is not None and (len(path) > 1 or not snake.new_block):
+            body = list(snake.body)
+            self.path, self.mode, self.goal = body[1:-1] + path, TAIL, tail
+
+    def ensure_buffers(self):
+        size = len(self.game.grid.cells)
+        if self.visited is None or len(self.visited) != size:
+            self.visited = (array('I', bytes(4 * size)), array('I', bytes(4 * size)))
+            self.parent = (array('i', bytes(4 * size)), array('i', bytes(4 * size)))
+            self.generation = 0
+
+    def search(self, cells, start, goal, tail):
+        """Caminho de `start` até `goal` em `cells`, como células da última para a primeira (para
+        tirar com pop()), ou None. `tail` é atravessável, como em passable().
+
+        BFS pelos dois lados ao mesmo tempo, expandindo sempre a fronteira menor: quando a fruta
+        (ou a cabeça) está fechada num bolsão, a busca acaba ao esgotar o bolsão, sem varrer o
+        resto do tabuleiro.
+        """
+        self.searches += 1
+        self.generation += 1
+        generation = self.generation
+        visited = self.visited
+        parent = self.parent
+        stride = self.game.grid.stride
+        steps = (-stride, 1, stride, -1)
+        visited[0][start] = generation
+        visited[1][goal] = generation
+        frontiers = [[start], [goal]]
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            mine, other = visited[side], visited[1 - side]
+            links = parent[side]
+            following = []
+            for cell in frontiers[side]:
+                for step in steps:
+                    neighbour = cell + step
+                    if other[neighbour] == generation:
+                        if side == 0:
+                            return self.join_path(start, goal, cell, neighbour)
+                        return self.join_path(start, goal, neighbour, cell)
+                    if mine[neighbour] == generation:
+                        continue
+                    if cells[neighbour] != 0 and not (neighbour == tail and cells[neighbour] == 1):
+                        continue
+                    mine[neighbour] = generation
+                    links[neighbour] = cell
+                    following.append(neighbour)
+            frontiers[side] = following
+        return None
+
+    def join_path(self, start, goal, near, far):
+        # `near` foi alcançada a partir de `start` e `far`, vizinha dela, a partir de `goal`.
+        forward = []
+        cell = near
+        while cell != start:
+            forward.append(cell)
+            cell = self.parent[0][cell]
+        forward.reverse()
+        cell = far
+        forward.append(cell)
+        while cell != goal:
+            cell = self.parent[1][cell]
+            forward.append(cell)
+        forward.reverse()
+        return forward
+
+    def safe_after(self, path):
+        # Simula o corpo depois de seguir o caminho e comer a fruta, e confere se a nova cabeça
+        # ainda chega ao novo rabo.
+        game = self.game
+        body = list(game.snake.body)
+        length = len(body) + 1
+        moved = path[:length]  # `path` vai da fruta para perto da cabeça
+        body_after = moved + body[:length - len(moved)]
+        cells = bytearray(game.grid.cells)
+        for block in body:
+            cells[block] -= 1
+        for block in body_after:
+            cells[block] += 1
+        new_head, new_tail = body_after[0], body_after[-1]
+        return self.search(cells, new_head, new_tail, new_tail) is not None
+
+    def fallback(self, head):
+        # Nenhum caminho: vai para a célula vizinha livre com mais espaço em volta (ou mantém a direção).
+        self.path = []
+        self.expected_head = None
+        stride = self.game.grid.stride
+        best = None
+        for step in (-stride, 1, stride, -1):
+            neighbour = head + step
+            if self.passable(neighbour):
+                room = self.room(neighbour)
+                if best is None or room > best[0]:
+                    best = (room, step)
+        if best is None:
+            return self.game.snake.direction if self.game.snake.direction != snake_core.STOPPED else snake_core.RIGHT
+        return self.direction_to(best[1])
+
+    def room(self, start):
+        # Quantas células livres são alcançáveis a partir de `start`.
+        self.ensure_buffers()
+        self.generation += 1
+        generation = self.generation
+        visited = self.visited[0]
+        cells = self.game.grid.cells
+        stride = self.game.grid.stride
+        visited[start] = generation
+        frontier = [start]
+        count = 0
+        while frontier:
+            count += len(frontier)
+            following = []
+            for cell in frontier:
+                for step in (-stride, 1, stride, -1):
+                    neighbour = cell + step
+                    if visited[neighbour] != generation and cells[neighbour] == 0:
+                        visited[neighbour] = generation
+                        following.append(neighbour)
+            frontier = following
+        return count
+
+    def direction_to(self, step):
+        stride = self.game.grid.stride
+        if step == -stride:
+            return snake_core.UP
+        if step == 1:
+            return snake_core.RIGHT
+        if step == stride:
+            return snake_core.DOWN
+        return snake_core.LEFT
@@ -0,0 +1,261 @@
+"""Versão vetorizada do núcleo: N partidas avançando juntas com NumPy.
+
+Segue as mesmas regras de snake_core.GAME (grid com borda, corpo em buffer
+circular, vidas, maçãs por nível e aumento de velocidade), mas guarda o estado
+de todas as partidas em arrays e avança todas num único step(actions). Não há
+menu nem telas entre níveis: ao completar um nível a partida passa direto para
+o próximo (com os dois aumentos de velocidade do jogo, o de next_level() e o de
+start_level()), e partidas que acabam as vidas recomeçam sozinhas, com outra
+semente.
+
+Os obstáculos são os do jogo: cada partida tem a sua semente e o layout de cada
+nível sai do mesmo sorteio de GAME.load_layout(). As sementes das partidas novas
+saem de um conjunto de SEED_POOL sementes do lote, e o layout do nível inicial
+de cada uma é sorteado uma vez só e guardado, então recomeçar partidas é uma
+cópia vetorizada. Só a troca de nível no meio da partida sorteia em Python,
+partida por partida (o layout depende de onde a cobra está). Com `obstacles` o
+layout é fixo, o mesmo para todas as partidas e níveis, e nenhum sorteio roda:
+`obstacles=[]` é o caminho mais rápido.
+"""
+import random
+
+import numpy as np
+
+import snake_core
+from snake_core import GRID, GRID_STRIDE, START_BODY, LEVEL_COUNT
+
+# Ações aceitas por step(): índice em DIRECTIONS, ou KEEP para manter a direção.
+KEEP = -1
+DIRECTIONS = (snake_core.UP, snake_core.RIGHT, snake_core.DOWN, snake_core.LEFT)
+STEPS = np.array([dx + dy * GRID_STRIDE for dx, dy in DIRECTIONS], dtype=np.int32)
+
+# Maçãs por nível, indexado pelo número do nível (a posição 0 não é usada).
+LEVEL_GOALS = np.array([0] + [snake_core.LEVEL_GOALS[level] for level in range(1, LEVEL_COUNT + 1)], dtype=np.int32)
+
+# Quantas vezes o sorteio de fruta tenta uma célula aleatória antes de varrer as células livres.
+FRUIT_TRIES = 8
+
+# Quantas sementes diferentes um lote usa para as partidas novas (cada uma com o layout inicial guardado).
+SEED_POOL = 1024
+
+
+class BATCH_GAME:
+    """N partidas independentes guardadas em arrays.
+
+    `step(actions)` recebe um array de N ações (KEEP ou 0..3, veja DIRECTIONS)
+    e devolve um dicionário com um array booleano por evento do núcleo
+    (ATE_FRUIT, LEVEL_COMPLETE, LOST_LIFE, GAME_OVER). `finished_score` e
+    `finished_level` guardam o resultado das partidas que acabaram nesse step,
+    antes do recomeço automático.
+    """
+
+    def __init__(self, count, obstacles=None, level=1, seed=None):
+        self.count = count
+        self.start_level_number = level
+        self.rng = np.random.default_rng(seed)
+        self.games = np.arange(count)
+        self.capacity = GRID_STRIDE * GRID_STRIDE
+        self.level_layouts = obstacles is None
+
+        # Grid base (borda, obstáculos fixos e a cobra na posição inicial), copiado para recomeçar o
+        # tabuleiro de uma partida; os obstáculos sorteados por nível ficam por cima dele.
+        base = GRID()
+        for index in obstacles or ():
+            base.add_obstacle(index)
+        self.base_cells = np.frombuffer(bytes(base.cells), dtype=np.uint8).copy()
+        # Grid de rascunho dos sorteios de layout, recomeçado de uma cópia vazia (montar um GRID novo custa
+        # mais que o sorteio).
+        self.layout_grid = GRID()
+        self.empty_grid = self.layout_grid.snapshot()
+        for block in START_BODY:
+            self.base_cells[block] += 1
+        # Sementes das partidas novas e, sorteado na primeira vez que cada uma sai, o layout do nível inicial.
+        self.seed_pool = self.rng.integers(0, 2 ** 63, SEED_POOL, dtype=np.int64)
+        self.pool_cells = np.zeros((SEED_POOL, self.capacity), dtype=np.uint8)
+        self.pool_ready = np.zeros(SEED_POOL, dtype=bool)
+
+        self.cells = np.empty((count, self.capacity), dtype=np.uint8)
+        self.body = np.zeros((count, self.capacity), dtype=np.int32)
+        self.start = np.zeros(count, dtype=np.int32)
+        self.length = np.zeros(count, dtype=np.int32)
+        self.direction = np.zeros(count, dtype=np.int32)
+        self.new_block = np.zeros(count, dtype=bool)
+        self.has_moved = np.zeros(count, dtype=bool)
+        self.fruit = np.zeros(count, dtype=np.int32)
+        # Semente de cada partida (a de GAME.seeded()), de onde sai o layout de cada nível.
+        self.seeds = np.zeros(count, dtype=np.int64)
+        self.lives = np.zeros(count, dtype=np.int32)
+        self.score = np.zeros(count, dtype=np.int32)
+        self.apples_collected = np.zeros(count, dtype=np.int32)
+        self.apples_to_win = np.zeros(count, dtype=np.int32)
+        self.level = np.zeros(count, dtype=np.int32)
+        self.speed = np.zeros(count, dtype=np.int32)
+        self.ticks = np.zeros(count, dtype=np.int64)
+        self.finished_score = np.zeros(count, dtype=np.int32)
+        self.finished_level = np.zeros(count, dtype=np.int32)
+        self.reset_games(np.ones(count, dtype=bool))
+
+    @property
+    def heads(self):
+        return self.body[self.games, self.start]
+
+    def reset_snakes(self, mask):
+        games = np.flatnonzero(mask)
+        if games.size == 0:
+            return
+        # A cobra volta à posição inicial; os obstáculos do nível ficam.
+        self.cells[games] = self.base_cells | (self.cells[games] & GRID.OBSTACLE)
+        self.body[games, :len(START_BODY)] = START_BODY
+        self.start[games] = 0
+        self.length[games] = len(START_BODY)
+        self.direction[games] = 0
+        self.new_block[games] = False
+        self.has_moved[games] = False
+
+    def reset_games(self, mask):
+        # Mesmo caminho de GAME.seeded(semente nova) seguido de start_level(level).
+        games = np.flatnonzero(mask)
+        pool = self.rng.integers(0, SEED_POOL, games.size)
+        self.seeds[games] = self.seed_pool[pool]
+        if self.level_layouts:
+            self.fill_pool(np.unique(pool[~self.pool_ready[pool]]))
+            self.cells[games] = self.pool_cells[pool]
+        else:
+            self.cells[games] = self.base_cells
+        self.reset_snakes(mask)
+        self.lives[mask] = 3
+        self.score[mask] = 0
+        self.apples_collected[mask] = 0
+        self.level[mask] = self.start_level_number
+        self.apples_to_win[mask] = LEVEL_GOALS[self.start_level_number]
+        self.speed[mask] = max(snake_core.MIN_SPEED, snake_core.START_SPEED - 2 * snake_core.SPEED_STEP)
+        self.ticks[mask] = 0
+        self.randomize_fruit(mask)
+
+    def next_level(self, mask):
+        level = self.level[mask] + 1
+        level[level > LEVEL_COUNT] = 1
+        self.level[mask] = level
+        self.apples_collected[mask] = 0
+        self.apples_to_win[mask] = LEVEL_GOALS[level]
+        self.speed[mask] = np.maximum(snake_core.MIN_SPEED, self.speed[mask] - 2 * snake_core.SPEED_STEP)
+        self.load_layouts(mask)
+        self.randomize_fruit(mask)
+
+    def fill_pool(self, pool):
+        # Layout do nível inicial das sementes do conjunto que ainda não saíram, com a cobra na
+        # posição inicial e parada, como em GAME.seeded() seguido de start_level().
+        for index in pool:
+            cells = self.base_cells.copy()
+            cells[self.layout_cells(self.seed_pool[index], self.start_level_number, cells, START_BODY[0], 0)] \
+                |= GRID.OBSTACLE
+            self.pool_cells[index] = cells
+            self.pool_ready[index] = True
+
+    def load_layouts(self, mask):
+        # Troca de nível no meio da partida: o layout depende do corpo da cobra, então o sorteio de
+        # GAME.load_layout() roda partida por partida, em Python.
+        if not self.level_layouts:
+            return
+        for game in np.flatnonzero(mask):
+            obstacles = self.layout_cells(self.seeds[game], self.level[game], self.cells[game],
+                                          int(self.body[game, self.start[game]]), int(self.direction[game]))
+            self.cells[game] &= np.uint8(~GRID.OBSTACLE & 0xFF)
+            self.cells[game, obstacles] |= GRID.OBSTACLE
+
+    def layout_cells(self, seed, level, cells, head, step):
+        # Obstáculos que GAME.load_layout() sortearia com a cobra ocupando as células de `cells`.
+        grid = self.layout_grid
+        grid.restore(self.empty_grid)
+        for index in np.flatnonzero(cells & GRID.SNAKE_MASK):
+            for _ in range(cells[index] & GRID.SNAKE_MASK):
+                grid.add_snake(int(index))
+        obstacles = snake_core.OBSTACLES(grid)
+        obstacles.generate(random.Random(f"{seed}/{level}"), int(level), snake_core.layout_keep(grid, head, step))
+        return list(obstacles.cells)
+
+    def randomize_fruit(self, mask):
+        games = np.flatnonzero(mask)
+        # Tenta células aleatórias em lote; as poucas partidas que não acharem uma célula livre
+        # (tabuleiro quase cheio) sorteiam entre as células livres da própria linha do grid.
+        for _ in range(FRUIT_TRIES):
+            if games.size == 0:
+                return
+            x = self.rng.integers(0, snake_core.cell_number, games.size)
+            y = self.rng.integers(0, snake_core.cell_number, games.size)
+            candidates = (y + 1) * GRID_STRIDE + x + 1
+            free = self.cells[games, candidates] == 0
+            self.fruit[games[free]] = candidates[free]
+            games = games[~free]
+        for game in games:
+            free_cells = np.flatnonzero(self.cells[game] == 0)
+            if free_cells.size:
+                self.fruit[game] = free_cells[self.rng.integers(free_cells.size)]
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        games = self.games
+        self.finished_score[:] = 0
+        self.finished_level[:] = 0
+
+        # Mudança de direção, com a mesma regra de GAME.change_direction().
+        pressed = actions >= 0
+        self.has_moved |= pressed
+        wanted = STEPS[np.where(pressed, actions, 0)]
+        turn = pressed & ((self.direction == 0) | (wanted != -self.direction))
+        self.direction[turn] = wanted[turn]
+
+        moving = self.has_moved.copy()
+        ticks_games = np.flatnonzero(moving)
+        self.ticks[ticks_games] += 1
+
+        # Remove o rabo de quem não está crescendo.
+        shrink = moving & ~self.new_block
+        shrink_games = np.flatnonzero(shrink)
+        tail_slot = (self.start[shrink_games] + self.length[shrink_games] - 1) % self.capacity
+        tails = self.body[shrink_games, tail_slot]
+        self.cells[shrink_games, tails] -= 1
+        self.length[shrink_games] -= 1
+        self.new_block[moving] = False
+
+        # Insere a nova cabeça.
+        heads = self.body[ticks_games, self.start[ticks_games]] + self.direction[ticks_games]
+        self.start[ticks_games] = (self.start[ticks_games] - 1) % self.capacity
+        self.body[ticks_games, self.start[ticks_games]] = heads
+        self.length[ticks_games] += 1
+        self.cells[ticks_games, heads] += 1
+
+        ate = np.zeros(self.count, dtype=bool)
+        ate[ticks_games] = heads == self.fruit[ticks_games]
+        self.new_block |= ate
+        self.score += ate
+        self.apples_collected += ate
+        level_complete = ate & (self.apples_collected >= self.apples_to_win)
+
+        lost_life = np.zeros(self.count, dtype=bool)
+        lost_life[ticks_games] = self.cells[ticks_games, heads] > 1
+        self.lives -= lost_life
+        game_over = lost_life & (self.lives <= 0)
+
+        self.randomize_fruit(ate & ~level_complete & ~lost_life)
+        self.next_level(level_complete & ~game_over)
+        self.reset_snakes(lost_life & ~game_over)
+
+        self.finished_score[game_over] = self.score[game_over]
+        self.finished_level[game_over] = self.level[game_over]
+        self.reset_games(game_over)
+
+        return {
+            snake_core.ATE_FRUIT: ate,
+            snake_core.LEVEL_COMPLETE: level_complete,
+            snake_core.LOST_LIFE: lost_life,
+            snake_core.GAME_OVER: game_over,
+        }
+
+    def observation(self):
+        # Grid de cada partida (sem a borda) com a fruta marcada, no formato (N, linhas, colunas).
+        cells = self.cells.reshape(self.count, GRID_STRIDE, GRID_STRIDE)[:, 1:-1, 1:-1].copy()
+        fruit_x = self.fruit % GRID_STRIDE - 1
+        fruit_y = self.fruit // GRID_STRIDE - 1
+        cells[self.games, fruit_y, fruit_x] |= 0x20
+        return cells
@@ -0,0 +1,340 @@
+"""Benchmarks dos caminhos quentes do jogo: tick, colisões, sorteio de fruta e desenho.
+
+Cada benchmark roda para vários tamanhos de cobra (ou níveis de ocupação do
+tabuleiro) e mede o tempo por chamada. A renderização usa o driver de vídeo
+dummy do SDL, então roda sem janela. O resultado é salvo em
+benchmarks/<commit>.json, para comparar com o de outro commit:
+
+    python snake_bench.py
+    python snake_bench.py --compare 56c2184
+    python snake_bench.py --filter draw --quick
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import snake_arena
+import snake_autopilot
+import snake_core
+from snake_core import GRID, BODY
+
+RESULTS_DIR = 'benchmarks'
+LENGTHS = (3, 50, 200, 390)
+FILLS = (0.0, 0.5, 0.9, 0.99)
+# Tamanhos de tabuleiro (células por lado) dos benchmarks que dependem dele.
+SIZES = (20, 100, 500)
+# Tamanho da cobra nos benchmarks por tamanho de tabuleiro.
+BOARD_LENGTH = 50
+# Bots na arena (tabuleiro de ARENA_BOARD células por lado) e ticks de aquecimento antes de medir.
+ARENA_BOTS = (10, 100, 500)
+ARENA_BOARD = 100
+ARENA_WARMUP = 50
+# Tamanhos de cobra do piloto automático, num tabuleiro de AUTOPILOT_BOARD células por lado.
+AUTOPILOT_LENGTHS = (3, 50, 200, 500)
+AUTOPILOT_BOARD = 40
+# Tempo mínimo de uma rodada (as chamadas são repetidas até passar disso) e número de rodadas.
+ROUND_SECONDS = 0.05
+ROUNDS = 5
+
+BENCHMARKS = []
+
+
+def benchmark(name, params):
+    # Registra uma função que recebe um parâmetro e devolve a chamada a ser medida.
+    def register(function):
+        BENCHMARKS.append((name, params, function))
+        return function
+    return register
+
+
+def board_cycle(grid):
+    # Um ciclo que passa por todas as células do tabuleiro: a cobra pode andar nele para sempre sem bater.
+    n = grid.size
+    cells = [(x, 0) for x in range(n)]
+    for y in range(1, n):
+        columns = range(n - 1, 0, -1) if y % 2 else range(1, n)
+        cells.extend((x, y) for x in columns)
+    cells.extend((0, y) for y in range(n - 1, 0, -1))
+    indices = [grid.cell_index(x, y) for x, y in cells]
+    directions = []
+    for (x, y), (next_x, next_y) in zip(cells, cells[1:] + cells[:1]):
+        directions.append((next_x - x, next_y - y))
+    return indices, directions
+
+
+def place_snake(snake, length):
+    # Troca o corpo da cobra por `length` células consecutivas do ciclo, com a cabeça no fim.
+    cycle, directions = board_cycle(snake.grid)
+    for block in snake.body:
+        snake.grid.remove_snake(block)
+    snake.body = BODY(reversed(cycle[:length]))
+    for block in snake.body:
+        snake.grid.add_snake(block)
+    snake.direction = directions[length - 1]
+    return cycle, directions, length - 1
+
+
+def walker(snake, length):
+    # Chamada que move a cobra um passo ao longo do ciclo.
+    cycle, directions, position = place_snake(snake, length)
+    count = len(cycle)
+
+    def move():
+        nonlocal position
+        snake.direction = directions[position]
+        snake.move_snake()
+        position = (position + 1) % count
+    return move
+
+
+@benchmark('move_snake', LENGTHS)
+def bench_move_snake(length):
+    return walker(snake_core.SNAKE(GRID()), length)
+
+
+@benchmark('game_step', LENGTHS)
+def bench_game_step(length):
+    game = snake_core.GAME(rng=random.Random(0))
+    cycle, directions, position = place_snake(game.snake, length)
+    game.has_moved = True
+    game.fruit.index = 0  # Canto da borda: a cobra nunca come e o tamanho fica fixo
+    count = len(cycle)
+
+    def step():
+        nonlocal position
+        game.step(directions[position])
+        position = (position + 1) % count
+    return step
+
+
+@benchmark('check_collision', LENGTHS)
+def bench_check_collision(length):
+    game = snake_core.GAME(rng=random.Random(0))
+    place_snake(game.snake, length)
+    game.fruit.index = 0
+    return game.check_collision
+
+
+@benchmark('check_fail', LENGTHS)
+def bench_check_fail(length):
+    game = snake_core.GAME(rng=random.Random(0))
+    place_snake(game.snake, length)
+    return game.check_fail
+
+
+@benchmark('fruit_randomize', FILLS)
+def bench_fruit_randomize(fill):
+    grid = GRID()
+    cycle, _ = board_cycle(grid)
+    for index in cycle[:int(len(cycle) * fill)]:
+        grid.add_snake(index)
+    fruit = snake_core.FRUIT(grid, random.Random(0))
+    return fruit.randomize
+
+
+@benchmark('arena_step', ARENA_BOTS)
+def bench_arena_step(bots):
+    arena = snake_arena.ARENA.seeded(0, players=0, bots=bots, size=ARENA_BOARD)
+    for _ in range(ARENA_WARMUP):
+        arena.step()  # As cobras crescem e se espalham antes da medida
+    return arena.step
+
+
+@benchmark('autopilot_step', AUTOPILOT_LENGTHS)
+def bench_autopilot_step(length):
+    # Tick com o piloto decidindo a direção; inclui as buscas, quando a fruta muda ou o caminho acaba.
+    game = snake_core.GAME(rng=random.Random(0), level_goals={1: 10 ** 9}, size=AUTOPILOT_BOARD)
+    game.start_level(1)
+    place_snake(game.snake, length)
+    game.has_moved = True
+    autopilot = snake_autopilot.AUTOPILOT(game)
+
+    def step():
+        autopilot.drive()
+        game.step()
+        if game.game_over():
+            game.reset_game()
+            game.start_level(1)
+    return step
+
+
+@benchmark('snapshot_restore', SIZES)
+def bench_snapshot_restore(size):
+    # Clonar e voltar a partida, como faz uma busca em árvore a cada nó (sem o estado do gerador).
+    game = snake_core.GAME(rng=random.Random(0), size=size)
+    place_snake(game.snake, BOARD_LENGTH)
+    return lambda: game.restore(game.snapshot(rng=False))
+
+
+def load_frontend():
+    # O snake.py só abre a janela em init_display(); com o driver dummy nada aparece na tela.
+    import snake
+    if snake.screen is None:
+        snake.init_display()
+    return snake
+
+
+def frontend_game(length, size=snake_core.cell_number):
+    snake = load_frontend()
+    game = snake.MAIN.seeded(0, size=size)
+    game.start_level(1)
+    game.show_objective = False
+    place_snake(game.snake, length)
+    return snake, game
+
+
+@benchmark('draw_snake', LENGTHS)
+def bench_draw_snake(length):
+    _, game = frontend_game(length)
+    move = walker(game.snake, length)
+    move()  # Garante um last_tail, para o desenho interpolado do rabo
+
+    def draw():
+        game.snake.draw_snake(0.5)
+    return draw
+
+
+@benchmark('draw_grass', SIZES)
+def bench_draw_grass(size):
+    snake, game = frontend_game(3, size)
+    game.follow_head(1.0)
+    surface = snake.screen.copy()
+    return lambda: game.draw_grass(surface)
+
+
+def frame(length, dirty, size=snake_core.cell_number):
+    snake, game = frontend_game(length, size)
+    move = walker(game.snake, length)
+
+    def draw():
+        snake.DIRTY_RECT_RENDERING = dirty
+        move()
+        game.present(game.draw_elements(0.5))
+    return draw
+
+
+@benchmark('frame_dirty', LENGTHS)
+def bench_frame_dirty(length):
+    return frame(length, True)
+
+
+@benchmark('frame_full', LENGTHS)
+def bench_frame_full(length):
+    return frame(length, False)
+
+
+@benchmark('frame_board_dirty', SIZES)
+def bench_frame_board_dirty(size):
+    return frame(BOARD_LENGTH, True, size)
+
+
+@benchmark('frame_board_full', SIZES)
+def bench_frame_board_full(size):
+    return frame(BOARD_LENGTH, False, size)
+
+
+def measure(call, round_seconds=ROUND_SECONDS, rounds=ROUNDS):
+    # Calibra quantas chamadas cabem numa rodada e devolve o tempo por chamada (µs) de cada rodada.
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - started
+        if elapsed >= round_seconds:
+            break
+        number *= 2 if elapsed < round_seconds / 4 else 1 + int(round_seconds / max(elapsed, 1e-9))
+    times = [elapsed / number]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            call()
+        times.append((time.perf_counter() - started) / number)
+    return [t * 1e6 for t in times]
+
+
+def current_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + '-dirty' if dirty else commit
+
+
+def run(filter_text=None, round_seconds=ROUND_SECONDS, rounds=ROUNDS):
+    results = {}
+    for name, params, function in BENCHMARKS:
+        if filter_text and filter_text not in name:
+            continue
+        results[name] = {}
+        for param in params:
+            times = measure(function(param), round_seconds, rounds)
+            results[name][str(param)] = {'min_us': round(min(times), 3), 'median_us': round(statistics.median(times), 3)}
+            print(f"{name:<16} {param!s:>6} {min(times):12.2f} µs", file=sys.stderr)
+    return results
+
+
+def results_path(ref, directory=RESULTS_DIR):
+    if os.path.exists(ref):
+        return ref
+    return os.path.join(directory, f"{ref}.json")
+
+
+def compare(results, reference):
+    # Razão novo/antigo do melhor tempo de cada caso (abaixo de 1 = ficou mais rápido).
+    rows = []
+    for name, cases in results.items():
+        for param, timing in cases.items():
+            old = reference.get(name, {}).get(param)
+            if old:
+                rows.append((name, param, old['min_us'], timing['min_us'], timing['min_us'] / old['min_us']))
+    for name, param, old, new, ratio in rows:
+        print(f"{name:<16} {param:>6} {old:12.2f} -> {new:12.2f} µs  x{ratio:.2f}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do Jogo da Cobra")
+    parser.add_argument('--filter', help="roda só os benchmarks cujo nome contém o texto")
+    parser.add_argument('--quick', action='store_true', help="rodadas mais curtas (menos preciso)")
+    parser.add_argument('--output', default=RESULTS_DIR, help="pasta dos resultados")
+    parser.add_argument('--compare', metavar='COMMIT', help="commit (ou arquivo .json) com que comparar")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # Imagens e fontes usam caminhos relativos
+    if args.quick:
+        results = run(args.filter, ROUND_SECONDS / 5, 3)
+    else:
+        results = run(args.filter)
+    import pygame
+    report = {
+        'commit': current_commit(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if not args.no_save:
+        os.makedirs(args.output, exist_ok=True)
+        path = results_path(report['commit'], args.output)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=1)
+        print(f"resultados salvos em {path}", file=sys.stderr)
+    if args.compare:
+        with open(results_path(args.compare, args.output), encoding='utf-8') as file:
+            compare(results, json.load(file)['results'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Codificação binária comum aos replays (snake_replay) e à arena em rede (snake_net).
+
+Os números inteiros não negativos vão em varint: 7 bits por byte, do menos
+significativo para o mais, com o bit alto ligado em todos os bytes menos o
+último. DecodeError é a base dos erros de leitura dos dois formatos.
+"""
+
+
+class DecodeError(ValueError):
+    pass
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise DecodeError("dados truncados")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
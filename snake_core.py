@@ -0,0 +1,693 @@
+"""Núcleo da simulação do Jogo da Cobra, em Python puro.
+
+As regras do jogo (movimento, frutas, colisões, vidas e níveis) ficam aqui, sem
+depender de pygame, display ou mixer. Bots, testes e servidores usam GAME.step()
+diretamente; o snake.py é só um cliente que desenha o estado e toca os sons.
+"""
+import random
+from array import array
+from operator import attrgetter
+
+# Tamanho padrão do tabuleiro (em células por lado); GAME(size=...) aceita outros tamanhos.
+cell_number = 20
+
+# O grid de ocupação tem uma borda de uma célula em volta do tabuleiro, para que a
+# cabeça que acabou de sair do tabuleiro ainda tenha um índice válido (e bata na parede).
+# GRID_STRIDE e as funções cell_index/cell_x/cell_y valem para o tabuleiro padrão; para
+# outros tamanhos use os métodos de mesmo nome do GRID.
+GRID_STRIDE = cell_number + 2
+
+# Direções (dx, dy) aceitas por GAME.step() e GAME.change_direction().
+UP = (0, -1)
+RIGHT = (1, 0)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+STOPPED = (0, 0)
+
+# Maçãs necessárias para completar cada nível.
+LEVEL_GOALS = {1: 10, 2: 15, 3: 20, 4: 25}
+LEVEL_COUNT = 4
+
+# Curva de velocidade: intervalo inicial entre ticks (ms), quanto diminui a cada nível e o mínimo.
+START_SPEED = 150
+SPEED_STEP = 15
+MIN_SPEED = 50
+
+# Sementes de GAME.seeded() são inteiros de 64 bits sem sinal (o tamanho do campo no replay).
+SEED_MASK = 2 ** 64 - 1
+
+# Eventos devolvidos por GAME.step().
+ATE_FRUIT = 'ate_fruit'
+LEVEL_COMPLETE = 'level_complete'
+LOST_LIFE = 'lost_life'
+GAME_OVER = 'game_over'
+
+# Causas de morte registradas em GAME.death_cause.
+HIT_WALL = 'wall'
+HIT_OBSTACLE = 'obstacle'
+HIT_SELF = 'self'
+
+
+def cell_index(x, y):
+    return (int(y) + 1) * GRID_STRIDE + int(x) + 1
+
+
+def cell_x(index):
+    return index % GRID_STRIDE - 1
+
+
+def cell_y(index):
+    return index // GRID_STRIDE - 1
+
+
+class GRID:
+    """Grid de ocupação do tabuleiro, com consulta em tempo constante.
+
+    Cada célula guarda quantos segmentos da cobra estão nela (bits baixos) e
+    se é parede da borda ou obstáculo (bits altos). Um valor maior que 1 na
+    célula da cabeça significa colisão.
+    """
+    __slots__ = ('size', 'stride', 'cells', 'free', 'free_position', 'start_body')
+    BORDER = 0x80
+    OBSTACLE = 0x40
+    SNAKE_MASK = 0x3F
+
+    def __init__(self, size=cell_number):
+        self.size = size
+        self.stride = stride = size + 2
+        self.cells = bytearray(stride * stride)
+        for i in range(stride):
+            self.cells[i] = self.BORDER
+            self.cells[(stride - 1) * stride + i] = self.BORDER
+            self.cells[i * stride] = self.BORDER
+            self.cells[i * stride + stride - 1] = self.BORDER
+        # Lista das células livres e a posição de cada célula nessa lista (-1 se ocupada),
+        # para sortear uma célula livre e removê-la (trocando com a última) em O(1).
+        self.free = array('i', [self.cell_index(x, y) for y in range(size) for x in range(size)])
+        self.free_position = array('i', [-1]) * len(self.cells)
+        for position, index in enumerate(self.free):
+            self.free_position[index] = position
+        # Posição inicial da cobra: três células na linha do meio, com a cabeça na coluna 5.
+        middle = size // 2
+        self.start_body = (self.cell_index(5, middle), self.cell_index(4, middle), self.cell_index(3, middle))
+
+    def cell_index(self, x, y):
+        return (int(y) + 1) * self.stride + int(x) + 1
+
+    def snapshot(self):
+        # Cópias dos três buffers; a ordem da lista de livres também entra, porque decide os sorteios.
+        return bytes(self.cells), self.free[:], self.free_position[:]
+
+    def restore(self, state):
+        # Copia de volta dentro dos mesmos buffers: quem guardou uma referência a grid.cells continua vendo o grid.
+        cells, free, free_position = state
+        self.cells[:] = cells
+        self.free[:] = free
+        self.free_position[:] = free_position
+
+    def cell_x(self, index):
+        return index % self.stride - 1
+
+    def cell_y(self, index):
+        return index // self.stride - 1
+
+    def take_cell(self, index):
+        position = self.free_position[index]
+        last = self.free.pop()
+        if last != index:
+            self.free[position] = last
+            self.free_position[last] = position
+        self.free_position[index] = -1
+
+    def release_cell(self, index):
+        self.free_position[index] = len(self.free)
+        self.free.append(index)
+
+    def sample_free(self, rng=random):
+        # Sorteio uniforme entre as células livres; custa o mesmo com o tabuleiro vazio ou cheio.
+        if not self.free:
+            return None
+        return self.free[rng.randrange(len(self.free))]
+
+    def add_snake(self, index):
+        if self.cells[index] == 0:
+            self.take_cell(index)
+        self.cells[index] += 1
+
+    def remove_snake(self, index):
+        self.cells[index] -= 1
+        if self.cells[index] == 0:
+            self.release_cell(index)
+
+    def add_obstacle(self, index):
+        if self.cells[index] == 0:
+            self.take_cell(index)
+        self.cells[index] |= self.OBSTACLE
+
+    def remove_obstacle(self, index):
+        self.cells[index] &= ~self.OBSTACLE
+        if self.cells[index] == 0:
+            self.release_cell(index)
+
+    def has_snake(self, index):
+        return self.cells[index] & self.SNAKE_MASK != 0
+
+    def is_free(self, index):
+        return self.cells[index] == 0
+
+    def is_collision(self, index):
+        return self.cells[index] > 1
+
+    def collision_cause(self, index):
+        if self.cells[index] & self.BORDER:
+            return HIT_WALL
+        if self.cells[index] & self.OBSTACLE:
+            return HIT_OBSTACLE
+        return HIT_SELF
+
+
+class BODY:
+    """Buffer circular com os índices das células da cobra, da cabeça ao rabo.
+
+    Inserir a cabeça e remover o rabo custam O(1) e nenhum dos dois copia o
+    corpo; o acesso por posição (body[i], body[-1]) também é O(1). O buffer
+    começa pequeno e dobra quando enche, então acompanha o tamanho da cobra e
+    não o do tabuleiro.
+    """
+    __slots__ = ('capacity', 'buffer', 'start', 'length')
+    CAPACITY = 32
+
+    def __init__(self, cells=(), capacity=CAPACITY):
+        self.capacity = capacity
+        self.buffer = array('i', bytes(4 * self.capacity))
+        self.start = 0
+        self.length = 0
+        for cell in cells:
+            self.append(cell)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError('BODY index out of range')
+        return self.buffer[(self.start + i) % self.capacity]
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self.buffer[(self.start + i) % self.capacity]
+
+    def push_head(self, cell):
+        if self.length == self.capacity:
+            self.grow()
+        self.start = (self.start - 1) % self.capacity
+        self.buffer[self.start] = cell
+        self.length += 1
+
+    def append(self, cell):
+        if self.length == self.capacity:
+            self.grow()
+        self.buffer[(self.start + self.length) % self.capacity] = cell
+        self.length += 1
+
+    def pop_tail(self):
+        self.length -= 1
+        return self.buffer[(self.start + self.length) % self.capacity]
+
+    def clear(self):
+        # Esvazia o corpo e mantém o buffer, para o próximo respawn não alocar outro.
+        self.start = 0
+        self.length = 0
+
+    def cells(self):
+        # Cópia só da parte viva do buffer, da cabeça ao rabo.
+        end = self.start + self.length
+        if end <= self.capacity:
+            return self.buffer[self.start:end]
+        return self.buffer[self.start:] + self.buffer[:end - self.capacity]
+
+    def grow(self):
+        # Dobra a capacidade, com o corpo já em ordem a partir do início do buffer.
+        self.buffer = self.cells() + array('i', bytes(4 * (2 * self.capacity - self.length)))
+        self.start = 0
+        self.capacity *= 2
+
+    def snapshot(self):
+        return self.cells()
+
+    def restore(self, cells):
+        length = len(cells)
+        if length > self.capacity:
+            while self.capacity < length:
+                self.capacity *= 2
+            self.buffer = array('i', bytes(4 * self.capacity))
+        self.buffer[:length] = cells
+        self.start = 0
+        self.length = length
+
+
+START_BODY = (cell_index(5, 10), cell_index(4, 10), cell_index(3, 10))
+
+# Obstáculos avulsos de um layout fixo (GAME(obstacles=...), arena), no tabuleiro padrão; tabuleiros
+# maiores recebem a mesma densidade (veja obstacle_count).
+OBSTACLE_COUNT = 5
+# Paredes de cada nível nas partidas com semente, no tabuleiro padrão: (quantidade, comprimento máximo
+# em células). Tabuleiros maiores recebem a mesma densidade.
+LEVEL_WALLS = {1: (5, 1), 2: (8, 3), 3: (12, 4), 4: (16, 5)}
+# Células à frente da cabeça, na posição inicial e na direção em que a cobra anda quando o layout troca
+# no meio da partida, que nenhum layout ocupa.
+START_CLEARANCE = 3
+
+
+def obstacle_count(size=cell_number):
+    return max(OBSTACLE_COUNT, OBSTACLE_COUNT * size * size // (cell_number * cell_number))
+
+
+def layout_keep(grid, head, step=0):
+    # Células que um layout sorteado no meio da partida deixa livres: a cabeça, as vizinhas dela e as
+    # START_CLEARANCE seguintes no sentido `step` (deslocamento no grid; 0 com a cobra parada).
+    stride = grid.stride
+    keep = [head, head - stride, head + 1, head + stride, head - 1]
+    index = head
+    for _ in range(START_CLEARANCE if step else 0):
+        index += step
+        if grid.cells[index] & GRID.BORDER:
+            break
+        keep.append(index)
+    return keep
+
+
+def generate_obstacles(count, rng=random, size=cell_number, exclude=None):
+    # Sorteia `count` obstáculos distintos, fora das células de `exclude` (por padrão, a posição inicial
+    # da cobra).
+    grid = GRID(size)
+    for block in grid.start_body if exclude is None else exclude:
+        grid.add_snake(block)
+    obstacles = []
+    for _ in range(count):
+        index = grid.sample_free(rng)
+        grid.add_obstacle(index)
+        obstacles.append(index)
+    return obstacles
+
+
+class SNAKE:
+    __slots__ = ('grid', 'body', 'direction', 'new_block', 'last_tail')
+
+    def __init__(self, grid=None, cells=None):
+        # Grid de ocupação mantido junto com o corpo (compartilhado com GAME e FRUIT).
+        self.grid = grid if grid is not None else GRID()
+        # O corpo guarda os índices das células no grid, da cabeça ao rabo.
+        self.body = BODY()
+        self.place(self.grid.start_body if cells is None else cells)
+        # Define a direção inicial da cobra (parada).
+        self.direction = STOPPED
+        # Flag para indicar se um novo bloco deve ser adicionado ao corpo da cobra.
+        self.new_block = False
+        # Posição do rabo antes do último movimento (usada na interpolação).
+        self.last_tail = None
+
+    def place(self, cells):
+        # Tira o corpo atual do grid e coloca a cobra nas células dadas (da cabeça ao rabo).
+        self.clear()
+        for block in cells:
+            self.body.append(block)
+            self.grid.add_snake(block)
+
+    def clear(self):
+        for block in self.body:
+            self.grid.remove_snake(block)
+        self.body.clear()
+
+    def move_snake(self):
+        self.move_tail()
+        self.move_head()
+
+    # O movimento é feito em duas metades para que a arena possa tirar todos os rabos
+    # antes de colocar as cabeças (uma cabeça pode entrar na célula que um rabo deixou).
+    def move_tail(self):
+        self.last_tail = self.body[-1]
+        if self.new_block == True:
+            self.new_block = False
+        else:
+            self.grid.remove_snake(self.body.pop_tail())
+
+    def move_head(self):
+        step = self.direction[0] + self.direction[1] * self.grid.stride
+        self.body.push_head(self.body[0] + step)
+        self.grid.add_snake(self.body[0])
+        return self.body[0]
+
+    def head_index(self):
+        return self.body[0]
+
+    def add_block(self):
+        self.new_block = True
+
+    def reset(self):
+        self.place(self.grid.start_body)
+        self.direction = STOPPED
+        self.new_block = False
+        self.last_tail = None
+
+    def snapshot(self):
+        # O grid não entra: é compartilhado, e GAME.snapshot() o guarda uma vez só.
+        return self.body.snapshot(), self.direction, self.new_block, self.last_tail
+
+    def restore(self, state):
+        body, self.direction, self.new_block, self.last_tail = state
+        self.body.restore(body)
+
+
+class FRUIT:
+    __slots__ = ('grid', 'rng', 'index', 'x', 'y', 'is_special')
+
+    def __init__(self, grid, rng=random):
+        self.grid = grid
+        self.rng = rng
+        self.index = None
+        self.randomize()
+        self.is_special = False
+
+    def randomize(self):
+        # GARANTE QUE A FRUTA NÃO APAREÇA NA COBRA (nem num obstáculo): sorteia só entre as células livres
+        index = self.grid.sample_free(self.rng)
+        if index is not None:
+            self.index = index
+            self.x = self.grid.cell_x(index)
+            self.y = self.grid.cell_y(index)
+        self.is_special = False
+
+    def make_special(self):
+        self.is_special = True
+
+    def snapshot(self):
+        return self.index, self.x, self.y, self.is_special
+
+    def restore(self, state):
+        self.index, self.x, self.y, self.is_special = state
+
+
+class OBSTACLES:
+    """Obstáculos do tabuleiro, guardados no próprio grid (bit OBSTACLE).
+
+    A colisão com eles é a mesma consulta O(1) ao grid que vale para a borda
+    e para o corpo; aqui ficam a lista das células (`cells`, para desenhar e
+    transmitir o layout) e a troca de layout entre os níveis. `key` muda
+    junto com o layout e serve de chave para o fundo pré-renderizado.
+    """
+    __slots__ = ('grid', 'cells', 'key', 'level')
+
+    def __init__(self, grid, cells=()):
+        self.grid = grid
+        self.cells = ()
+        self.set_layout(cells)
+
+    def __contains__(self, index):
+        return self.grid.cells[index] & GRID.OBSTACLE != 0
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def set_layout(self, cells, level=None):
+        for index in self.cells:
+            self.grid.remove_obstacle(index)
+        for index in cells:
+            self.grid.add_obstacle(index)
+        self.cells = tuple(cells)
+        self.key = hash(self.cells)
+        # Nível cujo layout sorteado está no tabuleiro, ou None para um layout fixo.
+        self.level = level
+
+    def generate(self, rng, level, keep=()):
+        # Layout do nível: paredes retas sorteadas por coordenada (o resultado só depende de `rng` e do
+        # tamanho do tabuleiro), fora da posição inicial, do corpo da cobra e das células de `keep`.
+        grid = self.grid
+        self.set_layout(())
+        count, length = LEVEL_WALLS.get(level, LEVEL_WALLS[max(LEVEL_WALLS)])
+        count = max(count, count * grid.size * grid.size // (cell_number * cell_number))
+        start = grid.start_body[0]
+        reserved = set(grid.start_body)
+        reserved.update(start + i for i in range(1, START_CLEARANCE + 1))
+        reserved.update(keep)
+        cells = []
+        for _ in range(count):
+            index = grid.cell_index(rng.randrange(grid.size), rng.randrange(grid.size))
+            step = rng.choice((1, grid.stride))
+            for _ in range(rng.randint(1, length)):
+                if index in reserved or not grid.is_free(index):
+                    break
+                grid.add_obstacle(index)
+                cells.append(index)
+                index += step
+        cells.extend(self.fill_pockets([start, *keep]))
+        self.cells = tuple(cells)
+        self.key = hash(self.cells)
+        self.level = level
+
+    def fill_pockets(self, starts):
+        # As células livres que não se alcançam a partir de `starts` viram parede, para a fruta nunca
+        # nascer num bolsão fechado. O corpo da cobra conta como caminho: ele sai do lugar.
+        grid = self.grid
+        cells = grid.cells
+        stride = grid.stride
+        blocked = GRID.BORDER | GRID.OBSTACLE
+        seen = bytearray(len(cells))
+        frontier = [index for index in starts if not cells[index] & blocked]
+        for index in frontier:
+            seen[index] = 1
+        while frontier:
+            following = []
+            for cell in frontier:
+                for neighbour in (cell - stride, cell + 1, cell + stride, cell - 1):
+                    if not seen[neighbour] and not cells[neighbour] & blocked:
+                        seen[neighbour] = 1
+                        following.append(neighbour)
+            frontier = following
+        pockets = [index for index in grid.free if not seen[index]]
+        for index in pockets:
+            grid.add_obstacle(index)
+        return pockets
+
+    def snapshot(self):
+        # As células já estão no snapshot do grid; aqui só a lista e a identificação do layout.
+        return self.cells, self.key, self.level
+
+    def restore(self, state):
+        self.cells, self.key, self.level = state
+
+
+class GAME:
+    """Estado e regras de uma partida.
+
+    `step(action)` aplica uma direção (ou None para manter a atual), avança um
+    tick e devolve a lista de eventos do tick (ATE_FRUIT, LEVEL_COMPLETE,
+    LOST_LIFE, GAME_OVER). Quem usa o núcleo decide quando chamar next_level()
+    depois de LEVEL_COMPLETE e reset_game() depois de GAME_OVER.
+
+    Nas partidas criadas com seeded() cada nível tem o seu layout de
+    obstáculos, sorteado da semente da partida; nas outras os obstáculos dados
+    em `obstacles` valem para todos os níveis.
+
+    `snapshot()` devolve uma cópia do estado da partida (grid, corpo, fruta,
+    placar e gerador de números) e `restore(state)` volta a ela; cada buffer é
+    copiado uma vez (do corpo, só as células ocupadas), sem recriar objetos, para bots de busca em árvore e
+    rollback poderem clonar a partida milhares de vezes por segundo.
+    """
+    __slots__ = ('rng', 'seed', 'obstacles', 'level_layouts', 'level_goals', 'speed_step', 'min_speed', 'grid', 'snake',
+                 'fruit', 'lives', 'score', 'has_moved', 'apples_collected', 'apples_to_win', 'xp', 'level', 'level_up',
+                 'level_complete', 'speed', 'death_cause', 'ticks', 'events')
+    snake_class = SNAKE
+    fruit_class = FRUIT
+    # Campos simples da partida que entram no snapshot (o resto é configuração, que não muda durante a partida).
+    STATE_FIELDS = ('lives', 'score', 'has_moved', 'apples_collected', 'apples_to_win', 'xp', 'level', 'level_up',
+                    'level_complete', 'speed', 'death_cause', 'ticks')
+    state_fields = attrgetter(*STATE_FIELDS)
+
+    def __init__(self, obstacles=(), rng=random, level_goals=LEVEL_GOALS, speed_step=SPEED_STEP, min_speed=MIN_SPEED,
+                 size=cell_number, level_layouts=False):
+        self.rng = rng
+        self.seed = None
+        self.level_layouts = level_layouts
+        self.level_goals = level_goals
+        self.speed_step = speed_step
+        self.min_speed = min_speed
+        # Grid de ocupação compartilhado pela cobra, pela fruta e pelos obstáculos.
+        self.grid = GRID(size)
+        self.obstacles = OBSTACLES(self.grid, obstacles)
+        self.snake = self.snake_class(self.grid)
+        self.fruit = self.fruit_class(self.grid, self.rng)
+        self.lives = 3
+        self.score = 0
+        self.has_moved = False
+        self.apples_collected = 0
+        self.apples_to_win = 5
+        self.xp = 0
+        self.level = 1
+        self.level_up = False
+        self.level_complete = False
+        self.speed = START_SPEED
+        self.death_cause = None
+        # Ticks em que a cobra andou; é a referência de tempo dos replays.
+        self.ticks = 0
+        self.events = []
+        self.define_level_goals()
+        self.increase_speed()
+
+    @classmethod
+    def seeded(cls, seed, **options):
+        # Partida reproduzível: as frutas saem de um gerador criado a partir de `seed` e o layout de
+        # obstáculos de cada nível, de um gerador por nível (veja load_layout()). A semente fica em 64 bits
+        # sem sinal, o que cabe no cabeçalho do replay.
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        seed &= SEED_MASK
+        game = cls(rng=random.Random(seed), level_layouts=True, **options)
+        game.seed = seed
+        game.load_layout()
+        return game
+
+    def load_layout(self):
+        # Troca os obstáculos pelos do nível atual, se a partida tem um layout por nível. O layout sai de
+        # um gerador só dele, então não muda a sequência das frutas; as células em volta da cabeça e as
+        # START_CLEARANCE à frente dela ficam livres, porque a cobra volta a andar assim que o objetivo
+        # some da tela.
+        if not self.level_layouts or self.obstacles.level == self.level:
+            return
+        dx, dy = self.snake.direction
+        step = dx + dy * self.grid.stride
+        keep = layout_keep(self.grid, self.snake.head_index(), step)
+        self.obstacles.generate(random.Random(f"{self.seed}/{self.level}"), self.level, keep)
+        if self.fruit.index in self.obstacles:
+            self.fruit.randomize()
+
+    def snapshot(self, rng=True):
+        # O estado do gerador (624 inteiros) custa mais que todo o resto; com rng=False ele fica de fora e,
+        # depois do restore(), as frutas seguem sorteadas do ponto em que o gerador estiver.
+        return (self.grid.snapshot(), self.snake.snapshot(), self.fruit.snapshot(), self.obstacles.snapshot(),
+                self.state_fields(self), self.rng.getstate() if rng else None)
+
+    def restore(self, state):
+        grid, snake, fruit, obstacles, fields, rng = state
+        self.grid.restore(grid)
+        self.snake.restore(snake)
+        self.fruit.restore(fruit)
+        self.obstacles.restore(obstacles)
+        for name, value in zip(self.STATE_FIELDS, fields):
+            setattr(self, name, value)
+        if rng is not None:
+            self.rng.setstate(rng)
+
+    def define_level_goals(self):
+        self.apples_to_win = self.level_goals.get(self.level, self.apples_to_win)
+
+    def increase_speed(self):
+        self.speed = max(self.min_speed, self.speed - self.speed_step)
+
+    def start_level(self, level):
+        self.level = level
+        self.load_layout()
+        self.define_level_goals()
+        self.increase_speed()
+
+    def next_level(self):
+        self.level += 1
+        if self.level > LEVEL_COUNT:
+            self.level = 1  # Wrap around to level 1 if we exceed the number of levels
+        self.apples_collected = 0
+        self.load_layout()
+        self.fruit = self.fruit_class(self.grid, self.rng)
+        self.define_level_goals()
+        self.increase_speed()  # Aumenta a velocidade da cobra
+        self.level_complete = False
+
+    def change_direction(self, direction):
+        # Qualquer comando tira a cobra da espera; a direção só muda se não for a oposta da atual.
+        if self.game_over() or self.level_complete:
+            return
+        self.has_moved = True
+        if direction is None:
+            return
+        current = self.snake.direction
+        if direction[0] and current[0] == -direction[0] or direction[1] and current[1] == -direction[1]:
+            return
+        self.snake.direction = direction
+
+    def is_advancing(self):
+        # Uma tecla que não é direção tira a cobra da espera, mas ela só anda com uma direção.
+        return (not self.game_over() and self.has_moved and not self.level_complete
+                and self.snake.direction != STOPPED)
+
+    def step(self, action=None):
+        self.events = []
+        if action is not None:
+            self.change_direction(action)
+        self.update()
+        return self.events
+
+    def update(self):
+        if self.is_advancing():
+            self.ticks += 1
+            self.snake.move_snake() # Move a cobra.
+            self.check_collision() # Verifica se houve colisão com a fruta.
+            self.check_fail() # Verifica se a cobra bateu em algo.
+
+    def check_collision(self):
+        if self.fruit.index == self.snake.head_index():
+            self.snake.add_block()
+            self.events.append(ATE_FRUIT)
+            self.score += 1  # Aumenta a pontuação em 1 por maçã
+            self.apples_collected += 1
+
+            # Se o número de maçãs coletadas for maior ou igual ao número de maçãs necessárias para vencer.
+            if self.apples_collected >= self.apples_to_win:
+                self.level_complete = True
+                self.events.append(LEVEL_COMPLETE)
+            else:
+                self.fruit.randomize()
+
+        if self.fruit.index != self.snake.head_index() and self.grid.has_snake(self.fruit.index):
+            self.fruit.randomize()
+
+    def check_fail(self):
+        # Borda, obstáculos e o próprio corpo estão no grid: uma única consulta resolve.
+        if self.grid.is_collision(self.snake.head_index()):
+            self.lose_life(self.grid.collision_cause(self.snake.head_index()))
+
+    def lose_life(self, cause=None):
+        self.lives -= 1
+        self.death_cause = cause
+        self.events.append(LOST_LIFE)
+        if not self.game_over():
+            self.reset_snake()
+        else:
+            self.events.append(GAME_OVER)
+
+    def game_over(self):
+        return self.lives <= 0
+
+    def reset_game(self):
+        self.reset_snake()
+        self.fruit = self.fruit_class(self.grid, self.rng)
+        self.lives = 3
+        self.score = 0
+        self.has_moved = False
+        self.apples_collected = 0
+        self.xp = 0
+        self.level = 1
+        self.level_up = False
+        self.speed = START_SPEED
+        self.death_cause = None
+        self.ticks = 0
+        self.load_layout()
+        self.define_level_goals()
+        self.level_complete = False
+
+    def reset_snake(self):
+        self.snake.reset()
+        self.has_moved = False
@@ -0,0 +1,515 @@
+"""Servidor e cliente da arena em rede.
+
+O servidor (asyncio) roda a única cópia de verdade da arena (snake_arena.ARENA)
+e avança um tick a cada TICK_MS. Cada cliente é uma cobra: manda um byte por
+tecla (o índice da direção em snake_arena.DIRECTIONS) e recebe, a cada tick,
+só o que mudou, nunca o corpo inteiro das cobras:
+
+    quadro:     tamanho (4 bytes) + tipo (1 byte) + conteúdo
+    WELCOME:    número da cobra do cliente, TICK_MS, tamanho do tabuleiro, tick,
+                obstáculos e o estado completo (cobras e frutas); só na entrada
+    TICK:       tick, entradas e saídas de jogadores, um byte por cobra viva
+                (direção em que a cabeça andou + se o rabo ficou, isto é, se a
+                cobra cresceu), os eventos do tick (fruta comida, kill, morte e
+                nascimento, que traz o corpo novo) e as frutas que apareceram
+                ou sumiram
+
+Os números vão em varint (snake_codec, os mesmos dos replays). O cliente aplica os
+quadros numa cópia local da arena (apply_tick), que fica igual à do servidor.
+Clientes lentos demais (mais de MAX_BUFFER bytes esperando envio) são
+desconectados, para que nenhum segure o tick dos outros.
+
+    python snake_net.py serve --bots 50
+    python snake.py --connect localhost:7777
+    python snake_net.py swarm --clients 300 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import struct
+import time
+
+import snake_arena
+import snake_core
+from snake_codec import DecodeError, read_varint, write_varint
+
+PORT = 7777
+TICK_MS = 100
+# Bytes que podem ficar esperando envio para um cliente antes de ele ser desconectado.
+MAX_BUFFER = 256 * 1024
+
+LENGTH = struct.Struct('<I')
+
+# Tipos de quadro.
+WELCOME = 1
+TICK = 2
+
+# Entradas e saídas de jogadores no quadro TICK.
+JOINED = 0
+JOINED_BOT = 1
+LEFT = 2
+
+# Eventos no quadro TICK (os de snake_arena, em um byte).
+EVENT_CODES = (snake_core.ATE_FRUIT, snake_arena.KILL, snake_arena.DIED, snake_arena.RESPAWNED)
+
+# Flags de cada cobra no WELCOME.
+ALIVE = 1
+BOT = 2
+GONE = 4
+
+GREW = 4
+
+
+class ProtocolError(DecodeError):
+    pass
+
+
+def direction_steps(stride):
+    # Deslocamento no grid de cada direção, na ordem de snake_arena.DIRECTIONS.
+    return [dx + dy * stride for dx, dy in snake_arena.DIRECTIONS]
+
+
+def write_body(out, body, stride):
+    # A cabeça vai inteira; cada segmento seguinte é só a direção (um byte) a partir do anterior.
+    steps = direction_steps(stride)
+    write_varint(out, len(body))
+    previous = None
+    for block in body:
+        if previous is None:
+            write_varint(out, block)
+        else:
+            out.append(steps.index(block - previous))
+        previous = block
+
+
+def read_body(data, offset, stride):
+    steps = direction_steps(stride)
+    length, offset = read_varint(data, offset)
+    if length == 0:
+        return [], offset
+    head, offset = read_varint(data, offset)
+    cells = [head]
+    for code in data[offset:offset + length - 1]:
+        cells.append(cells[-1] + steps[code])
+    return cells, offset + length - 1
+
+
+def frame(payload):
+    return LENGTH.pack(len(payload)) + payload
+
+
+def split_frames(buffer):
+    # Tira do começo de `buffer` (bytearray) os quadros completos.
+    frames = []
+    while len(buffer) >= LENGTH.size:
+        size, = LENGTH.unpack_from(buffer)
+        if len(buffer) < LENGTH.size + size:
+            break
+        frames.append(bytes(buffer[LENGTH.size:LENGTH.size + size]))
+        del buffer[:LENGTH.size + size]
+    return frames
+
+
+def encode_welcome(arena, number, tick_ms=TICK_MS):
+    out = bytearray([WELCOME])
+    for value in (number, tick_ms, arena.grid.size, arena.ticks, len(arena.obstacles), *arena.obstacles):
+        write_varint(out, value)
+    write_varint(out, len(arena.competitors))
+    for competitor in arena.competitors:
+        out.append(ALIVE * competitor.alive | BOT * competitor.bot | GONE * competitor.left)
+        for value in (competitor.score, competitor.kills, competitor.deaths):
+            write_varint(out, value)
+        if competitor.alive:
+            write_body(out, competitor.snake.body, arena.grid.stride)
+    write_varint(out, len(arena.fruits))
+    for fruit in sorted(arena.fruits):
+        write_varint(out, fruit)
+    return bytes(out)
+
+
+def read_header(payload):
+    # (número da cobra, TICK_MS, tamanho do tabuleiro) de um WELCOME, sem montar a arena.
+    if not payload or payload[0] != WELCOME:
+        raise ProtocolError("esperava WELCOME")
+    values = []
+    offset = 1
+    for _ in range(3):
+        value, offset = read_varint(payload, offset)
+        values.append(value)
+    return tuple(values)
+
+
+def read_welcome(payload, arena_class=snake_arena.ARENA):
+    """Monta a cópia local da arena a partir de um WELCOME; devolve (arena, número, tick_ms)."""
+    number, tick_ms, size = read_header(payload)
+    offset = 1
+    for _ in range(3):
+        _, offset = read_varint(payload, offset)
+    ticks, offset = read_varint(payload, offset)
+    count, offset = read_varint(payload, offset)
+    obstacles = []
+    for _ in range(count):
+        index, offset = read_varint(payload, offset)
+        obstacles.append(index)
+    arena = arena_class(players=0, bots=0, size=size, obstacles=obstacles, fruit_count=0)
+    arena.ticks = ticks
+    count, offset = read_varint(payload, offset)
+    for _ in range(count):
+        flags = payload[offset]
+        offset += 1
+        competitor = arena.add_competitor(bool(flags & BOT))
+        competitor.left = bool(flags & GONE)
+        competitor.score, offset = read_varint(payload, offset)
+        competitor.kills, offset = read_varint(payload, offset)
+        competitor.deaths, offset = read_varint(payload, offset)
+        if flags & ALIVE:
+            cells, offset = read_body(payload, offset, arena.grid.stride)
+            place(arena, competitor, cells)
+    count, offset = read_varint(payload, offset)
+    for _ in range(count):
+        index, offset = read_varint(payload, offset)
+        arena.fruits.add(index)
+        arena.fruit_buckets.setdefault(arena.fruit_bucket(index), set()).add(index)
+    return arena, number, tick_ms
+
+
+def place(arena, competitor, cells):
+    competitor.snake.place(cells)
+    for block in cells:
+        arena.owner[block] = competitor.number
+    competitor.snake.last_tail = None
+    competitor.alive = True
+
+
+def encode_tick(arena, roster, moving):
+    """Quadro TICK do tick que acabou de rodar.
+
+    `roster` são as entradas e saídas (código, número) desde o tick anterior e
+    `moving` as (cobra, crescendo) vivas antes do tick, na ordem dos números.
+    """
+    out = bytearray([TICK])
+    write_varint(out, arena.ticks)
+    write_varint(out, len(roster))
+    for code, number in roster:
+        out.append(code)
+        write_varint(out, number)
+    write_varint(out, len(moving))
+    for competitor, grew in moving:
+        out.append(snake_arena.DIRECTIONS.index(competitor.snake.direction) | GREW * grew)
+    write_varint(out, len(arena.events))
+    for event, number in arena.events:
+        out.append(EVENT_CODES.index(event))
+        write_varint(out, number)
+        if event == snake_arena.RESPAWNED:
+            write_body(out, arena.competitors[number].snake.body, arena.grid.stride)
+    write_varint(out, len(arena.fruit_changes))
+    for index, added in arena.fruit_changes:
+        write_varint(out, index << 1 | added)
+    return bytes(out)
+
+
+def apply_tick(arena, payload):
+    """Aplica um quadro TICK na cópia local da arena, na mesma ordem em que o servidor rodou o tick."""
+    if not payload or payload[0] != TICK:
+        raise ProtocolError("esperava TICK")
+    grid = arena.grid
+    owner = arena.owner
+    arena.events = []
+    arena.fruit_changes = []
+    arena.ticks, offset = read_varint(payload, 1)
+
+    count, offset = read_varint(payload, offset)
+    for _ in range(count):
+        code = payload[offset]
+        number, offset = read_varint(payload, offset + 1)
+        if code == LEFT:
+            arena.leave(number)
+            continue
+        while len(arena.competitors) <= number:
+            arena.add_competitor()
+        competitor = arena.competitors[number]
+        arena.competitors[number] = arena.new_competitor(number, competitor.snake, code == JOINED_BOT)
+
+    moving = [competitor for competitor in arena.competitors if competitor.alive]
+    count, offset = read_varint(payload, offset)
+    if count != len(moving):
+        raise ProtocolError(f"tick {arena.ticks}: {count} cobras andaram no servidor e {len(moving)} aqui")
+    moves = payload[offset:offset + count]
+    offset += count
+
+    # Os eventos vêm depois dos movimentos no quadro, mas o servidor faz os nascimentos antes de mover as
+    # cobras: o corpo novo já ocupa as células (e é o dono delas) quando as cabeças entram.
+    events = []
+    count, offset = read_varint(payload, offset)
+    for _ in range(count):
+        event = EVENT_CODES[payload[offset]]
+        number, offset = read_varint(payload, offset + 1)
+        if event == snake_arena.RESPAWNED:
+            cells, offset = read_body(payload, offset, grid.stride)
+            place(arena, arena.competitors[number], cells)
+        events.append((event, number))
+
+    # Como no servidor: todos os rabos saem antes de qualquer cabeça entrar.
+    for competitor, move in zip(moving, moves):
+        snake = competitor.snake
+        snake.direction = snake_arena.DIRECTIONS[move & 3]
+        snake.new_block = bool(move & GREW)
+        if not snake.new_block:
+            owner[snake.body[-1]] = -1
+        snake.move_tail()
+    for competitor in moving:
+        head = competitor.snake.move_head()
+        # Numa colisão a célula continua com o dono de antes; a morte vem nos eventos.
+        if not grid.is_collision(head):
+            owner[head] = competitor.number
+
+    for event, number in events:
+        competitor = arena.competitors[number]
+        if event == snake_arena.DIED:
+            arena.kill(competitor, None)
+        elif event == snake_arena.KILL:
+            competitor.kills += 1
+            arena.events.append((event, number))
+        else:
+            if event == snake_core.ATE_FRUIT:
+                competitor.score += 1
+            arena.events.append((event, number))
+
+    count, offset = read_varint(payload, offset)
+    for _ in range(count):
+        value, offset = read_varint(payload, offset)
+        index = value >> 1
+        if value & 1:
+            arena.fruits.add(index)
+            arena.fruit_buckets.setdefault(arena.fruit_bucket(index), set()).add(index)
+        else:
+            arena.remove_fruit(index)
+    arena.fruit_changes = []
+
+
+class SERVER:
+    """Arena autoritativa: aceita conexões, junta os comandos e transmite os deltas de cada tick."""
+
+    def __init__(self, arena, tick_ms=TICK_MS, max_buffer=MAX_BUFFER):
+        self.arena = arena
+        self.tick_ms = tick_ms
+        self.max_buffer = max_buffer
+        # Conexões abertas, por número da cobra.
+        self.writers = {}
+        self.actions = {}
+        self.roster = []
+        self.tick_seconds = 0.0
+        self.sent_bytes = 0
+
+    async def handle(self, reader, writer):
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        competitor = self.arena.join()
+        number = competitor.number
+        self.roster.append((JOINED, number))
+        writer.write(frame(encode_welcome(self.arena, number, self.tick_ms)))
+        self.writers[number] = writer
+        try:
+            while True:
+                data = await reader.read(64)
+                if not data:
+                    break
+                code = data[-1]  # Só a última tecla do pacote importa neste tick
+                if code < len(snake_arena.DIRECTIONS):
+                    self.actions[number] = snake_arena.DIRECTIONS[code]
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(number)
+
+    def disconnect(self, number):
+        writer = self.writers.pop(number, None)
+        if writer is None:
+            return
+        writer.close()
+        self.actions.pop(number, None)
+        self.arena.leave(number)
+        self.roster.append((LEFT, number))
+
+    def tick(self):
+        started = time.perf_counter()
+        arena = self.arena
+        moving = [(competitor, competitor.snake.new_block) for competitor in arena.competitors if competitor.alive]
+        arena.step(self.actions)
+        self.actions = {}
+        data = frame(encode_tick(arena, self.roster, moving))
+        self.roster = []
+        for number, writer in list(self.writers.items()):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                writer.transport.abort()
+                self.disconnect(number)
+            else:
+                writer.write(data)
+                self.sent_bytes += len(data)
+        self.tick_seconds += time.perf_counter() - started
+
+    async def run(self, host='0.0.0.0', port=PORT, stats=False):
+        server = await asyncio.start_server(self.handle, host, port)
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        last_stats = loop.time()
+        ticks = 0
+        async with server:
+            while True:
+                next_tick += self.tick_ms / 1000
+                self.tick()
+                ticks += 1
+                if stats and loop.time() - last_stats >= 1:
+                    print(json.dumps({
+                        'tick': self.arena.ticks,
+                        'sessions': len(self.writers),
+                        'tick_ms': round(self.tick_seconds / ticks * 1000, 3),
+                        'sent_kb_s': round(self.sent_bytes / 1024 / (loop.time() - last_stats), 1),
+                    }), flush=True)
+                    last_stats = loop.time()
+                    ticks = 0
+                    self.tick_seconds = 0.0
+                    self.sent_bytes = 0
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+
+class CLIENT:
+    """Lado do cliente, sem asyncio: o loop do pygame chama poll() a cada quadro.
+
+    A conexão e o WELCOME são lidos no construtor (bloqueando); `size` já está
+    disponível para abrir a janela antes de montar a arena com start().
+    """
+
+    def __init__(self, host, port=PORT):
+        self.socket = socket.create_connection((host, port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.buffer = bytearray()
+        self.closed = False
+        frames = []
+        while not frames:
+            data = self.socket.recv(65536)
+            if not data:
+                raise ProtocolError("servidor fechou a conexão")
+            self.buffer += data
+            frames = split_frames(self.buffer)
+        self.welcome = frames[0]
+        self.pending = frames[1:]
+        self.number, self.tick_ms, self.size = read_header(self.welcome)
+        self.arena = None
+        self.events = []
+
+    def start(self, arena_class=snake_arena.ARENA):
+        self.arena, _, _ = read_welcome(self.welcome, arena_class)
+        self.socket.setblocking(False)
+        return self.arena
+
+    def poll(self):
+        # Aplica os quadros que chegaram e devolve quantos ticks foram aplicados.
+        frames = self.pending
+        self.pending = []
+        while not self.closed:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                break
+            except ConnectionError:
+                data = b''
+            if not data:
+                self.closed = True
+                break
+            self.buffer += data
+        frames += split_frames(self.buffer)
+        # Eventos de todos os ticks aplicados agora (arena.events só guarda os do último).
+        self.events = []
+        for payload in frames:
+            apply_tick(self.arena, payload)
+            self.events.extend(self.arena.events)
+        return len(frames)
+
+    def send_direction(self, direction):
+        if direction is None or self.closed:
+            return
+        try:
+            self.socket.send(bytes([snake_arena.DIRECTIONS.index(direction)]))
+        except (BlockingIOError, ConnectionError):
+            pass
+
+    def close(self):
+        self.socket.close()
+        self.closed = True
+
+
+async def swarm_client(host, port, seconds, mirror, totals):
+    # Um cliente sem janela: troca de direção de vez em quando e conta o que recebe.
+    reader, writer = await asyncio.open_connection(host, port)
+    buffer = bytearray()
+    arena = None
+    rng = random.Random()
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            try:
+                data = await asyncio.wait_for(reader.read(65536), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                totals['dropped'] += 1
+                return
+            totals['bytes'] += len(data)
+            buffer += data
+            for payload in split_frames(buffer):
+                if payload[0] == WELCOME:
+                    if mirror:
+                        arena, _, _ = read_welcome(payload)
+                    continue
+                totals['ticks'] += 1
+                if arena is not None:
+                    apply_tick(arena, payload)
+                if rng.random() < 0.1:
+                    writer.write(bytes([rng.randrange(len(snake_arena.DIRECTIONS))]))
+    finally:
+        writer.close()
+
+
+async def swarm(host, port, clients, seconds, mirrors):
+    totals = {'clients': clients, 'ticks': 0, 'bytes': 0, 'dropped': 0}
+    started = time.monotonic()
+    await asyncio.gather(*(swarm_client(host, port, seconds, i < mirrors, totals) for i in range(clients)))
+    elapsed = time.monotonic() - started
+    totals['ticks_per_client_s'] = round(totals['ticks'] / clients / elapsed, 2) if clients else 0
+    totals['kb_per_client_s'] = round(totals['bytes'] / 1024 / clients / elapsed, 2) if clients else 0
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arena do Jogo da Cobra em rede")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="roda o servidor")
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=PORT)
+    serve.add_argument('--bots', type=int, default=20)
+    serve.add_argument('--size', type=int, default=snake_arena.ARENA_SIZE)
+    serve.add_argument('--seed', type=int)
+    serve.add_argument('--tick-ms', type=int, default=TICK_MS)
+    serve.add_argument('--stats', action='store_true', help="imprime uma linha JSON por segundo")
+    load = commands.add_parser('swarm', help="conecta muitos clientes sem janela, para teste de carga")
+    load.add_argument('--host', default='127.0.0.1')
+    load.add_argument('--port', type=int, default=PORT)
+    load.add_argument('--clients', type=int, default=100)
+    load.add_argument('--seconds', type=float, default=10)
+    load.add_argument('--mirrors', type=int, default=1, help="quantos clientes mantêm a cópia local da arena")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        arena = snake_arena.ARENA.seeded(args.seed, players=0, bots=args.bots, size=args.size)
+        try:
+            asyncio.run(SERVER(arena, args.tick_ms).run(args.host, args.port, args.stats))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(asyncio.run(swarm(args.host, args.port, args.clients, args.seconds, args.mirrors))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""Gravação e reprodução de partidas.
+
+Uma partida é reproduzível a partir da semente do gerador, do nível escolhido
+no menu e dos comandos do jogador, cada um marcado com o tick (GAME.ticks) em
+que aconteceu. O arquivo é binário e pequeno:
+
+    cabeçalho:  b'SNKR', versão (1 byte), semente (8 bytes), nível inicial (1 byte),
+                tamanho do tabuleiro (2 bytes)
+    registros:  ticks desde o registro anterior (varint) + código (1 byte)
+
+Códigos: 0-3 são as direções de DIRECTIONS, KEY é uma tecla que não muda a
+direção (só tira a cobra da espera), LEVEL + n é o nível n escolhido no menu
+entre as fases e END fecha o arquivo, seguido da pontuação (varint).
+
+A reprodução sem janela roda só o núcleo, em milhares de ticks por segundo, e
+serve para conferir a pontuação de uma partida gravada:
+
+    python snake_replay.py replays/*.snkr
+"""
+import argparse
+import json
+import struct
+import time
+
+import snake_core
+from snake_codec import DecodeError, read_varint, write_varint
+
+MAGIC = b'SNKR'
+VERSION = 1
+HEADER = struct.Struct('<4sBQB')
+BOARD = struct.Struct('<H')
+
+DIRECTIONS = (snake_core.UP, snake_core.RIGHT, snake_core.DOWN, snake_core.LEFT)
+KEY = 4
+LEVEL = 0x10
+END = 0xFF
+
+
+class ReplayError(DecodeError):
+    pass
+
+
+class REPLAY:
+    """Semente, nível inicial e a lista de (tick, código) de uma partida."""
+
+    def __init__(self, seed, level=1, size=snake_core.cell_number):
+        self.seed = seed & snake_core.SEED_MASK
+        self.level = level
+        self.size = size
+        self.records = []
+        self.ticks = 0
+        self.score = 0
+
+    def direction(self, tick, direction):
+        self.records.append((tick, KEY if direction is None else DIRECTIONS.index(direction)))
+
+    def select_level(self, tick, level):
+        self.records.append((tick, LEVEL + level))
+
+    def finish(self, ticks, score):
+        self.ticks = ticks
+        self.score = score
+
+    def new_game(self, game_class=snake_core.GAME):
+        # Partida com a semente e o tabuleiro em que o replay foi gravado.
+        game = game_class.seeded(self.seed, size=self.size)
+        game.start_level(self.level)
+        return game
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.level) + BOARD.pack(self.size))
+        last = 0
+        for tick, code in self.records:
+            write_varint(out, tick - last)
+            out.append(code)
+            last = tick
+        write_varint(out, self.ticks - last)
+        out.append(END)
+        write_varint(out, self.score)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("replay truncado")
+        magic, version, seed, level = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError("arquivo não é um replay do Jogo da Cobra")
+        replay = cls(seed, level)
+        offset = HEADER.size
+        if len(data) < offset + BOARD.size:
+            raise ReplayError("replay truncado")
+        replay.size, = BOARD.unpack_from(data, offset)
+        offset += BOARD.size
+        tick = 0
+        while True:
+            delta, offset = read_varint(data, offset)
+            if offset >= len(data):
+                raise ReplayError("replay truncado")
+            tick += delta
+            code = data[offset]
+            offset += 1
+            if code == END:
+                score, offset = read_varint(data, offset)
+                replay.finish(tick, score)
+                return replay
+            replay.records.append((tick, code))
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+
+class PLAYER:
+    """Entrega os comandos gravados à partida, no tick em que aconteceram.
+
+    `feed(game)` aplica as mudanças de direção do tick atual e para antes de uma
+    escolha de nível; `take_level(game)` devolve essa escolha quando a partida
+    está esperando por ela (depois de LEVEL_COMPLETE), ou None.
+    """
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.position = 0
+
+    def pending(self, game):
+        records = self.replay.records
+        if self.position < len(records) and records[self.position][0] == game.ticks:
+            return records[self.position][1]
+        return None
+
+    def feed(self, game):
+        code = self.pending(game)
+        while code is not None and code < LEVEL:
+            game.change_direction(None if code == KEY else DIRECTIONS[code])
+            self.position += 1
+            code = self.pending(game)
+
+    def take_level(self, game):
+        code = self.pending(game)
+        if code is None or code < LEVEL or not game.level_complete:
+            return None
+        self.position += 1
+        return code - LEVEL
+
+    def finished(self, game):
+        return self.position == len(self.replay.records) and game.ticks >= self.replay.ticks
+
+
+def play(replay, game=None):
+    """Reproduz o replay no núcleo, o mais rápido possível, e devolve a partida no estado final."""
+    if game is None:
+        game = replay.new_game()
+    player = PLAYER(replay)
+    while not game.game_over():
+        player.feed(game)
+        level = player.take_level(game)
+        if level is not None:
+            game.next_level()
+            game.start_level(level)
+            continue
+        if player.finished(game):
+            break
+        ticks = game.ticks
+        game.step()
+        if game.ticks == ticks:
+            # A partida não andou (cobra parada, ou esperando um comando que o replay não tem).
+            raise ReplayError(f"replay divergiu no tick {game.ticks}")
+    return game
+
+
+def verify(replay):
+    game = play(replay)
+    return game.ticks == replay.ticks and game.score == replay.score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduz replays do Jogo da Cobra sem janela e confere a pontuação")
+    parser.add_argument('paths', nargs='+')
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        replay = REPLAY.load(path)
+        started = time.perf_counter()
+        try:
+            game = play(replay)
+        except DecodeError as error:
+            print(json.dumps({'replay': path, 'seed': replay.seed, 'verified': False, 'error': str(error)}))
+            continue
+        elapsed = time.perf_counter() - started
+        print(json.dumps({
+            'replay': path,
+            'seed': replay.seed,
+            'score': game.score,
+            'level': game.level,
+            'ticks': game.ticks,
+            'verified': game.ticks == replay.ticks and game.score == replay.score,
+            'ticks_per_s': round(game.ticks / elapsed) if elapsed else None,
+        }))
+
+
+if __name__ == '__main__':
+    main()
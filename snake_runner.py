@@ -0,0 +1,189 @@
+"""Roda muitas partidas do núcleo em paralelo, em todos os núcleos da máquina.
+
+As partidas são divididas em lotes entre os processos de um ProcessPoolExecutor.
+Cada partida tem a sua semente, um hash da semente base e do número da partida,
+então o resultado não depende de quantos processos foram usados. Os resultados
+não voltam como objetos serializados: cada processo escreve as linhas das suas
+partidas direto num buffer de memória compartilhada, e o processo principal
+agrega tudo no final.
+
+Uso:
+    python snake_runner.py --games 100000 --goals 10,15,20,25 --goals 5,10,15,20 --speed-step 10 --speed-step 20
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import snake_autopilot
+import snake_core
+
+# Colunas do buffer de resultados (uma linha de inteiros de 64 bits por partida). LEVEL é o maior nível
+# alcançado: depois do nível 4 a partida volta ao 1, e o nível em que ela acabou não diz até onde chegou.
+SCORE, LEVEL, TICKS, TIME_MS, DEATH_CAUSE = range(5)
+COLUMNS = 5
+
+# Códigos das causas de morte no buffer (0 = a partida atingiu o limite de ticks).
+TIMEOUT = 'timeout'
+DEATH_CAUSES = (TIMEOUT, snake_core.HIT_WALL, snake_core.HIT_OBSTACLE, snake_core.HIT_SELF)
+
+MAX_TICKS = 20_000
+
+
+def greedy_policy(game):
+    # Vai na direção da fruta, evitando as células que matariam a cobra no próximo tick. Não olha além
+    # disso: atrás de um obstáculo ela anda em círculos, por isso o padrão é o piloto automático.
+    head = game.snake.head_index()
+    grid = game.grid
+    x, y = grid.cell_x(head), grid.cell_y(head)
+    choices = []
+    tail = game.snake.body[-1]
+    for direction in (snake_core.UP, snake_core.RIGHT, snake_core.DOWN, snake_core.LEFT):
+        if direction[0] + game.snake.direction[0] == 0 and direction[1] + game.snake.direction[1] == 0:
+            continue  # Voltar para trás é ignorado pelo jogo
+        target = head + direction[0] + direction[1] * grid.stride
+        distance = abs(x + direction[0] - game.fruit.x) + abs(y + direction[1] - game.fruit.y)
+        # O rabo sai da célula neste tick (se a cobra não estiver crescendo), então ela não conta como ocupada.
+        blocked = not grid.is_free(target) and not (target == tail and not game.snake.new_block)
+        choices.append((blocked, distance, direction))
+    return min(choices)[2]
+
+
+def game_seed(seed, game_number):
+    # Hash de (semente base, partida): sementes base diferentes não repetem as sementes umas das outras.
+    digest = hashlib.blake2b(f"{seed}/{game_number}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') >> 1
+
+
+def play_game(seed, config, max_ticks=MAX_TICKS):
+    # A mesma partida do jogo: GAME.seeded() sorteia o layout de obstáculos de cada nível.
+    game = snake_core.GAME.seeded(
+        seed,
+        level_goals=config.get('level_goals', snake_core.LEVEL_GOALS),
+        speed_step=config.get('speed_step', snake_core.SPEED_STEP),
+        min_speed=config.get('min_speed', snake_core.MIN_SPEED),
+    )
+    game.start_level(config.get('level', 1))
+    autopilot = snake_autopilot.AUTOPILOT(game) if config.get('policy', 'autopilot') == 'autopilot' else None
+    ticks = 0
+    time_ms = 0
+    best_level = game.level
+    cause = TIMEOUT
+    while ticks < max_ticks:
+        if autopilot is not None:
+            autopilot.drive()
+            events = game.step()
+        else:
+            events = game.step(greedy_policy(game))
+        ticks += 1
+        time_ms += game.speed
+        if snake_core.GAME_OVER in events:
+            cause = game.death_cause
+            break
+        if snake_core.LEVEL_COMPLETE in events:
+            # Como no jogo: next_level() e depois o menu, que chama start_level() com o nível seguinte
+            # (a velocidade aumenta nos dois).
+            game.next_level()
+            game.start_level(game.level)
+            best_level = max(best_level, game.level)
+    return game.score, best_level, ticks, time_ms, DEATH_CAUSES.index(cause)
+
+
+def run_shard(shm_name, first, last, seed, config, max_ticks):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        results = shm.buf.cast('q')
+        for game_number in range(first, last):
+            row = game_number * COLUMNS
+            results[row:row + COLUMNS] = array('q', play_game(game_seed(seed, game_number), config, max_ticks))
+        results.release()
+    finally:
+        shm.close()
+    return last - first
+
+
+def run(games, config=None, seed=0, workers=None, shard_size=256, max_ticks=MAX_TICKS):
+    """Roda `games` partidas com a configuração dada e devolve um resumo agregado."""
+    config = config or {}
+    if games <= 0:
+        return summarize([], 0)
+    workers = workers or os.cpu_count()
+    shm = shared_memory.SharedMemory(create=True, size=games * COLUMNS * 8)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = [
+                pool.submit(run_shard, shm.name, first, min(first + shard_size, games), seed, config, max_ticks)
+                for first in range(0, games, shard_size)
+            ]
+            for shard in shards:
+                shard.result()
+        results = shm.buf.cast('q')
+        summary = summarize(results, games)
+        results.release()
+    finally:
+        shm.close()
+        shm.unlink()
+    return summary
+
+
+def summarize(results, games):
+    scores = results[SCORE::COLUMNS]
+    levels = results[LEVEL::COLUMNS]
+    ticks = results[TICKS::COLUMNS]
+    time_ms = results[TIME_MS::COLUMNS]
+    causes = results[DEATH_CAUSE::COLUMNS]
+    level_counts = {}
+    for level in levels:
+        level_counts[level] = level_counts.get(level, 0) + 1
+    cause_counts = dict.fromkeys(DEATH_CAUSES, 0)
+    for cause in causes:
+        cause_counts[DEATH_CAUSES[cause]] += 1
+    return {
+        'games': games,
+        'mean_score': sum(scores) / games if games else 0,
+        'max_score': max(scores, default=0),
+        'mean_ticks': sum(ticks) / games if games else 0,
+        'mean_time_s': sum(time_ms) / games / 1000 if games else 0,
+        'levels': dict(sorted(level_counts.items())),
+        'death_causes': cause_counts,
+    }
+
+
+def parse_goals(text):
+    return {level: int(goal) for level, goal in enumerate(text.split(','), start=1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roda partidas do Jogo da Cobra em paralelo")
+    parser.add_argument('--games', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="número de processos (padrão: todos os núcleos)")
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    parser.add_argument('--goals', action='append', type=parse_goals, help="maçãs por nível, ex.: 10,15,20,25 (pode repetir)")
+    parser.add_argument('--speed-step', action='append', type=int, help="redução do intervalo por nível em ms (pode repetir)")
+    parser.add_argument('--policy', choices=('autopilot', 'greedy'), default='autopilot',
+                        help="quem joga: o piloto automático ou a política gulosa (que, sem evitar becos, fica presa "
+                             "em voltas até o limite de ticks na maioria das partidas com obstáculos)")
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error("--games precisa ser pelo menos 1")
+
+    # Cada combinação de metas e curva de velocidade é uma configuração da varredura.
+    goals_options = args.goals or [snake_core.LEVEL_GOALS]
+    speed_options = args.speed_step or [snake_core.SPEED_STEP]
+    for level_goals, speed_step in itertools.product(goals_options, speed_options):
+        config = {'level_goals': level_goals, 'speed_step': speed_step, 'policy': args.policy}
+        started = time.perf_counter()
+        summary = run(args.games, config, args.seed, args.workers, max_ticks=args.max_ticks)
+        summary['config'] = config
+        summary['elapsed_s'] = round(time.perf_counter() - started, 3)
+        print(json.dumps(summary))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Estatísticas das partidas jogadas, guardadas num banco SQLite local.
+
+Cada partida que termina vira uma linha de `sessions`: pontuação, XP, nível
+alcançado, maçãs comidas em cada nível (JSON), causa da última morte e ticks
+jogados. O jogo só coloca a linha numa fila (record() não toca no disco); uma
+thread escreve as linhas em lotes, numa transação por lote, então o loop de
+renderização nunca espera pelo disco. O ranking usa o índice por pontuação e
+responde em milissegundos mesmo com milhões de linhas:
+
+    python snake_stats.py --top 10
+    python snake_stats.py --db outro.db --summary
+"""
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+STATS_DB = 'stats.db'
+# A thread grava quando junta BATCH_ROWS linhas ou quando a primeira linha do lote espera FLUSH_SECONDS.
+BATCH_ROWS = 256
+FLUSH_SECONDS = 1.0
+# Quanto leaders() espera a thread criar as tabelas, logo depois de abrir o banco.
+READY_TIMEOUT = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    seed INTEGER,
+    board INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    apples TEXT NOT NULL,
+    death_cause TEXT,
+    ticks INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_score ON sessions (score DESC, finished_at);
+"""
+COLUMNS = ('finished_at', 'seed', 'board', 'score', 'xp', 'level', 'apples', 'death_cause', 'ticks')
+INSERT = f"INSERT INTO sessions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def session_row(game, level_apples, finished_at=None):
+    # Linha de `sessions` para uma partida do núcleo (snake_core.GAME) e as maçãs comidas em cada nível.
+    return (
+        time.time() if finished_at is None else finished_at,
+        game.seed,
+        game.grid.size,
+        game.score,
+        game.xp,
+        game.level,
+        json.dumps({str(level): count for level, count in sorted(level_apples.items())}),
+        game.death_cause,
+        game.ticks,
+    )
+
+
+class STATS:
+    """Banco de estatísticas com escrita em segundo plano.
+
+    `record(row)` só enfileira; `close()` grava o que faltar e espera a
+    thread terminar. As consultas abrem a sua própria conexão, na thread de
+    quem chama. Um lote que o SQLite recusa (disco cheio, banco travado) é
+    descartado e contado em `dropped`, e o último erro fica em `error`; a
+    thread segue com os lotes seguintes.
+    """
+
+    def __init__(self, path=STATS_DB):
+        self.path = path
+        self.queue = queue.Queue()
+        self.ready = threading.Event()
+        self.error = None
+        self.disabled = False
+        self.dropped = 0
+        self.writer = threading.Thread(target=self.write_batches, name='stats-writer', daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        # WAL: as leituras não esperam a thread de escrita, e cada lote custa um fsync a menos.
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def record(self, row):
+        self.queue.put(row)
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+
+    def write_batches(self):
+        try:
+            connection = self.connect()
+            connection.executescript(SCHEMA)
+        except sqlite3.Error as error:
+            # Sem banco o jogo continua; as linhas são descartadas.
+            self.error = error
+            self.disabled = True
+            print(f"Estatísticas desativadas: {error}")
+            self.ready.set()
+            while self.queue.get() is not None:
+                pass
+            return
+        self.ready.set()
+        running = True
+        while running:
+            rows = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_SECONDS
+            while rows[-1] is not None and len(rows) < BATCH_ROWS:
+                try:
+                    rows.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if rows[-1] is None:
+                running = False
+                rows.pop()
+            if rows:
+                try:
+                    with connection:
+                        connection.executemany(INSERT, rows)
+                except sqlite3.Error as error:
+                    self.error = error
+                    self.dropped += len(rows)
+                    print(f"Estatísticas: {len(rows)} partidas descartadas: {error}")
+        connection.close()
+
+    def query(self, sql, parameters=()):
+        self.ready.wait(READY_TIMEOUT)
+        if self.disabled:
+            return []
+        connection = self.connect()
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def leaders(self, count=10):
+        # As `count` melhores partidas, da maior pontuação para a menor (a mais antiga primeiro no empate).
+        rows = self.query(
+            f"SELECT {', '.join(COLUMNS)} FROM sessions ORDER BY score DESC, finished_at LIMIT ?", (count,))
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def summary(self):
+        # Totais para o operador; percorre a tabela inteira.
+        count, mean_score, best, ticks = self.query(
+            "SELECT COUNT(*), AVG(score), MAX(score), SUM(ticks) FROM sessions")[0]
+        causes = self.query("SELECT death_cause, COUNT(*) FROM sessions GROUP BY death_cause")
+        return {
+            'sessions': count,
+            'mean_score': round(mean_score, 2) if mean_score is not None else None,
+            'best_score': best,
+            'ticks': ticks or 0,
+            'death_causes': {cause or 'none': total for cause, total in causes},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ranking e estatísticas das partidas do Jogo da Cobra")
+    parser.add_argument('--db', default=STATS_DB, help="arquivo do banco SQLite")
+    parser.add_argument('--top', type=int, default=10, help="quantas partidas mostrar no ranking")
+    parser.add_argument('--summary', action='store_true', help="mostra também os totais (percorre a tabela inteira)")
+    args = parser.parse_args(argv)
+    stats = STATS(args.db)
+    started = time.perf_counter()
+    report = {'leaders': stats.leaders(args.top)}
+    report['query_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    if args.summary:
+        report['summary'] = stats.summary()
+    stats.close()
+    print(json.dumps(report, indent=1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import pytest
+
+import snake_core
+from snake_autopilot import AUTOPILOT
+from snake_core import GAME
+
+STEPS = {snake_core.UP: (0, -1), snake_core.RIGHT: (1, 0), snake_core.DOWN: (0, 1), snake_core.LEFT: (-1, 0)}
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_autopilot_only_crashes_when_boxed_in(seed):
+    game = GAME.seeded(seed)
+    game.start_level(1)
+    autopilot = AUTOPILOT(game)
+    stride = game.grid.stride
+    for _ in range(2500):
+        head = game.snake.head_index()
+        exits = [head + step for step in (-stride, 1, stride, -1) if autopilot.passable(head + step)]
+        direction = autopilot.direction()
+        dx, dy = STEPS[direction]
+        # Nunca volta por cima do pescoço (a direção seria ignorada).
+        assert head + dx + dy * stride != game.snake.body[1]
+        events = game.step(direction)
+        if snake_core.LOST_LIFE in events:
+            # Só bate quando não havia nenhuma célula livre em volta da cabeça.
+            assert exits == []
+        if snake_core.GAME_OVER in events:
+            break
+        if snake_core.LEVEL_COMPLETE in events:
+            game.next_level()
+            game.start_level(game.level)
+    assert game.score > 0
+
+
+def test_autopilot_does_not_enter_the_tail_of_a_growing_snake():
+    # Logo depois de comer o rabo fica no lugar por um tick.
+    game = GAME.seeded(14)
+    game.start_level(1)
+    autopilot = AUTOPILOT(game)
+    for _ in range(3000):
+        if game.snake.new_block:
+            tail = game.snake.body[-1]
+            direction = autopilot.direction()
+            dx, dy = STEPS[direction]
+            assert game.snake.head_index() + dx + dy * game.grid.stride != tail
+        else:
+            direction = autopilot.direction()
+        events = game.step(direction)
+        if snake_core.GAME_OVER in events:
+            break
+        if snake_core.LEVEL_COMPLETE in events:
+            game.next_level()
+            game.start_level(game.level)
@@ -0,0 +1,68 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import snake_batch
+import snake_core
+from snake_autopilot import AUTOPILOT
+from snake_core import GAME, GRID
+
+
+def test_new_games_get_the_seeded_layout():
+    batch = snake_batch.BATCH_GAME(32, seed=0)
+    for game in range(batch.count):
+        core = GAME.seeded(int(batch.seeds[game]))
+        core.start_level(1)
+        assert np.flatnonzero(batch.cells[game] & GRID.OBSTACLE).tolist() == sorted(core.obstacles)
+        assert bytes(batch.cells[game]) == bytes(core.grid.cells)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_batch_matches_core_game(seed):
+    # A mesma partida nos dois motores, com o piloto automático jogando na do núcleo e a fruta do lote
+    # copiada para o núcleo (os dois sorteiam frutas com geradores diferentes).
+    batch = snake_batch.BATCH_GAME(1, seed=seed)
+    game = GAME.seeded(int(batch.seeds[0]))
+    game.start_level(1)
+    autopilot = AUTOPILOT(game)
+    levels = set()
+    for _ in range(3000):
+        game.fruit.index = int(batch.fruit[0])
+        game.fruit.x, game.fruit.y = game.grid.cell_x(game.fruit.index), game.grid.cell_y(game.fruit.index)
+        direction = autopilot.direction()
+        events = game.step(direction)
+        batch_events = batch.step([snake_batch.DIRECTIONS.index(direction)])
+        assert [event for event in batch_events if batch_events[event][0]] == \
+               [event for event in batch_events if event in events]
+        if snake_core.GAME_OVER in events:
+            break
+        if snake_core.LEVEL_COMPLETE in events:
+            game.next_level()
+            game.start_level(game.level)
+        levels.add(game.level)
+        assert bytes(batch.cells[0]) == bytes(game.grid.cells)
+        length = batch.length[0]
+        body = np.roll(batch.body[0], -batch.start[0])[:length].tolist()
+        assert body == list(game.snake.body)
+        assert (batch.score[0], batch.lives[0], batch.level[0], batch.speed[0]) == \
+               (game.score, game.lives, game.level, game.speed)
+    assert len(levels) > 1
+
+
+def test_level_layouts_keep_batch_throughput():
+    # Os layouts por nível não podem custar mais que a metade da vazão do layout fixo em jogo aleatório,
+    # em que as partidas recomeçam o tempo todo.
+    import time
+
+    rates = []
+    for obstacles in (None, []):
+        batch = snake_batch.BATCH_GAME(1024, obstacles=obstacles, seed=0)
+        rng = np.random.default_rng(0)
+        actions = [rng.integers(snake_batch.KEEP, 4, batch.count) for _ in range(400)]
+        for step in actions[:200]:
+            batch.step(step)
+        start = time.perf_counter()
+        for step in actions[200:]:
+            batch.step(step)
+        rates.append(200 * batch.count / (time.perf_counter() - start))
+    assert rates[0] >= 0.5 * rates[1]
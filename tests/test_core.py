@@ -0,0 +1,110 @@
+import random
+
+import snake_core
+from snake_core import BODY, GAME, GRID
+
+
+def new_game(seed=0, **options):
+    game = GAME.seeded(seed, **options)
+    game.start_level(1)
+    return game
+
+
+def test_key_without_direction_does_not_move_stopped_snake():
+    game = new_game()
+    head = game.snake.head_index()
+    game.change_direction(None)
+    assert game.has_moved
+    assert not game.is_advancing()
+    for _ in range(5):
+        assert game.step() == []
+    assert game.lives == 3
+    assert game.ticks == 0
+    assert game.snake.head_index() == head
+    game.step(snake_core.UP)
+    assert game.is_advancing()
+    assert game.ticks == 1
+    assert game.snake.head_index() == head - game.grid.stride
+
+
+def test_mid_game_layout_keeps_cells_ahead_of_head_clear():
+    for seed in range(100):
+        game = new_game(seed)
+        game.step(snake_core.UP if seed % 2 else snake_core.DOWN)
+        game.step()
+        game.next_level()
+        game.start_level(game.level)
+        head = game.snake.head_index()
+        step = game.snake.direction[0] + game.snake.direction[1] * game.grid.stride
+        for distance in range(1, snake_core.START_CLEARANCE + 1):
+            assert head + step * distance not in game.obstacles
+
+
+def test_body_ring_buffer_wraps_and_grows():
+    rng = random.Random(0)
+    body = BODY(range(3), capacity=4)
+    expected = [0, 1, 2]
+    for cell in range(100, 400):
+        if rng.random() < 0.6 or len(expected) == 1:
+            body.push_head(cell)
+            expected.insert(0, cell)
+        else:
+            assert body.pop_tail() == expected.pop()
+        assert list(body) == expected
+        assert body[0] == expected[0] and body[-1] == expected[-1]
+    assert body.capacity >= len(body) > 4
+
+    state = body.snapshot()
+    assert list(state) == expected
+    body.clear()
+    body.push_head(1)
+    body.restore(state)
+    assert list(body) == expected
+
+
+def check_free_pool(grid):
+    free = list(grid.free)
+    assert sorted(free) == [index for index, value in enumerate(grid.cells) if value == 0]
+    for position, index in enumerate(free):
+        assert grid.free_position[index] == position
+    assert sum(position >= 0 for position in grid.free_position) == len(free)
+
+
+def test_free_cell_pool_follows_grid():
+    rng = random.Random(1)
+    grid = GRID(8)
+    snake = []
+    for _ in range(500):
+        if snake and rng.random() < 0.4:
+            grid.remove_snake(snake.pop(rng.randrange(len(snake))))
+        else:
+            index = grid.cell_index(rng.randrange(8), rng.randrange(8))
+            if grid.cells[index] & GRID.OBSTACLE == 0:
+                grid.add_snake(index)
+                snake.append(index)
+        if rng.random() < 0.05:
+            grid.add_obstacle(grid.sample_free(rng))
+        check_free_pool(grid)
+
+    state = grid.snapshot()
+    grid.add_snake(grid.sample_free(rng))
+    grid.restore(state)
+    check_free_pool(grid)
+    assert (bytes(grid.cells), grid.free, grid.free_position) == state
+
+
+def test_snapshot_restore_replays_the_same_ticks():
+    game = new_game(3)
+    moves = [snake_core.UP, snake_core.RIGHT, snake_core.DOWN, snake_core.RIGHT, snake_core.UP] * 8
+
+    def run():
+        trace = []
+        for move in moves:
+            trace.append((tuple(game.step(move)), tuple(game.snake.body), game.fruit.index, game.score, game.lives))
+        return trace
+
+    game.step(snake_core.UP)
+    state = game.snapshot()
+    first = run()
+    game.restore(state)
+    assert run() == first
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def snake():
+    # Imagens e fontes usam caminhos relativos à raiz do repositório.
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    import snake
+    if snake.screen is None:
+        snake.init_display()
+    yield snake
+    os.chdir(cwd)
+
+
+def test_key_without_direction_at_start(snake):
+    game = snake.MAIN.seeded(0)
+    game.start_level(1)
+    game.show_objective = False
+    game.change_direction(None)
+    game.step()
+    game.draw_elements(1.0)
+    assert game.lives == 3
+    game.step(snake.snake_core.RIGHT)
+    game.draw_elements(0.5)
+    assert game.ticks == 1
+
+
+def cell_rect(snake, game, index):
+    return pygame.Rect(game.grid.cell_x(index) * snake.cell_size, game.grid.cell_y(index) * snake.cell_size,
+                       snake.cell_size, snake.cell_size)
+
+
+def test_one_cell_move_updates_only_dirty_rects(snake, monkeypatch):
+    updates = []
+    monkeypatch.setattr(pygame.display, 'update', lambda *rects: updates.append(rects))
+    game = snake.MAIN.seeded(0)
+    game.start_level(1)
+    game.show_objective = False
+    game.present(game.draw_elements(1.0))
+    assert updates.pop() == ()  # Primeiro quadro: a tela inteira
+
+    tail = game.snake.body[-1]
+    game.step(snake.snake_core.UP)
+    rects = game.draw_elements(1.0)
+    # Fruta, as três células da cobra, pontuação e vidas.
+    assert len(rects) == 6
+    assert any(rect.contains(cell_rect(snake, game, game.snake.head_index())) for rect in rects)
+    game.present(rects)
+    sent, = updates.pop()
+    # O rabo que saiu é apagado com os retângulos do quadro anterior.
+    assert any(rect.contains(cell_rect(snake, game, tail)) for rect in sent)
+    assert len(sent) == 12
+    assert sum(rect.width * rect.height for rect in sent) < snake.screen.get_width() * snake.screen.get_height() // 10
+
+
+def test_text_cache_reuses_surfaces_and_evicts_least_recent(snake):
+    cache = snake.TEXT_CACHE(max_entries=2)
+    first = cache.render('1', 25, snake.TEXT_COLOR)
+    cache.render('2', 25, snake.TEXT_COLOR)
+    assert cache.render('1', 25, snake.TEXT_COLOR) is first
+    cache.render('3', 25, snake.TEXT_COLOR)  # Descarta '2', o usado há mais tempo
+    assert [key[2] for key in cache.surfaces] == ['1', '3']
+    assert cache.render('1', 25, snake.TEXT_COLOR) is first
+    assert len(cache.fonts) == 1
+
+
+def test_skin_cache_keeps_the_most_recent_packs(snake):
+    assets = snake.ASSETS(max_skins=2)
+    first, second, third = assets.skin_names()[:3]
+    sprites = assets.skin_sprites(first)
+    assets.skin_sprites(second)
+    assets.tinted_sprites((255, 0, 0), skin=second)
+    assert assets.skin_sprites(first) is sprites
+    assets.skin_sprites(third)  # Descarta `second`, junto com as cores feitas dele
+    assert [skin for skin, _ in assets.skins] == [first, third]
+    assert not any(key[1] == second for key in assets.tints)
+    assert assets.skin_sprites(first) is sprites
+
+
+class CHANNEL:
+    def __init__(self):
+        self.sound = None
+
+    def get_busy(self):
+        return self.sound is not None
+
+    def play(self, sound):
+        self.sound = sound
+
+
+def test_audio_pool_steals_the_oldest_lower_priority_channel(snake):
+    audio = snake.AUDIO(channels=2)
+    audio.channels = [CHANNEL(), CHANNEL()]
+    audio.playing = [(0, 0)] * 2
+    audio.sounds = {'crunch': 'crunch', 'jumpscare': 'jumpscare'}
+    first = audio.play('crunch')
+    second = audio.play('crunch')
+    assert first is not second
+    # Canais cheios: o efeito de prioridade maior rouba o mais antigo.
+    assert audio.play('jumpscare') is first
+    assert audio.play('crunch') is second
+    assert audio.play('jumpscare') is second
+    # Os dois canais com o efeito de prioridade maior: o de menor não toca.
+    assert audio.play('crunch') is None
+    assert audio.play('missing') is None
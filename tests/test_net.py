@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+import snake_arena
+import snake_net
+import snake_replay
+from snake_codec import DecodeError
+
+
+def state(arena):
+    competitors = [(c.alive, c.left, c.bot, c.score, c.kills, c.deaths, list(c.snake.body)) for c in arena.competitors]
+    return bytes(arena.grid.cells), list(arena.owner), set(arena.fruits), competitors
+
+
+def test_ticks_rebuild_the_server_arena():
+    # Tabuleiro pequeno e cheio: mortes, kills e nascimentos em quase todo tick.
+    arena = snake_arena.ARENA.seeded(4, players=0, bots=40, size=24)
+    rng = random.Random(2)
+    players = [arena.join().number for _ in range(4)]
+    mirror, number, _ = snake_net.read_welcome(snake_net.encode_welcome(arena, players[0]))
+    assert number == players[0]
+    roster = [(snake_net.JOINED, number) for number in players]
+    seen = set()
+    for tick in range(600):
+        if tick % 53 == 7:
+            number = rng.choice(players)
+            arena.leave(number)
+            roster.append((snake_net.LEFT, number))
+        if tick % 41 == 3:
+            number = arena.join().number
+            players.append(number)
+            roster.append((snake_net.JOINED, number))
+        moving = [(c, c.snake.new_block) for c in arena.competitors if c.alive]
+        arena.step({number: rng.choice(snake_arena.DIRECTIONS) for number in players if rng.random() < 0.3})
+        snake_net.apply_tick(mirror, snake_net.encode_tick(arena, roster, moving))
+        roster = []
+        assert state(mirror) == state(arena), tick
+        seen.update(event for event, _ in arena.events)
+        if tick % 100 == 0:
+            # Quem entra no meio da partida também recebe a arena inteira.
+            late, _, _ = snake_net.read_welcome(snake_net.encode_welcome(arena, 0))
+            assert state(late) == state(arena)
+    assert {snake_arena.RESPAWNED, snake_arena.DIED, snake_arena.KILL} <= seen
+
+
+def test_truncated_tick_is_a_decode_error():
+    arena = snake_arena.ARENA.seeded(1, players=0, bots=5, size=20)
+    mirror, _, _ = snake_net.read_welcome(snake_net.encode_welcome(arena, 0))
+    moving = [(c, c.snake.new_block) for c in arena.competitors if c.alive]
+    arena.step()
+    payload = snake_net.encode_tick(arena, [], moving)
+    with pytest.raises(DecodeError):
+        snake_net.apply_tick(mirror, payload[:-1])
+    assert not issubclass(snake_net.ProtocolError, snake_replay.ReplayError)
@@ -0,0 +1,68 @@
+import pytest
+
+import snake_core
+import snake_replay
+from snake_autopilot import AUTOPILOT
+from snake_replay import REPLAY
+
+
+def record(seed, ticks=1500):
+    # Partida jogada pelo piloto automático, gravada como o jogo grava (comandos e escolhas de nível).
+    replay = REPLAY(seed)
+    game = replay.new_game()
+    autopilot = AUTOPILOT(game)
+    while not game.game_over() and game.ticks < ticks:
+        direction = autopilot.direction()
+        replay.direction(game.ticks, direction)
+        game.change_direction(direction)
+        game.step()
+        if game.level_complete:
+            level = game.level % snake_core.LEVEL_COUNT + 1
+            replay.select_level(game.ticks, level)
+            game.next_level()
+            game.start_level(level)
+    replay.finish(game.ticks, game.score)
+    return replay, game
+
+
+def test_round_trip_keeps_every_record():
+    replay, _ = record(5)
+    loaded = REPLAY.from_bytes(replay.to_bytes())
+    assert (loaded.seed, loaded.level, loaded.size) == (5, 1, replay.size)
+    assert loaded.records == replay.records
+    assert (loaded.ticks, loaded.score) == (replay.ticks, replay.score)
+
+
+@pytest.mark.parametrize('seed', [-1, 2 ** 64 + 7])
+def test_seeds_outside_64_bits_still_save(seed):
+    game = snake_core.GAME.seeded(seed)
+    replay, _ = record(game.seed, ticks=50)
+    assert REPLAY(seed).seed == game.seed == seed & snake_core.SEED_MASK
+    assert REPLAY.from_bytes(replay.to_bytes()).seed == game.seed
+    assert snake_replay.verify(replay)
+
+
+def test_playback_reaches_the_recorded_game():
+    replay, game = record(11)
+    assert game.score > 0
+    assert any(code >= snake_replay.LEVEL for _, code in replay.records)
+    played = snake_replay.play(REPLAY.from_bytes(replay.to_bytes()))
+    assert (played.ticks, played.score, played.level, played.lives) == (game.ticks, game.score, game.level, game.lives)
+    assert list(played.snake.body) == list(game.snake.body)
+    assert snake_replay.verify(replay)
+
+
+def test_playback_is_deterministic():
+    replay, _ = record(2, ticks=600)
+    first = snake_replay.play(replay)
+    second = snake_replay.play(replay)
+    assert (first.score, first.ticks, list(first.snake.body), first.fruit.index) == \
+           (second.score, second.ticks, list(second.snake.body), second.fruit.index)
+
+
+def test_truncated_replay_is_rejected():
+    replay, _ = record(1, ticks=50)
+    data = replay.to_bytes()
+    for cut in (3, len(data) - 1):
+        with pytest.raises(snake_replay.DecodeError):
+            REPLAY.from_bytes(data[:cut])
@@ -0,0 +1,22 @@
+import time
+
+import snake_core
+import snake_stats
+
+
+def test_failed_batch_is_dropped_and_writer_keeps_going(tmp_path, monkeypatch):
+    monkeypatch.setattr(snake_stats, 'FLUSH_SECONDS', 0.0)
+    stats = snake_stats.STATS(str(tmp_path / 'stats.db'))
+    stats.record(('linha sem as outras colunas',))
+    deadline = time.monotonic() + 5
+    while stats.dropped == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stats.dropped == 1
+    assert stats.error is not None
+
+    game = snake_core.GAME.seeded(7)
+    game.score = 12
+    stats.record(snake_stats.session_row(game, {1: 12}))
+    stats.close()
+    assert not stats.writer.is_alive()
+    assert [row['score'] for row in stats.leaders()] == [12]